@@ -0,0 +1,14 @@
+-- MIGRATION 001: Secondary indexes for the hot queries.
+-- Without these, the Kitchen Monitor and receipt lookups scan whole tables.
+
+-- get_order_items() and the per-order total subquery filter on OrderItem.order_id
+CREATE INDEX IF NOT EXISTS idx_orderitem_order_id ON OrderItem(order_id);
+
+-- Product sales lookups (and deleting a product) filter on OrderItem.product_id
+CREATE INDEX IF NOT EXISTS idx_orderitem_product_id ON OrderItem(product_id);
+
+-- fetch_orders_by_status(): WHERE status=? ORDER BY order_id DESC is served straight from the index
+CREATE INDEX IF NOT EXISTS idx_order_status_id ON [Order](status, order_id);
+
+-- Date-range reports over [Order]
+CREATE INDEX IF NOT EXISTS idx_order_date ON [Order](order_date);
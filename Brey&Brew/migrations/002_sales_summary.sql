@@ -0,0 +1,85 @@
+-- MIGRATION 002: Materialized running totals for the Home Dashboard.
+-- get_dashboard_stats() reads one row instead of summing every OrderItem.
+-- Triggers keep the totals exact for every insert, update and delete
+-- (including delete_order_data), no matter which code path wrote the rows.
+
+-- 1. All-time totals (always exactly one row, summary_id = 1)
+CREATE TABLE IF NOT EXISTS SalesSummary (
+    summary_id INTEGER PRIMARY KEY CHECK (summary_id = 1),
+    revenue REAL NOT NULL DEFAULT 0,
+    order_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- 2. Per-day totals, keyed by date(order_date) e.g. '2025-12-01'
+CREATE TABLE IF NOT EXISTS DailySales (
+    sale_date TEXT PRIMARY KEY,
+    revenue REAL NOT NULL DEFAULT 0,
+    order_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- BACKFILL from the existing history
+INSERT OR IGNORE INTO SalesSummary (summary_id) VALUES (1);
+UPDATE SalesSummary SET
+    revenue = COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem), 0),
+    order_count = (SELECT COUNT(*) FROM [Order]);
+
+INSERT OR IGNORE INTO DailySales (sale_date, order_count)
+    SELECT date(order_date), COUNT(*) FROM [Order] GROUP BY date(order_date);
+UPDATE DailySales SET revenue = COALESCE((
+    SELECT SUM(oi.quantity * oi.unit_price)
+    FROM OrderItem oi JOIN [Order] o ON o.order_id = oi.order_id
+    WHERE date(o.order_date) = DailySales.sale_date), 0);
+
+-- TRIGGERS: [Order] rows drive the order counts
+CREATE TRIGGER IF NOT EXISTS trg_summary_order_insert AFTER INSERT ON [Order]
+BEGIN
+    UPDATE SalesSummary SET order_count = order_count + 1 WHERE summary_id = 1;
+    INSERT OR IGNORE INTO DailySales (sale_date) VALUES (date(NEW.order_date));
+    UPDATE DailySales SET order_count = order_count + 1 WHERE sale_date = date(NEW.order_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_order_delete AFTER DELETE ON [Order]
+BEGIN
+    UPDATE SalesSummary SET order_count = order_count - 1 WHERE summary_id = 1;
+    UPDATE DailySales SET order_count = order_count - 1 WHERE sale_date = date(OLD.order_date);
+END;
+
+-- Moving an order to another day moves its count and revenue with it
+CREATE TRIGGER IF NOT EXISTS trg_summary_order_redate AFTER UPDATE OF order_date ON [Order]
+WHEN date(OLD.order_date) IS NOT date(NEW.order_date)
+BEGIN
+    INSERT OR IGNORE INTO DailySales (sale_date) VALUES (date(NEW.order_date));
+    UPDATE DailySales SET
+        order_count = order_count - 1,
+        revenue = revenue - COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = OLD.order_id), 0)
+    WHERE sale_date = date(OLD.order_date);
+    UPDATE DailySales SET
+        order_count = order_count + 1,
+        revenue = revenue + COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = NEW.order_id), 0)
+    WHERE sale_date = date(NEW.order_date);
+END;
+
+-- TRIGGERS: OrderItem rows drive the revenue
+CREATE TRIGGER IF NOT EXISTS trg_summary_item_insert AFTER INSERT ON OrderItem
+BEGIN
+    UPDATE SalesSummary SET revenue = revenue + NEW.quantity * NEW.unit_price WHERE summary_id = 1;
+    UPDATE DailySales SET revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_item_delete AFTER DELETE ON OrderItem
+BEGIN
+    UPDATE SalesSummary SET revenue = revenue - OLD.quantity * OLD.unit_price WHERE summary_id = 1;
+    UPDATE DailySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summary_item_update AFTER UPDATE OF order_id, quantity, unit_price ON OrderItem
+BEGIN
+    UPDATE SalesSummary SET revenue = revenue - OLD.quantity * OLD.unit_price + NEW.quantity * NEW.unit_price
+    WHERE summary_id = 1;
+    UPDATE DailySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE DailySales SET revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
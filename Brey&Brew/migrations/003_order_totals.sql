@@ -0,0 +1,12 @@
+-- MIGRATION 003: Denormalized order totals on the [Order] header.
+-- save_order() writes total_amount/item_count in the same transaction as the items,
+-- so the Kitchen Monitor and Sales History no longer aggregate OrderItem per row.
+-- Use 'python manage.py check-totals' to verify them against OrderItem.
+
+ALTER TABLE [Order] ADD COLUMN total_amount REAL NOT NULL DEFAULT 0;
+ALTER TABLE [Order] ADD COLUMN item_count INTEGER NOT NULL DEFAULT 0; -- Number of line items
+
+-- BACKFILL existing orders
+UPDATE [Order] SET
+    total_amount = COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = [Order].order_id), 0),
+    item_count = (SELECT COUNT(*) FROM OrderItem WHERE order_id = [Order].order_id);
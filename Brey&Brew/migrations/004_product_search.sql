@@ -0,0 +1,33 @@
+-- MIGRATION 004: Full-text product search (SQLite FTS5).
+-- ProductSearch is an external-content index over Product(name, description),
+-- kept in sync by triggers and queried by database.search_products().
+-- prefix='2 3' pre-builds prefix indexes so live search-as-you-type stays fast.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS ProductSearch USING fts5(
+    name,
+    description,
+    content='Product',
+    content_rowid='product_id',
+    prefix='2 3',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+-- TRIGGERS: mirror every Product change into the index
+CREATE TRIGGER IF NOT EXISTS trg_product_search_insert AFTER INSERT ON Product
+BEGIN
+    INSERT INTO ProductSearch (rowid, name, description) VALUES (NEW.product_id, NEW.name, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_product_search_delete AFTER DELETE ON Product
+BEGIN
+    INSERT INTO ProductSearch (ProductSearch, rowid, name, description) VALUES ('delete', OLD.product_id, OLD.name, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_product_search_update AFTER UPDATE OF name, description ON Product
+BEGIN
+    INSERT INTO ProductSearch (ProductSearch, rowid, name, description) VALUES ('delete', OLD.product_id, OLD.name, OLD.description);
+    INSERT INTO ProductSearch (rowid, name, description) VALUES (NEW.product_id, NEW.name, NEW.description);
+END;
+
+-- BACKFILL the index from the existing products
+INSERT INTO ProductSearch (ProductSearch) VALUES ('rebuild');
@@ -0,0 +1,7 @@
+-- MIGRATION 005: Idempotent order writes for the offline order journal.
+-- Every journaled checkout carries a unique client_ref; replaying the journal after a
+-- crash can then never save the same order twice (save_orders_bulk skips known refs).
+
+ALTER TABLE [Order] ADD COLUMN client_ref TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_order_client_ref ON [Order](client_ref) WHERE client_ref IS NOT NULL;
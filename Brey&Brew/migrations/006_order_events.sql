@@ -0,0 +1,28 @@
+-- MIGRATION 006: Order change feed for push-style Kitchen Monitor updates.
+-- Every order insert, status change and delete appends a row with a monotonically
+-- increasing seq. Screens remember the last seq they applied and fetch only newer
+-- events (database.fetch_order_changes) instead of reloading the whole order list.
+-- Triggers cover every write path (checkout, journal flush, bulk import, service).
+
+CREATE TABLE IF NOT EXISTS OrderEvent (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,                      -- 'created', 'status' or 'deleted'
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_event_order_insert AFTER INSERT ON [Order]
+BEGIN
+    INSERT INTO OrderEvent (order_id, event_type) VALUES (NEW.order_id, 'created');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_order_status AFTER UPDATE OF status ON [Order]
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    INSERT INTO OrderEvent (order_id, event_type) VALUES (NEW.order_id, 'status');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_order_delete AFTER DELETE ON [Order]
+BEGIN
+    INSERT INTO OrderEvent (order_id, event_type) VALUES (OLD.order_id, 'deleted');
+END;
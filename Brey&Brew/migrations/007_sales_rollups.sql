@@ -0,0 +1,164 @@
+-- MIGRATION 007: Time-bucketed sales rollups for the Analytics tab.
+-- Like DailySales (migration 002), these tables are kept exact by triggers, so the
+-- reports read a few summary rows per bucket instead of grouping raw OrderItem rows.
+--   HourlySales        revenue/orders per hour        ('YYYY-MM-DD HH:00')
+--   ProductDailySales  quantity/revenue per product per day
+--   CashierDailySales  revenue/orders per cashier per day
+-- Weekly figures are summed from DailySales. 'python manage.py rebuild-rollups'
+-- recomputes everything from the raw rows if they ever drift.
+
+CREATE TABLE IF NOT EXISTS HourlySales (
+    sale_hour TEXT PRIMARY KEY,
+    revenue REAL NOT NULL DEFAULT 0,
+    order_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ProductDailySales (
+    sale_date TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, product_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS CashierDailySales (
+    sale_date TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    revenue REAL NOT NULL DEFAULT 0,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, user_id)
+) WITHOUT ROWID;
+
+-- BACKFILL from the existing history (uses the denormalized totals from migration 003)
+INSERT OR IGNORE INTO HourlySales (sale_hour, revenue, order_count)
+    SELECT strftime('%Y-%m-%d %H:00', order_date), SUM(total_amount), COUNT(*)
+    FROM [Order] GROUP BY 1;
+
+INSERT OR IGNORE INTO CashierDailySales (sale_date, user_id, revenue, order_count)
+    SELECT date(order_date), COALESCE(user_id, 0), SUM(total_amount), COUNT(*)
+    FROM [Order] GROUP BY 1, 2;
+
+INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id, quantity, revenue)
+    SELECT date(o.order_date), oi.product_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price)
+    FROM OrderItem oi JOIN [Order] o ON o.order_id = oi.order_id
+    GROUP BY 1, 2;
+
+-- TRIGGERS: [Order] rows drive the order counts
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_insert AFTER INSERT ON [Order]
+BEGIN
+    INSERT OR IGNORE INTO HourlySales (sale_hour) VALUES (strftime('%Y-%m-%d %H:00', NEW.order_date));
+    UPDATE HourlySales SET order_count = order_count + 1
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', NEW.order_date);
+    INSERT OR IGNORE INTO CashierDailySales (sale_date, user_id) VALUES (date(NEW.order_date), COALESCE(NEW.user_id, 0));
+    UPDATE CashierDailySales SET order_count = order_count + 1
+    WHERE sale_date = date(NEW.order_date) AND user_id = COALESCE(NEW.user_id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_delete AFTER DELETE ON [Order]
+BEGIN
+    UPDATE HourlySales SET order_count = order_count - 1
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', OLD.order_date);
+    UPDATE CashierDailySales SET order_count = order_count - 1
+    WHERE sale_date = date(OLD.order_date) AND user_id = COALESCE(OLD.user_id, 0);
+END;
+
+-- Moving an order to another hour (or cashier) moves its count and revenue with it.
+-- Revenue is taken from OrderItem, which is what the item triggers below added.
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_move AFTER UPDATE OF order_date, user_id ON [Order]
+WHEN strftime('%Y-%m-%d %H', OLD.order_date) IS NOT strftime('%Y-%m-%d %H', NEW.order_date)
+  OR OLD.user_id IS NOT NEW.user_id
+BEGIN
+    INSERT OR IGNORE INTO HourlySales (sale_hour) VALUES (strftime('%Y-%m-%d %H:00', NEW.order_date));
+    UPDATE HourlySales SET
+        order_count = order_count - 1,
+        revenue = revenue - COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = OLD.order_id), 0)
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', OLD.order_date);
+    UPDATE HourlySales SET
+        order_count = order_count + 1,
+        revenue = revenue + COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = NEW.order_id), 0)
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', NEW.order_date);
+
+    INSERT OR IGNORE INTO CashierDailySales (sale_date, user_id) VALUES (date(NEW.order_date), COALESCE(NEW.user_id, 0));
+    UPDATE CashierDailySales SET
+        order_count = order_count - 1,
+        revenue = revenue - COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = OLD.order_id), 0)
+    WHERE sale_date = date(OLD.order_date) AND user_id = COALESCE(OLD.user_id, 0);
+    UPDATE CashierDailySales SET
+        order_count = order_count + 1,
+        revenue = revenue + COALESCE((SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = NEW.order_id), 0)
+    WHERE sale_date = date(NEW.order_date) AND user_id = COALESCE(NEW.user_id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_product_redate AFTER UPDATE OF order_date ON [Order]
+WHEN date(OLD.order_date) IS NOT date(NEW.order_date)
+BEGIN
+    INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id)
+        SELECT DISTINCT date(NEW.order_date), product_id FROM OrderItem WHERE order_id = NEW.order_id;
+    UPDATE ProductDailySales SET
+        quantity = quantity - (SELECT SUM(quantity) FROM OrderItem
+                               WHERE order_id = OLD.order_id AND product_id = ProductDailySales.product_id),
+        revenue = revenue - (SELECT SUM(quantity * unit_price) FROM OrderItem
+                             WHERE order_id = OLD.order_id AND product_id = ProductDailySales.product_id)
+    WHERE sale_date = date(OLD.order_date)
+      AND product_id IN (SELECT product_id FROM OrderItem WHERE order_id = OLD.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity + (SELECT SUM(quantity) FROM OrderItem
+                               WHERE order_id = NEW.order_id AND product_id = ProductDailySales.product_id),
+        revenue = revenue + (SELECT SUM(quantity * unit_price) FROM OrderItem
+                             WHERE order_id = NEW.order_id AND product_id = ProductDailySales.product_id)
+    WHERE sale_date = date(NEW.order_date)
+      AND product_id IN (SELECT product_id FROM OrderItem WHERE order_id = NEW.order_id);
+END;
+
+-- TRIGGERS: OrderItem rows drive revenue and product quantities
+CREATE TRIGGER IF NOT EXISTS trg_rollup_item_insert AFTER INSERT ON OrderItem
+BEGIN
+    UPDATE HourlySales SET revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = NEW.order_id);
+    UPDATE CashierDailySales SET revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = NEW.order_id);
+    INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id)
+        SELECT date(order_date), NEW.product_id FROM [Order] WHERE order_id = NEW.order_id;
+    UPDATE ProductDailySales SET
+        quantity = quantity + NEW.quantity,
+        revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE product_id = NEW.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_item_delete AFTER DELETE ON OrderItem
+BEGIN
+    UPDATE HourlySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE CashierDailySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity - OLD.quantity,
+        revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE product_id = OLD.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_item_update AFTER UPDATE OF order_id, product_id, quantity, unit_price ON OrderItem
+BEGIN
+    UPDATE HourlySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE HourlySales SET revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = NEW.order_id);
+    UPDATE CashierDailySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE CashierDailySales SET revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = NEW.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity - OLD.quantity,
+        revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE product_id = OLD.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id)
+        SELECT date(order_date), NEW.product_id FROM [Order] WHERE order_id = NEW.order_id;
+    UPDATE ProductDailySales SET
+        quantity = quantity + NEW.quantity,
+        revenue = revenue + NEW.quantity * NEW.unit_price
+    WHERE product_id = NEW.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
@@ -0,0 +1,54 @@
+-- MIGRATION 008: Let database.archive_orders() move old orders out of the hot tables
+-- without touching the sales totals.
+-- Archived orders still count as sales, so the summary triggers from migrations 002
+-- and 007 must ignore the DELETEs that move them. archive_orders() inserts a row into
+-- ArchiveLock inside its own transaction (no other connection ever sees it) and the
+-- delete triggers below are recreated to skip while it is present.
+-- trg_event_order_delete (migration 006) is NOT guarded: the Kitchen Monitor should
+-- drop archived orders like any other removed order.
+
+CREATE TABLE IF NOT EXISTS ArchiveLock (
+    locked INTEGER PRIMARY KEY CHECK (locked = 1)
+);
+
+DROP TRIGGER IF EXISTS trg_summary_order_delete;
+CREATE TRIGGER trg_summary_order_delete AFTER DELETE ON [Order]
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveLock)
+BEGIN
+    UPDATE SalesSummary SET order_count = order_count - 1 WHERE summary_id = 1;
+    UPDATE DailySales SET order_count = order_count - 1 WHERE sale_date = date(OLD.order_date);
+END;
+
+DROP TRIGGER IF EXISTS trg_summary_item_delete;
+CREATE TRIGGER trg_summary_item_delete AFTER DELETE ON OrderItem
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveLock)
+BEGIN
+    UPDATE SalesSummary SET revenue = revenue - OLD.quantity * OLD.unit_price WHERE summary_id = 1;
+    UPDATE DailySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+END;
+
+DROP TRIGGER IF EXISTS trg_rollup_order_delete;
+CREATE TRIGGER trg_rollup_order_delete AFTER DELETE ON [Order]
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveLock)
+BEGIN
+    UPDATE HourlySales SET order_count = order_count - 1
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', OLD.order_date);
+    UPDATE CashierDailySales SET order_count = order_count - 1
+    WHERE sale_date = date(OLD.order_date) AND user_id = COALESCE(OLD.user_id, 0);
+END;
+
+DROP TRIGGER IF EXISTS trg_rollup_item_delete;
+CREATE TRIGGER trg_rollup_item_delete AFTER DELETE ON OrderItem
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveLock)
+BEGIN
+    UPDATE HourlySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE CashierDailySales SET revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity - OLD.quantity,
+        revenue = revenue - OLD.quantity * OLD.unit_price
+    WHERE product_id = OLD.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+END;
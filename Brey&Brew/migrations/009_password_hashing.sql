@@ -0,0 +1,10 @@
+-- MIGRATION 009: Salted password hashes (see auth.py).
+-- Existing plaintext passwords keep working: database.validate_login() replaces each one
+-- with a hash on that user's next successful login, and 'python manage.py hash-passwords'
+-- converts every remaining plaintext row at once.
+-- AppSetting holds values shared by every till, e.g. the tuned 'password_cost'.
+
+CREATE TABLE IF NOT EXISTS AppSetting (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
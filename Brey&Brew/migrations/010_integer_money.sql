@@ -0,0 +1,230 @@
+-- MIGRATION 010: Store money as whole centavos (INTEGER) instead of REAL pesos.
+-- Floating point sums drift over hundreds of thousands of line items; integer sums are
+-- exact (and cheaper), so every amount is now kept in centavos:
+--   Product.price            -> price_cents
+--   OrderItem.unit_price     -> unit_price_cents
+--   [Order].total_amount     -> total_cents
+--   *Sales*.revenue          -> revenue_cents   (SalesSummary, DailySales, HourlySales,
+--                                                ProductDailySales, CashierDailySales)
+-- Prices are rounded to the nearest centavo; order totals and every summary row are then
+-- recomputed from the converted lines (not rounded from the old float sums), so they agree
+-- with verify_order_totals() and rebuild_sales_rollups() from the start. Pesos only appear
+-- at the edges (money.py). The archive file is created in centavos (ARCHIVE_SCHEMA in
+-- database.py), so the summaries below include archived orders.
+-- The summary/rollup triggers from migrations 002, 007 and 008 read these columns, so
+-- they are dropped first and recreated below with the same logic (and ArchiveLock guards).
+-- Needs SQLite 3.35+ for DROP COLUMN (checked by apply_migrations).
+
+DROP TRIGGER IF EXISTS trg_summary_order_redate;
+DROP TRIGGER IF EXISTS trg_summary_item_insert;
+DROP TRIGGER IF EXISTS trg_summary_item_delete;
+DROP TRIGGER IF EXISTS trg_summary_item_update;
+DROP TRIGGER IF EXISTS trg_rollup_order_move;
+DROP TRIGGER IF EXISTS trg_rollup_order_product_redate;
+DROP TRIGGER IF EXISTS trg_rollup_item_insert;
+DROP TRIGGER IF EXISTS trg_rollup_item_delete;
+DROP TRIGGER IF EXISTS trg_rollup_item_update;
+
+-- 1. Base tables: prices are rounded, order totals recomputed from their lines
+ALTER TABLE Product ADD COLUMN price_cents INTEGER NOT NULL DEFAULT 0;
+UPDATE Product SET price_cents = CAST(ROUND(price * 100) AS INTEGER);
+ALTER TABLE Product DROP COLUMN price;
+
+ALTER TABLE OrderItem ADD COLUMN unit_price_cents INTEGER;
+UPDATE OrderItem SET unit_price_cents = CAST(ROUND(unit_price * 100) AS INTEGER);
+ALTER TABLE OrderItem DROP COLUMN unit_price;
+
+ALTER TABLE [Order] ADD COLUMN total_cents INTEGER NOT NULL DEFAULT 0;
+UPDATE [Order] SET total_cents = COALESCE((SELECT SUM(oi.quantity * oi.unit_price_cents)
+                                           FROM OrderItem oi WHERE oi.order_id = [Order].order_id), 0);
+ALTER TABLE [Order] DROP COLUMN total_amount;
+
+-- 2. Summary tables: new columns, then rebuilt from the live and archived orders
+--    (same queries as database.rebuild_sales_rollups)
+ALTER TABLE SalesSummary ADD COLUMN revenue_cents INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE SalesSummary DROP COLUMN revenue;
+ALTER TABLE DailySales ADD COLUMN revenue_cents INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE DailySales DROP COLUMN revenue;
+ALTER TABLE HourlySales ADD COLUMN revenue_cents INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE HourlySales DROP COLUMN revenue;
+ALTER TABLE ProductDailySales ADD COLUMN revenue_cents INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE ProductDailySales DROP COLUMN revenue;
+ALTER TABLE CashierDailySales ADD COLUMN revenue_cents INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE CashierDailySales DROP COLUMN revenue;
+
+DELETE FROM HourlySales;
+DELETE FROM ProductDailySales;
+DELETE FROM CashierDailySales;
+DELETE FROM DailySales;
+
+INSERT INTO HourlySales (sale_hour, revenue_cents, order_count)
+SELECT strftime('%Y-%m-%d %H:00', order_date), SUM(total_cents), COUNT(*)
+FROM (SELECT order_date, total_cents FROM main.[Order] UNION ALL SELECT order_date, total_cents FROM archive.[Order])
+GROUP BY 1;
+
+INSERT INTO DailySales (sale_date, revenue_cents, order_count)
+SELECT date(order_date), SUM(total_cents), COUNT(*)
+FROM (SELECT order_date, total_cents FROM main.[Order] UNION ALL SELECT order_date, total_cents FROM archive.[Order])
+GROUP BY 1;
+
+INSERT INTO CashierDailySales (sale_date, user_id, revenue_cents, order_count)
+SELECT date(order_date), COALESCE(user_id, 0), SUM(total_cents), COUNT(*)
+FROM (SELECT order_date, user_id, total_cents FROM main.[Order]
+      UNION ALL SELECT order_date, user_id, total_cents FROM archive.[Order])
+GROUP BY 1, 2;
+
+INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue_cents)
+SELECT date(order_date), product_id, SUM(quantity), SUM(quantity * unit_price_cents)
+FROM (SELECT o.order_date, oi.product_id, oi.quantity, oi.unit_price_cents
+      FROM main.OrderItem oi JOIN main.[Order] o ON o.order_id = oi.order_id
+      UNION ALL
+      SELECT o.order_date, oi.product_id, oi.quantity, oi.unit_price_cents
+      FROM archive.OrderItem oi JOIN archive.[Order] o ON o.order_id = oi.order_id)
+GROUP BY 1, 2;
+
+INSERT OR IGNORE INTO SalesSummary (summary_id) VALUES (1);
+UPDATE SalesSummary SET
+    revenue_cents = (SELECT COALESCE(SUM(total_cents), 0) FROM main.[Order])
+                  + (SELECT COALESCE(SUM(total_cents), 0) FROM archive.[Order]),
+    order_count = (SELECT COUNT(*) FROM main.[Order]) + (SELECT COUNT(*) FROM archive.[Order])
+WHERE summary_id = 1;
+
+-- 3. TRIGGERS (migration 002): DailySales / SalesSummary revenue
+CREATE TRIGGER trg_summary_order_redate AFTER UPDATE OF order_date ON [Order]
+WHEN date(OLD.order_date) IS NOT date(NEW.order_date)
+BEGIN
+    INSERT OR IGNORE INTO DailySales (sale_date) VALUES (date(NEW.order_date));
+    UPDATE DailySales SET
+        order_count = order_count - 1,
+        revenue_cents = revenue_cents - COALESCE((SELECT SUM(quantity * unit_price_cents) FROM OrderItem WHERE order_id = OLD.order_id), 0)
+    WHERE sale_date = date(OLD.order_date);
+    UPDATE DailySales SET
+        order_count = order_count + 1,
+        revenue_cents = revenue_cents + COALESCE((SELECT SUM(quantity * unit_price_cents) FROM OrderItem WHERE order_id = NEW.order_id), 0)
+    WHERE sale_date = date(NEW.order_date);
+END;
+
+CREATE TRIGGER trg_summary_item_insert AFTER INSERT ON OrderItem
+BEGIN
+    UPDATE SalesSummary SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents WHERE summary_id = 1;
+    UPDATE DailySales SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
+
+CREATE TRIGGER trg_summary_item_delete AFTER DELETE ON OrderItem
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveLock)
+BEGIN
+    UPDATE SalesSummary SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents WHERE summary_id = 1;
+    UPDATE DailySales SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+END;
+
+CREATE TRIGGER trg_summary_item_update AFTER UPDATE OF order_id, quantity, unit_price_cents ON OrderItem
+BEGIN
+    UPDATE SalesSummary SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE summary_id = 1;
+    UPDATE DailySales SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE DailySales SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
+
+-- 4. TRIGGERS (migration 007): hourly / product / cashier rollups
+CREATE TRIGGER trg_rollup_order_move AFTER UPDATE OF order_date, user_id ON [Order]
+WHEN strftime('%Y-%m-%d %H', OLD.order_date) IS NOT strftime('%Y-%m-%d %H', NEW.order_date)
+  OR OLD.user_id IS NOT NEW.user_id
+BEGIN
+    INSERT OR IGNORE INTO HourlySales (sale_hour) VALUES (strftime('%Y-%m-%d %H:00', NEW.order_date));
+    UPDATE HourlySales SET
+        order_count = order_count - 1,
+        revenue_cents = revenue_cents - COALESCE((SELECT SUM(quantity * unit_price_cents) FROM OrderItem WHERE order_id = OLD.order_id), 0)
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', OLD.order_date);
+    UPDATE HourlySales SET
+        order_count = order_count + 1,
+        revenue_cents = revenue_cents + COALESCE((SELECT SUM(quantity * unit_price_cents) FROM OrderItem WHERE order_id = NEW.order_id), 0)
+    WHERE sale_hour = strftime('%Y-%m-%d %H:00', NEW.order_date);
+
+    INSERT OR IGNORE INTO CashierDailySales (sale_date, user_id) VALUES (date(NEW.order_date), COALESCE(NEW.user_id, 0));
+    UPDATE CashierDailySales SET
+        order_count = order_count - 1,
+        revenue_cents = revenue_cents - COALESCE((SELECT SUM(quantity * unit_price_cents) FROM OrderItem WHERE order_id = OLD.order_id), 0)
+    WHERE sale_date = date(OLD.order_date) AND user_id = COALESCE(OLD.user_id, 0);
+    UPDATE CashierDailySales SET
+        order_count = order_count + 1,
+        revenue_cents = revenue_cents + COALESCE((SELECT SUM(quantity * unit_price_cents) FROM OrderItem WHERE order_id = NEW.order_id), 0)
+    WHERE sale_date = date(NEW.order_date) AND user_id = COALESCE(NEW.user_id, 0);
+END;
+
+CREATE TRIGGER trg_rollup_order_product_redate AFTER UPDATE OF order_date ON [Order]
+WHEN date(OLD.order_date) IS NOT date(NEW.order_date)
+BEGIN
+    INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id)
+        SELECT DISTINCT date(NEW.order_date), product_id FROM OrderItem WHERE order_id = NEW.order_id;
+    UPDATE ProductDailySales SET
+        quantity = quantity - (SELECT SUM(quantity) FROM OrderItem
+                               WHERE order_id = OLD.order_id AND product_id = ProductDailySales.product_id),
+        revenue_cents = revenue_cents - (SELECT SUM(quantity * unit_price_cents) FROM OrderItem
+                                         WHERE order_id = OLD.order_id AND product_id = ProductDailySales.product_id)
+    WHERE sale_date = date(OLD.order_date)
+      AND product_id IN (SELECT product_id FROM OrderItem WHERE order_id = OLD.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity + (SELECT SUM(quantity) FROM OrderItem
+                               WHERE order_id = NEW.order_id AND product_id = ProductDailySales.product_id),
+        revenue_cents = revenue_cents + (SELECT SUM(quantity * unit_price_cents) FROM OrderItem
+                                         WHERE order_id = NEW.order_id AND product_id = ProductDailySales.product_id)
+    WHERE sale_date = date(NEW.order_date)
+      AND product_id IN (SELECT product_id FROM OrderItem WHERE order_id = NEW.order_id);
+END;
+
+CREATE TRIGGER trg_rollup_item_insert AFTER INSERT ON OrderItem
+BEGIN
+    UPDATE HourlySales SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = NEW.order_id);
+    UPDATE CashierDailySales SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = NEW.order_id);
+    INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id)
+        SELECT date(order_date), NEW.product_id FROM [Order] WHERE order_id = NEW.order_id;
+    UPDATE ProductDailySales SET
+        quantity = quantity + NEW.quantity,
+        revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE product_id = NEW.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
+
+CREATE TRIGGER trg_rollup_item_delete AFTER DELETE ON OrderItem
+WHEN NOT EXISTS (SELECT 1 FROM ArchiveLock)
+BEGIN
+    UPDATE HourlySales SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE CashierDailySales SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity - OLD.quantity,
+        revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE product_id = OLD.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+END;
+
+CREATE TRIGGER trg_rollup_item_update AFTER UPDATE OF order_id, product_id, quantity, unit_price_cents ON OrderItem
+BEGIN
+    UPDATE HourlySales SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE HourlySales SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE sale_hour = (SELECT strftime('%Y-%m-%d %H:00', order_date) FROM [Order] WHERE order_id = NEW.order_id);
+    UPDATE CashierDailySales SET revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = OLD.order_id);
+    UPDATE CashierDailySales SET revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE (sale_date, user_id) = (SELECT date(order_date), COALESCE(user_id, 0) FROM [Order] WHERE order_id = NEW.order_id);
+    UPDATE ProductDailySales SET
+        quantity = quantity - OLD.quantity,
+        revenue_cents = revenue_cents - OLD.quantity * OLD.unit_price_cents
+    WHERE product_id = OLD.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = OLD.order_id);
+    INSERT OR IGNORE INTO ProductDailySales (sale_date, product_id)
+        SELECT date(order_date), NEW.product_id FROM [Order] WHERE order_id = NEW.order_id;
+    UPDATE ProductDailySales SET
+        quantity = quantity + NEW.quantity,
+        revenue_cents = revenue_cents + NEW.quantity * NEW.unit_price_cents
+    WHERE product_id = NEW.product_id
+      AND sale_date = (SELECT date(order_date) FROM [Order] WHERE order_id = NEW.order_id);
+END;
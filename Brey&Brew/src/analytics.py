@@ -0,0 +1,123 @@
+"""
+FILE: analytics.py
+PURPOSE: Sales reports for the Analytics tab.
+
+Bucketed figures (hourly/daily/weekly revenue, top products, per-cashier totals) are read
+from the rollup tables that triggers keep up to date (migrations 002 and 007), so a report
+never groups raw OrderItem rows. Slots that do not line up with those buckets (the 15/30
+minute views) are summed with a vectorized pass over the [Order] headers: NumPy when it is
+installed, the standard 'array' module otherwise.
+
+Every amount is in integer centavos (see money.py); the Analytics tab formats them.
+"""
+import calendar
+import time
+from array import array
+from datetime import date, timedelta
+import database
+from money import average_cents
+
+try:
+    import numpy as np
+except ImportError: # Optional: only speeds up bucket_totals()/hour_of_day_profile()
+    np = None
+
+SLOT_PERIODS = {"15 min": 900, "30 min": 1800} # Seconds per slot; no rollup lines up with these
+PERIODS = ("hourly", "daily", "weekly") + tuple(SLOT_PERIODS) + ("hour of day",)
+
+def sales_report(date_from=None, date_to=None, period="daily", backend=None):
+    """
+    Builds everything the Analytics tab shows for an inclusive 'YYYY-MM-DD' range:
+        series          [(bucket, revenue_cents, order_count)] for the chosen period (one of PERIODS);
+                        slot periods need both dates and skip empty slots
+        top_quantity    [(product, quantity, revenue_cents)] best sellers by quantity
+        top_revenue     [(product, quantity, revenue_cents)] best sellers by revenue
+        cashiers        [(username, revenue_cents, order_count, average_ticket_cents)]
+        revenue, orders, average_ticket  totals for the whole range (centavos, count, centavos)
+    'backend' is the database module (default) or a ServiceClient.
+    """
+    backend = backend or database
+    if period == "hourly": series = backend.get_hourly_sales(date_from, date_to)
+    elif period == "daily": series = backend.get_daily_sales(date_from, date_to)
+    elif period == "weekly": series = backend.get_weekly_sales(date_from, date_to)
+    elif period in SLOT_PERIODS:
+        if not (date_from and date_to): raise ValueError(f"The {period} view needs a start and an end date")
+        end = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat()
+        series = [row for row in bucket_totals(date_from, end, SLOT_PERIODS[period], backend) if row[2]]
+    elif period == "hour of day":
+        series = [(f"{hour:02d}:00", revenue, count)
+                  for hour, revenue, count in hour_of_day_profile(date_from, date_to, backend) if count]
+    else: raise ValueError(f"Unknown period {period!r}, expected one of {PERIODS}")
+
+    revenue = sum(row[1] for row in series)
+    orders = sum(row[2] for row in series)
+    return {
+        "series": series,
+        "top_quantity": backend.get_top_products(date_from, date_to, "quantity"),
+        "top_revenue": backend.get_top_products(date_from, date_to, "revenue"),
+        "cashiers": [(name, rev, count, average_ticket(rev, count))
+                     for name, rev, count in backend.get_cashier_sales(date_from, date_to)],
+        "revenue": revenue,
+        "orders": orders,
+        "average_ticket": average_ticket(revenue, orders),
+    }
+
+def average_ticket(revenue_cents, order_count):
+    """Revenue per order in centavos (rounded half up), 0 when there were no orders."""
+    return average_cents(revenue_cents, order_count)
+
+# --- VECTORIZED AD-HOC RANGES ---
+def _to_unix(timestamp):
+    """'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM[:SS]' -> seconds, read as UTC like SQLite's strftime('%s')."""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return calendar.timegm(time.strptime(timestamp, fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized timestamp {timestamp!r}")
+
+def _bincount(indexes, weights, size):
+    """Returns (sum of integer weights, count) per bucket index 0..size-1."""
+    if np is not None:
+        idx = np.asarray(indexes, dtype=np.int64)
+        sums = np.zeros(size, dtype=np.int64)
+        np.add.at(sums, idx, np.asarray(weights, dtype=np.int64)) # Integer adds (bincount weights are float64)
+        counts = np.bincount(idx, minlength=size)
+        return sums.tolist(), counts.tolist()
+    sums, counts = array("q", bytes(8 * size)), array("q", bytes(8 * size))
+    for i, w in zip(indexes, weights):
+        sums[i] += w
+        counts[i] += 1
+    return sums.tolist(), counts.tolist()
+
+def bucket_totals(start, end, bucket_seconds=3600, backend=None):
+    """
+    Revenue and order count for any window [start, end) split into equal buckets,
+    e.g. 15-minute slots over a lunch rush. Returns [(bucket_start, revenue_cents, order_count)]
+    with bucket_start as 'YYYY-MM-DD HH:MM'; empty buckets are included.
+    """
+    backend = backend or database
+    if bucket_seconds <= 0: raise ValueError("bucket_seconds must be positive")
+    t0, t1 = _to_unix(start), _to_unix(end)
+    size = max(0, -(-(t1 - t0) // bucket_seconds))
+    points = backend.fetch_order_points(start, end)
+    if np is not None and points:
+        data = np.asarray(points, dtype=np.int64)
+        indexes = (data[:, 0] - t0) // bucket_seconds
+        sums, counts = _bincount(indexes, data[:, 1], size)
+    else:
+        sums, counts = _bincount([(t - t0) // bucket_seconds for t, _ in points], [total for _, total in points], size)
+    return [(time.strftime("%Y-%m-%d %H:%M", time.gmtime(t0 + i * bucket_seconds)), sums[i], counts[i])
+            for i in range(size)]
+
+def hour_of_day_profile(date_from=None, date_to=None, backend=None):
+    """
+    Busiest hours across a date range: [(hour 0-23, revenue_cents, order_count)],
+    folded from the HourlySales rollup rather than the raw orders.
+    """
+    backend = backend or database
+    rows = backend.get_hourly_sales(date_from, date_to)
+    hours = [int(sale_hour[11:13]) for sale_hour, _, _ in rows]
+    revenue, _ = _bincount(hours, [rev for _, rev, _ in rows], 24)
+    orders, _ = _bincount(hours, [count for _, _, count in rows], 24) # One rollup row holds many orders
+    return [(hour, revenue[hour], orders[hour]) for hour in range(24)]
@@ -0,0 +1,145 @@
+"""
+FILE: auth.py
+PURPOSE: Password hashing, login throttling and the logged-in Session.
+
+Stored password formats (User.password):
+    scrypt$<n>$<r>$<p>$<salt>$<hash>            salt/hash base64, n = cost
+    pbkdf2_sha256$<iterations>$<salt>$<hash>    used only if hashlib.scrypt is unavailable
+Anything else is a legacy plaintext password. verify_password() still accepts it and
+needs_rehash() flags it, so database.validate_login() replaces it on the next login.
+
+The cost (scrypt n, or PBKDF2 iterations) is stored in the database; pick it with
+'python manage.py calibrate-login --target-ms 250 --save' on the till hardware.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+HAS_SCRYPT = hasattr(hashlib, "scrypt") # Needs Python built against OpenSSL 1.1+
+SCRYPT_R = 8
+SCRYPT_P = 1
+DEFAULT_COST = 2 ** 14 if HAS_SCRYPT else 600000
+MIN_COST = 2 ** 12 if HAS_SCRYPT else 100000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL refuses anything above 'maxmem' (32 MB by default); scrypt needs 128 * r * n bytes
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n + 2 ** 20, dklen=HASH_BYTES)
+
+def hash_password(password, cost=DEFAULT_COST):
+    """Returns a salted hash string for storing in User.password."""
+    salt = os.urandom(SALT_BYTES)
+    if HAS_SCRYPT:
+        digest = _scrypt(password, salt, cost, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${cost}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, cost, HASH_BYTES)
+    return f"pbkdf2_sha256${cost}${_b64(salt)}${_b64(digest)}"
+
+def verify_password(password, stored):
+    """True if 'password' matches the stored hash (or legacy plaintext). Constant-time compare."""
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt, expected = base64.b64decode(parts[4]), base64.b64decode(parts[5])
+            return hmac.compare_digest(_scrypt(password, salt, n, r, p), expected)
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            salt, expected = base64.b64decode(parts[2]), base64.b64decode(parts[3])
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, int(parts[1]), len(expected))
+            return hmac.compare_digest(digest, expected)
+    except ValueError:
+        return False # Corrupt hash string
+    return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")) # Legacy plaintext
+
+def needs_rehash(stored, cost=DEFAULT_COST):
+    """True for plaintext passwords and hashes made with another algorithm or cost."""
+    parts = stored.split("$")
+    if HAS_SCRYPT:
+        return not (parts[0] == "scrypt" and len(parts) == 6 and parts[1:4] == [str(cost), str(SCRYPT_R), str(SCRYPT_P)])
+    return not (parts[0] == "pbkdf2_sha256" and len(parts) == 4 and parts[1] == str(cost))
+
+def is_hashed(stored):
+    """False for legacy plaintext passwords."""
+    return stored.split("$", 1)[0] in ("scrypt", "pbkdf2_sha256")
+
+# --- COST CALIBRATION ---
+def benchmark(cost, rounds=3):
+    """Returns the fastest of 'rounds' hash_password() timings for 'cost', in milliseconds."""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hash_password("benchmark-password", cost)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def calibrate(target_ms=250, max_cost=None, rounds=3):
+    """
+    Doubles the cost from MIN_COST while one hash stays within 'target_ms' on this machine.
+    Returns (chosen_cost, [(cost, ms), ...]) with every timing measured along the way.
+    """
+    max_cost = max_cost or (2 ** 20 if HAS_SCRYPT else 10000000)
+    timings = []
+    chosen, cost = MIN_COST, MIN_COST
+    while cost <= max_cost:
+        ms = benchmark(cost, rounds)
+        timings.append((cost, ms))
+        if ms > target_ms: break
+        chosen = cost
+        cost *= 2
+    return chosen, timings
+
+# --- LOGIN THROTTLING ---
+class LoginThrottle:
+    """
+    Slows down password guessing at a till: after 'max_failures' wrong passwords for a
+    username, further attempts are refused for 'base_delay' seconds, doubling with each
+    additional failure up to 'max_delay'. A successful login resets the counter.
+    """
+
+    def __init__(self, max_failures=5, base_delay=30, max_delay=900, clock=time.monotonic):
+        self.max_failures = max_failures
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self._failures = {}     # username -> consecutive failures
+        self._locked_until = {} # username -> clock() value when attempts are allowed again
+
+    def check(self, username):
+        """Returns how many seconds 'username' must still wait (0 = may try now)."""
+        return max(0.0, self._locked_until.get(username.lower(), 0) - self.clock())
+
+    def failed(self, username):
+        key = username.lower()
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        if failures >= self.max_failures:
+            delay = min(self.max_delay, self.base_delay * 2 ** (failures - self.max_failures))
+            self._locked_until[key] = self.clock() + delay
+
+    def succeeded(self, username):
+        key = username.lower()
+        self._failures.pop(key, None)
+        self._locked_until.pop(key, None)
+
+# --- SESSION ---
+class Session:
+    """The logged-in staff member, kept in memory so screens never look the user up again."""
+    __slots__ = ("user_id", "username", "role", "started_at")
+
+    def __init__(self, user_id, username, role):
+        self.user_id = user_id
+        self.username = username
+        self.role = role
+        self.started_at = time.time()
+
+    @property
+    def is_manager(self):
+        return self.role == "Manager"
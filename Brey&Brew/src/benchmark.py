@@ -0,0 +1,276 @@
+"""
+FILE: benchmark.py
+PURPOSE: Measures how database.py behaves as the order history grows.
+
+A deterministic generator builds a database per size (same seed = same data, so runs
+on different commits are comparable), then each scenario is timed several times.
+Results are written as JSON and can be compared against an earlier run.
+
+Usage (run from the src folder):
+    python benchmark.py                                   1k and 100k orders, prints a table
+    python benchmark.py --sizes 1k,100k,1M -o after.json  also writes JSON results
+    python benchmark.py --compare before.json             flags scenarios that got slower
+
+Generated databases are cached in --data-dir (default: .benchmark/) and copied before
+each run, so the write scenarios never change the cached data.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+import auth
+import database as db
+
+SEED = 20240501
+START_DATE = datetime(2025, 1, 1)
+ORDERS_PER_DAY = 300
+GENERATOR_VERSION = 2 # Bump when the generated data changes, so cached databases are rebuilt
+
+# Rough shape of a coffee shop day: (hour, relative weight)
+HOUR_WEIGHTS = ((7, 8), (8, 14), (9, 10), (10, 7), (11, 9), (12, 13), (13, 10),
+                (14, 6), (15, 7), (16, 8), (17, 6), (18, 4), (19, 3), (20, 2))
+# Cart sizes (distinct products per order) and their weights
+CART_SIZE_WEIGHTS = ((1, 45), (2, 30), (3, 14), (4, 7), (5, 3), (6, 1))
+
+def parse_size(text):
+    """'1k' -> 1000, '1M' -> 1000000, '2500' -> 2500."""
+    text = text.strip()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1].lower(), 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+# --- SYNTHETIC DATA ---
+def generate_dataset(path, order_count, seed=SEED, users=12, products=60, batch_size=10000, on_progress=None):
+    """
+    Creates a fresh database at 'path' with 'users' staff, 'products' menu items and
+    'order_count' orders spread over consecutive days from START_DATE.
+    Orders from earlier days are 'Complete'; the last day's orders are still 'Pending'.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix): os.remove(path + suffix)
+    archive = os.path.splitext(path)[0] + "-archive.db"
+    if os.path.exists(archive): os.remove(archive)
+
+    rng = random.Random(seed)
+    db.close_connections()
+    db.DB_NAME = path
+    db.setup_database()
+
+    # Staff (one shared hash: hashing each password would dominate generation time)
+    password = auth.hash_password("benchmark", auth.MIN_COST)
+    with db.transaction() as cursor:
+        cursor.executemany("INSERT OR IGNORE INTO User (username, password, role) VALUES (?, ?, ?)",
+                           [(f"cashier{i:02d}", password, "Manager" if i == 0 else "staff") for i in range(users)])
+        cursor.execute("SELECT user_id FROM User")
+        user_ids = [row[0] for row in cursor.fetchall()]
+
+    db.save_products_bulk([(f"Product {i:03d}", f"Synthetic menu item {i}", rng.choice(range(8000, 26000, 1000)), "")
+                           for i in range(products)])
+    menu = [(row[0], row[3]) for row in db.fetch_all_products()]
+    # A few best sellers: product popularity follows a 1/rank curve
+    popularity = [1.0 / (rank + 1) for rank in range(len(menu))]
+
+    hours, hour_weights = zip(*HOUR_WEIGHTS)
+    sizes, size_weights = zip(*CART_SIZE_WEIGHTS)
+    days = max(1, -(-order_count // ORDERS_PER_DAY))
+    last_day = START_DATE + timedelta(days=days - 1)
+
+    batch, saved = [], 0
+    for n in range(order_count):
+        day = START_DATE + timedelta(days=n // ORDERS_PER_DAY)
+        stamp = day.replace(hour=rng.choices(hours, hour_weights)[0], minute=rng.randrange(60), second=rng.randrange(60))
+        cart = {}
+        for _ in range(rng.choices(sizes, size_weights)[0]):
+            product_id, price = rng.choices(menu, popularity)[0]
+            cart[product_id] = (price, cart.get(product_id, (price, 0))[1] + rng.choice((1, 1, 1, 2, 2, 3)))
+        batch.append({
+            "user_id": rng.choice(user_ids),
+            "status": "Pending" if day == last_day else "Complete",
+            "order_date": stamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "items": [{"id": pid, "qty": qty, "price_cents": price} for pid, (price, qty) in cart.items()],
+        })
+        if len(batch) >= batch_size:
+            db.save_orders_bulk(batch); saved += len(batch); batch = []
+            if on_progress: on_progress(saved)
+    if batch:
+        db.save_orders_bulk(batch)
+    with db.get_cursor() as cursor:
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close_connections()
+
+def dataset_path(data_dir, order_count, seed):
+    return os.path.join(data_dir, f"orders_{order_count}_seed{seed}_v{GENERATOR_VERSION}.db")
+
+def prepare_dataset(data_dir, order_count, seed=SEED):
+    """Returns the path of a working copy of the cached dataset (generated if missing)."""
+    os.makedirs(data_dir, exist_ok=True)
+    cached = dataset_path(data_dir, order_count, seed)
+    if not os.path.exists(cached):
+        started = time.perf_counter()
+        print(f"Generating {order_count:,} orders...")
+        generate_dataset(cached + ".tmp", order_count, seed,
+                         on_progress=lambda saved: print(f"  {saved:,} orders...", end="\r"))
+        print() # End the progress line
+        os.replace(cached + ".tmp", cached)
+        print(f"Generated {order_count:,} orders in {time.perf_counter() - started:.1f}s")
+    work = os.path.join(data_dir, "work.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(work + suffix): os.remove(work + suffix)
+    shutil.copyfile(cached, work)
+    return work
+
+# --- SCENARIOS ---
+def build_scenarios(rng):
+    """
+    Returns [(name, setup, run)] for the current database. setup() runs once and returns
+    state for run(state), which is the timed call.
+    """
+    def order_ids():
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT MIN(order_id), MAX(order_id) FROM [Order]")
+            low, high = cursor.fetchone()
+        return [rng.randint(low, high) for _ in range(1000)]
+
+    def menu():
+        return [row[0] for row in db.fetch_all_products()]
+
+    def middle_order_id():
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT MAX(order_id) / 2 FROM [Order]")
+            return cursor.fetchone()[0]
+
+    def save_order(product_ids):
+        cart = [{"id": rng.choice(product_ids), "qty": rng.randint(1, 3), "price_cents": 11000} for _ in range(rng.randint(1, 4))]
+        return db.save_order(1, cart)
+
+    return [
+        ("get_dashboard_stats", None, lambda _: db.get_dashboard_stats()),
+        ("fetch_all_products", None, lambda _: db.fetch_all_products()),
+        ("get_order_items", order_ids, lambda ids: db.get_order_items(ids[rng.randrange(len(ids))])),
+        ("fetch_orders_by_status.pending_page", None, lambda _: db.fetch_orders_by_status("Pending", limit=100)),
+        ("fetch_orders_by_status.all_page", None, lambda _: db.fetch_orders_by_status(limit=100)),
+        ("fetch_orders_by_status.pending_all", None, lambda _: db.fetch_orders_by_status("Pending")),
+        ("fetch_sales_history.first_page", None, lambda _: db.fetch_sales_history(limit=100)),
+        ("fetch_sales_history.deep_page", middle_order_id, lambda after: db.fetch_sales_history(after_order_id=after, limit=100)),
+        ("fetch_sales_history.one_month", None,
+         lambda _: db.fetch_sales_history(limit=100, date_from="2025-02-01", date_to="2025-02-28")),
+        ("save_order", menu, save_order),
+    ]
+
+def time_scenario(setup, run, repeat, warmup=2):
+    """Runs 'run' warmup + repeat times and returns timing statistics in milliseconds."""
+    state = setup() if setup else None
+    for _ in range(warmup): run(state)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(state)
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+def summarize(samples):
+    """Timing statistics (milliseconds) for a list of samples."""
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+def run_benchmarks(sizes, repeat=30, data_dir=".benchmark", seed=SEED, only=None):
+    """Benchmarks every scenario at every size. Returns the JSON-ready results dict."""
+    results = {"meta": environment_info(seed, repeat), "results": {}}
+    for order_count in sizes:
+        work = prepare_dataset(data_dir, order_count, seed)
+        db.close_connections()
+        db.DB_NAME = work
+        rng = random.Random(seed)
+        size_results = {}
+        for name, setup, run in build_scenarios(rng):
+            if only and not any(part in name for part in only): continue
+            # Unpaged reads return every matching row, so fewer repeats keep big sizes practical
+            runs = max(3, repeat // 10) if name.endswith("_all") and order_count >= 100000 else repeat
+            size_results[name] = time_scenario(setup, run, runs)
+            print(f"  {order_count:>9,} orders  {name:<38} median {size_results[name]['median_ms']:9.3f} ms")
+        results["results"][str(order_count)] = size_results
+        db.close_connections()
+    return results
+
+def environment_info(seed, repeat):
+    """Where and on what the numbers were measured."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "seed": seed,
+        "repeat": repeat,
+        "generator_version": GENERATOR_VERSION,
+    }
+
+# --- COMPARISON ---
+def compare(baseline, current, threshold=1.25):
+    """
+    Compares median timings of two results dicts.
+    Returns [(size, scenario, before_ms, after_ms, ratio, regressed)] for scenarios present in both.
+    """
+    rows = []
+    for size, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None: continue
+            ratio = stats["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            rows.append((size, name, before["median_ms"], stats["median_ms"], ratio, ratio > threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Brey&Brew database benchmarks")
+    parser.add_argument("--sizes", default="1k,100k", help="comma-separated order counts, e.g. 1k,100k,1M")
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs per scenario")
+    parser.add_argument("--seed", type=int, default=SEED, help="synthetic data seed")
+    parser.add_argument("--data-dir", default=".benchmark", help="where generated databases are cached")
+    parser.add_argument("--only", help="comma-separated scenario name filters")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    only = args.only.split(",") if args.only else None
+    results = run_benchmarks(sizes, repeat=args.repeat, data_dir=args.data_dir, seed=args.seed, only=only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if not args.compare: return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(baseline, results, args.threshold)
+    print(f"\nCompared with {args.compare} (commit {baseline.get('meta', {}).get('commit') or '?'}):")
+    for size, name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {int(size):>9,} orders  {name:<38} {before:9.3f} -> {after:9.3f} ms  x{ratio:5.2f}{flag}")
+    regressions = sum(1 for row in rows if row[5])
+    print(f"{regressions} regression(s) above x{args.threshold}.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
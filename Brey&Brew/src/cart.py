@@ -0,0 +1,80 @@
+"""
+FILE: cart.py
+PURPOSE: The Point of Sale cart kept by the Take Order tab.
+
+One line per product (adding a product that is already in the cart raises its quantity),
+with every amount held as integer centavos (see money.py) so totals are exact, and the
+grand total kept up to date as lines change instead of being re-summed on every redraw.
+"""
+
+class CartLine:
+    """One product in the cart. unit_cents is the price at the moment it was added (snapshot pricing)."""
+    __slots__ = ("product_id", "name", "unit_cents", "qty")
+
+    def __init__(self, product_id, name, unit_cents, qty):
+        self.product_id = product_id
+        self.name = name
+        self.unit_cents = unit_cents
+        self.qty = qty
+
+    @property
+    def subtotal_cents(self):
+        return self.unit_cents * self.qty
+
+class Cart:
+    """
+    Cart lines keyed by product ID, in the order they were first added.
+    total_cents is adjusted by every add/set_quantity/remove, so reading it is O(1).
+    """
+
+    def __init__(self):
+        self._lines = {} # product_id -> CartLine (dicts keep insertion order)
+        self.total_cents = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __bool__(self):
+        return bool(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines.values())
+
+    def __contains__(self, product_id):
+        return product_id in self._lines
+
+    def get(self, product_id):
+        return self._lines.get(product_id)
+
+    def add(self, product_id, name, unit_cents, qty):
+        """Adds 'qty' of a product; merges into its existing line. Returns the line."""
+        if qty <= 0: raise ValueError("Quantity must be positive")
+        line = self._lines.get(product_id)
+        if line is None:
+            line = self._lines[product_id] = CartLine(product_id, name, unit_cents, 0)
+        line.qty += qty
+        self.total_cents += line.unit_cents * qty
+        return line
+
+    def set_quantity(self, product_id, qty):
+        """Replaces a line's quantity (0 removes it). Returns the line, or None if it was removed."""
+        if qty <= 0:
+            self.remove(product_id)
+            return None
+        line = self._lines[product_id]
+        self.total_cents += line.unit_cents * (qty - line.qty)
+        line.qty = qty
+        return line
+
+    def remove(self, product_id):
+        line = self._lines.pop(product_id, None)
+        if line is not None:
+            self.total_cents -= line.subtotal_cents
+
+    def clear(self):
+        self._lines.clear()
+        self.total_cents = 0
+
+    def to_items(self):
+        """The lines in the shape used by database.save_order() and the order journal."""
+        return [{"id": line.product_id, "qty": line.qty, "price_cents": line.unit_cents} for line in self]
@@ -0,0 +1,116 @@
+"""
+FILE: catalog.py
+PURPOSE: In-memory product catalog shared by the POS and Manage Products tabs.
+
+The Product table is read ONCE; lookups and searches are then served from memory.
+All product writes go through the catalog so the cached copy is updated precisely
+(no full reload) and subscribed tabs are told what changed.
+"""
+import database
+
+class ProductCatalog:
+    """
+    Cached copy of the Product table.
+    Rows keep the database shape: (product_id, name, description, price_cents, image_path).
+
+    Observers: subscribe(callback) registers callback(event, row), where event is one of
+    "reload", "insert", "update" or "delete" (row is None for "reload").
+
+    backend: the module/object providing the product functions (database.py by default,
+    or an order_service.ServiceClient when running against the shared order service).
+    """
+
+    def __init__(self, backend=None):
+        self.db = backend or database
+        self._by_id = {}    # product_id -> row, in product_id order
+        self._by_name = {}  # lowercase name -> product_id
+        self._listeners = []
+        self._loaded = False
+
+    # --- Loading ---
+    def load(self):
+        """(Re)reads every product from the database and notifies subscribers."""
+        self._by_id = {row[0]: tuple(row) for row in self.db.fetch_all_products()}
+        self._by_name = {row[1].lower(): pid for pid, row in self._by_id.items()}
+        self._loaded = True
+        self._notify("reload", None)
+
+    def _ensure_loaded(self):
+        if not self._loaded: self.load()
+
+    # --- Lookups (memory only) ---
+    def all(self):
+        """Returns every product row."""
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def get(self, product_id):
+        """Returns the row for a product ID, or None."""
+        self._ensure_loaded()
+        return self._by_id.get(int(product_id))
+
+    def get_by_name(self, name):
+        """Returns the row for a product name (case-insensitive), or None."""
+        self._ensure_loaded()
+        product_id = self._by_name.get(name.lower())
+        return None if product_id is None else self._by_id[product_id]
+
+    def search(self, query):
+        """
+        Returns products matching 'query' by name or description, best match first.
+        Ranking comes from the FTS5 index (db.search_products); rows come from memory.
+        """
+        self._ensure_loaded()
+        if not query: return self.all()
+        matches = self.db.search_products(query, limit=max(len(self._by_id), 1))
+        return [self._by_id[row[0]] for row in matches if row[0] in self._by_id]
+
+    # --- Writes (database first, then the cached copy) ---
+    def add(self, name, desc, price_cents, image_path):
+        """Inserts a product and returns its new row."""
+        self._ensure_loaded()
+        product_id = self.db.insert_product(name, desc, price_cents, image_path)
+        row = (product_id, name, desc, price_cents, image_path)
+        self._by_id[product_id] = row
+        self._by_name[name.lower()] = product_id
+        self._notify("insert", row)
+        return row
+
+    def update(self, product_id, name, desc, price_cents, image_path):
+        """Updates a product and returns its new row."""
+        self._ensure_loaded()
+        product_id = int(product_id)
+        self.db.update_product_data(product_id, name, desc, price_cents, image_path)
+        old_row = self._by_id.get(product_id)
+        if old_row is not None: self._by_name.pop(old_row[1].lower(), None)
+        row = (product_id, name, desc, price_cents, image_path)
+        self._by_id[product_id] = row
+        self._by_name[name.lower()] = product_id
+        self._notify("update", row)
+        return row
+
+    def delete(self, product_id):
+        """Deletes a product."""
+        self._ensure_loaded()
+        product_id = int(product_id)
+        self.db.delete_product_data(product_id)
+        row = self._by_id.pop(product_id, None)
+        if row is not None:
+            self._by_name.pop(row[1].lower(), None)
+            self._notify("delete", row)
+
+    # --- Observers ---
+    def subscribe(self, callback):
+        """Registers callback(event, row) to be called after every change."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners: self._listeners.remove(callback)
+
+    def clear_listeners(self):
+        """Forgets every subscriber (used when the dashboard widgets are rebuilt)."""
+        self._listeners = []
+
+    def _notify(self, event, row):
+        for callback in list(self._listeners):
+            callback(event, row)
@@ -1,232 +1,1000 @@
 import sqlite3
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+import auth
+import instrumentation
 
 DB_NAME = "Brey&Brew.db"
 
+# Project folder (one level above src/) holding schema.sql and the migrations/ folder
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "migrations")
+
+# --- CONNECTION MANAGER ---
+# Each thread keeps ONE long-lived connection instead of connecting/closing per call.
+# This keeps SQLite's page cache and prepared-statement cache warm between clicks.
+STATEMENT_CACHE_SIZE = 256  # Prepared statements reused per connection (keyed by SQL text)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # Readers no longer block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",    # Safe with WAL, avoids an fsync on every commit
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache (negative value = KiB)
+    "PRAGMA mmap_size=134217728",   # Memory-map up to 128 MB of the database file
+    "PRAGMA temp_store=MEMORY",     # Sorts/temp B-trees stay in RAM
+)
+
+# --- ARCHIVE (see archive_orders) ---
+# Completed orders older than ARCHIVE_AFTER_DAYS are moved to a separate SQLite file that
+# every pooled connection ATTACHes as 'archive', so [Order]/OrderItem stay small while
+# history, exports and analytics still see every sale.
+ARCHIVE_NAME = None      # Archive file; None = '<database name>-archive.db' next to DB_NAME
+ARCHIVE_AFTER_DAYS = 90  # Default horizon for archive_orders()
+ARCHIVE_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS archive.[Order] (
+        order_id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        status TEXT,
+        order_date TIMESTAMP,
+        total_cents INTEGER NOT NULL DEFAULT 0,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        client_ref TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS archive.OrderItem (
+        item_id INTEGER PRIMARY KEY,
+        order_id INTEGER,
+        product_id INTEGER,
+        quantity INTEGER,
+        unit_price_cents INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS archive.idx_order_status_id ON [Order](status, order_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_order_date ON [Order](order_date)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_orderitem_order_id ON OrderItem(order_id)",
+)
+ORDER_COLUMNS = "order_id, user_id, status, order_date, total_cents, item_count, client_ref"
+ITEM_COLUMNS = "item_id, order_id, product_id, quantity, unit_price_cents"
+# Oldest SQLite library each migration can run on (ALTER TABLE ... DROP COLUMN needs 3.35)
+MIGRATION_MIN_SQLITE = {10: (3, 35, 0)}
+
+# --- REPORT SNAPSHOT (see report_cursor) ---
+# With REPORT_SNAPSHOT_SECONDS set, the history, dashboard, analytics and export queries read
+# a copy of the database (and archive) taken with SQLite's online backup API, so a manager's
+# long report never competes with the tills for the live file. The copy is refreshed by the
+# first report that finds it older than REPORT_SNAPSHOT_SECONDS.
+REPORT_SNAPSHOT_SECONDS = 0 # Maximum snapshot age; 0 = reports read the live database
+
+def archive_path():
+    """Returns the path of the archive database for the current DB_NAME."""
+    return ARCHIVE_NAME or os.path.splitext(DB_NAME)[0] + "-archive.db"
+
+def slow_log_path():
+    """Returns the path of the slow-query log for the current DB_NAME (see instrumentation.py)."""
+    return os.path.splitext(DB_NAME)[0] + "-slow-queries.log"
+
+def report_snapshot_paths():
+    """Returns the (database, archive) snapshot files for the current DB_NAME."""
+    base = os.path.splitext(DB_NAME)[0]
+    return base + "-report.db", base + "-report-archive.db"
+
+def _live_and_archive(template):
+    """
+    Expands a SELECT written against '{db}.' tables into a live + archive UNION ALL subquery.
+    WHERE/ORDER BY/LIMIT applied outside are pushed into both halves, so each side still
+    uses its own indexes (the results are merged, not sorted).
+    """
+    return "(" + template.format(db="main") + " UNION ALL " + template.format(db="archive") + ")"
+
+ALL_ORDERS = _live_and_archive(f"SELECT {ORDER_COLUMNS} FROM {{db}}.[Order]")
+
+_local = threading.local()
+_open_connections = []          # Every pooled connection, so they can be closed on exit
+_pool_lock = threading.Lock()
+_pool_generation = 0            # Bumped by close_connections() to retire old connections
+_snapshot_lock = threading.Lock()
+_snapshot_taken = {}            # DB_NAME -> time.monotonic() of its last report snapshot
+
 def create_connection():
-    """Establishes and returns a connection to the SQLite database."""
-    return sqlite3.connect(DB_NAME)
+    """
+    Returns the calling thread's pooled connection to the SQLite database.
+    The connection is opened (and tuned) on first use and then reused, so callers
+    must NOT close it. A new connection is opened if DB_NAME was changed.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.db_name == DB_NAME and _local.generation == _pool_generation:
+        return conn
 
-def setup_database():
+    # check_same_thread=False only so close_connections() can close it from the main thread;
+    # each connection is still used exclusively by the thread that opened it.
+    conn = sqlite3.connect(DB_NAME, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path(),))
+    conn.execute("PRAGMA archive.journal_mode=WAL")
+    for statement in ARCHIVE_SCHEMA:
+        conn.execute(statement)
+    conn.set_trace_callback(instrumentation.tracer(conn)) # Feeds the slow-query log
+    instrumentation.enable_slow_log(slow_log_path())
+    _local.conn = conn
+    _local.db_name = DB_NAME
+    _local.generation = _pool_generation
+    with _pool_lock:
+        _open_connections.append(conn)
+    return conn
+
+def _require_sqlite(minimum, action):
+    """Raises RuntimeError if the SQLite library is older than 'minimum' (a version tuple)."""
+    if sqlite3.sqlite_version_info < minimum:
+        raise RuntimeError(f"{action} needs SQLite {'.'.join(map(str, minimum))} or newer; "
+                           f"this Python has SQLite {sqlite3.sqlite_version}")
+
+@contextmanager
+def get_cursor():
     """
-    Initializes the database structure.
-    Reads 'schema.sql' to create tables if they don't exist.
+    Context manager shared by every database function.
+    Yields a cursor on the pooled connection, commits on success and
+    rolls back if the block raises, so no transaction is ever left open.
     """
     conn = create_connection()
     cursor = conn.cursor()
-    if os.path.exists('schema.sql'):
-        with open('schema.sql', 'r') as f:
-            cursor.executescript(f.read())
+    try:
+        yield cursor
         conn.commit()
-    conn.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
 
-# --- USER FUNCTIONS ---
-def validate_login(username, password):
+@contextmanager
+def transaction():
     """
-    Checks if a username/password combination exists.
-    Returns the user tuple if found, None otherwise.
-    Uses parameterized queries (?) to prevent SQL Injection.
+    Like get_cursor(), but for writes that must be atomic: starts with BEGIN IMMEDIATE,
+    so the write lock is taken up front (no lock upgrade half-way through), then commits
+    on success or rolls everything back if the block raises.
     """
     conn = create_connection()
     cursor = conn.cursor()
-    # UPDATED TABLE: User
-    cursor.execute("SELECT * FROM User WHERE username=? AND password=?", (username, password))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# --- REPORT SNAPSHOT CONNECTIONS ---
+def refresh_report_snapshot():
+    """Retakes the report snapshot now (see _copy_report_snapshot). Returns the snapshot database path."""
+    with _snapshot_lock:
+        _copy_report_snapshot()
+    return report_snapshot_paths()[0]
+
+def _copy_report_snapshot():
+    """
+    Copies the live database and archive into the report snapshot files (caller holds _snapshot_lock).
+    1. Opens a read transaction on both files, so the two copies show the same moment
+       (an order being archived is never seen twice or missed).
+    2. Copies each with the backup API in one step. With WAL the tills keep writing meanwhile,
+       and report connections still reading the previous copy are not blocked.
+    """
+    source = sqlite3.connect(DB_NAME)
+    try:
+        source.execute("ATTACH DATABASE ? AS archive", (archive_path(),))
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM main.sqlite_master LIMIT 1")
+        source.execute("SELECT 1 FROM archive.sqlite_master LIMIT 1")
+        for name, path in zip(("main", "archive"), report_snapshot_paths()):
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target, name=name)
+            finally:
+                target.close()
+        source.rollback()
+    finally:
+        source.close()
+    _snapshot_taken[DB_NAME] = time.monotonic()
+
+def _report_snapshot_is_stale():
+    taken = _snapshot_taken.get(DB_NAME)
+    return taken is None or time.monotonic() - taken >= REPORT_SNAPSHOT_SECONDS
+
+def create_report_connection():
+    """
+    Returns the calling thread's pooled read-only connection to the report snapshot
+    (same reuse rules as create_connection). The snapshot must already exist (see report_cursor).
+    """
+    conn = getattr(_local, "report_conn", None)
+    if conn is not None and _local.report_db_name == DB_NAME and _local.report_generation == _pool_generation:
+        return conn
+
+    snapshot_path, snapshot_archive_path = report_snapshot_paths()
+    conn = sqlite3.connect(snapshot_path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    conn.execute("ATTACH DATABASE ? AS archive", (snapshot_archive_path,))
+    conn.execute("PRAGMA query_only=ON") # Anything written here would be lost at the next refresh
+    conn.set_trace_callback(instrumentation.tracer(conn))
+    _local.report_conn = conn
+    _local.report_db_name = DB_NAME
+    _local.report_generation = _pool_generation
+    with _pool_lock:
+        _open_connections.append(conn)
+    return conn
+
+@contextmanager
+def report_cursor():
+    """
+    Cursor for the read-only report functions. Reads the live database like get_cursor()
+    when REPORT_SNAPSHOT_SECONDS is 0; otherwise reads the report snapshot, refreshing it
+    first when it is older than REPORT_SNAPSHOT_SECONDS.
+    """
+    if not REPORT_SNAPSHOT_SECONDS:
+        with get_cursor() as cursor:
+            yield cursor
+        return
+    if _report_snapshot_is_stale():
+        with _snapshot_lock:
+            if _report_snapshot_is_stale(): # Another reader may have refreshed it while we waited
+                _copy_report_snapshot()
+    cursor = create_report_connection().cursor()
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+
+def close_thread_connection():
+    """Closes the calling thread's pooled connections (for short-lived worker threads)."""
+    for attr in ("conn", "report_conn"):
+        conn = getattr(_local, attr, None)
+        if conn is None: continue
+        setattr(_local, attr, None)
+        with _pool_lock:
+            if conn in _open_connections:
+                _open_connections.remove(conn)
+                conn.close()
+
+def close_connections():
+    """Closes every pooled connection (call on application exit or before swapping DB_NAME)."""
+    global _pool_generation, _password_cost
+    _password_cost = None # Cached per database
+    _snapshot_taken.clear() # Retake report snapshots on next use
+    with _pool_lock:
+        for conn in _open_connections:
+            conn.close()
+        _open_connections.clear()
+        _pool_generation += 1
+
+def setup_database():
+    """
+    Initializes the database structure.
+    1. Reads 'schema.sql' to create the tables of a NEW database. schema.sql is the version 0
+       baseline: once migrations have run they own the schema (migration 010 renamed columns
+       that its sample data still uses).
+    2. Applies any pending files from the migrations/ folder (see apply_migrations).
+    3. Trims the order change feed so it does not grow forever.
+    """
+    schema_path = 'schema.sql'
+    if not os.path.exists(schema_path):
+        schema_path = os.path.join(BASE_DIR, 'schema.sql') # Fallback when started from src/
+    with get_cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_version'")
+        is_baseline = cursor.fetchone() is None or get_schema_version(cursor) == 0
+        if is_baseline and os.path.exists(schema_path):
+            with open(schema_path, 'r') as f:
+                cursor.executescript(f.read())
+        apply_migrations(cursor)
+    prune_order_events()
+
+# --- MIGRATIONS ---
+def list_migrations():
+    """
+    Returns (version, name, path) for every migration file, sorted by version.
+    Files are named '<version>_<name>.sql', e.g. '001_hot_query_indexes.sql'.
+    """
+    migrations = []
+    if os.path.isdir(MIGRATIONS_DIR):
+        for filename in os.listdir(MIGRATIONS_DIR):
+            prefix, _, rest = filename.partition("_")
+            if filename.endswith(".sql") and prefix.isdigit():
+                migrations.append((int(prefix), rest[:-4], os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+def get_schema_version(cursor):
+    """Returns the highest migration version applied to the database (0 if none)."""
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+def apply_migrations(cursor):
+    """
+    Applies pending migrations in version order.
+    Each migration runs in its own transaction together with its schema_version row,
+    so a failing file leaves the database at the previous version.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.connection.commit()
+    current_version = get_schema_version(cursor)
+
+    for version, name, path in list_migrations():
+        if version <= current_version: continue
+        if version in MIGRATION_MIN_SQLITE:
+            _require_sqlite(MIGRATION_MIN_SQLITE[version], f"Migration {name}")
+        with open(path, 'r') as f:
+            # executescript() commits first, so open the transaction inside the script itself
+            cursor.executescript("BEGIN;\n" + f.read())
+        cursor.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+        cursor.connection.commit()
+
+def explain_query_plan(query, params=()):
+    """Returns the detail lines of SQLite's EXPLAIN QUERY PLAN for a query."""
+    with get_cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+        return [row[3] for row in cursor.fetchall()]
+
+# Representative hot queries that must be served by an index (see migrations/001)
+def check_query_plans():
+    """
+    Runs EXPLAIN QUERY PLAN on every HOT_QUERIES entry (defined after the functions they check).
+    Returns {name: plan_lines} for queries that still fall back to a full table scan
+    (an empty dict means every hot query uses an index).
+    """
+    failures = {}
+    for name, (query, params) in HOT_QUERIES.items():
+        plan = explain_query_plan(query, params)
+        if any(line.startswith("SCAN") and "INDEX" not in line for line in plan):
+            failures[name] = plan
+    return failures
+
+# --- USER FUNCTIONS ---
+def validate_login(username, password):
+    """
+    Checks a username/password combination.
+    Returns (user_id, username, role) if it is valid, None otherwise.
+    1. Looks the user up by name (parameterized query, no SQL Injection).
+    2. Verifies the password against the stored salted hash in Python (see auth.py).
+    3. Plaintext passwords, or hashes made with an older cost, are re-hashed now.
+    """
+    with get_cursor() as cursor:
+        cursor.execute("SELECT user_id, username, password, role FROM User WHERE username=?", (username,))
+        row = cursor.fetchone()
+    if row is None:
+        auth.hash_password(password, get_password_cost()) # Same delay as a wrong password
+        return None
+    user_id, name, stored, role = row
+    if not auth.verify_password(password, stored):
+        return None
+    cost = get_password_cost()
+    if auth.needs_rehash(stored, cost):
+        with get_cursor() as cursor:
+            cursor.execute("UPDATE User SET password=? WHERE user_id=? AND password=?",
+                           (auth.hash_password(password, cost), user_id, stored))
+    return (user_id, name, role)
 
 def create_user(username, password):
-    """Inserts a new user into the User table."""
+    """Inserts a new user into the User table (the password is stored as a salted hash)."""
+    hashed = auth.hash_password(password, get_password_cost())
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-        # UPDATED TABLE: User
-        cursor.execute("INSERT INTO User (username, password) VALUES (?, ?)", (username, password))
-        conn.commit()
-        conn.close()
+        with get_cursor() as cursor:
+            # UPDATED TABLE: User
+            cursor.execute("INSERT INTO User (username, password) VALUES (?, ?)", (username, hashed))
         return True
     except sqlite3.IntegrityError:
         # Handles case where username already exists (UNIQUE constraint)
         return False
 
+def hash_plaintext_passwords():
+    """Replaces every remaining legacy plaintext password with a hash. Returns how many."""
+    cost = get_password_cost()
+    with get_cursor() as cursor:
+        cursor.execute("SELECT user_id, password FROM User")
+        legacy = [(user_id, stored) for user_id, stored in cursor.fetchall() if not auth.is_hashed(stored)]
+    updates = [(auth.hash_password(stored, cost), user_id, stored) for user_id, stored in legacy]
+    with transaction() as cursor:
+        cursor.executemany("UPDATE User SET password=? WHERE user_id=? AND password=?", updates)
+    return len(updates)
+
+# --- SETTINGS (AppSetting, see migrations/009) ---
+_password_cost = None # Cached after the first read; set_password_cost() updates it
+
+def get_setting(key, default=None):
+    """Returns the AppSetting value stored under 'key' (as text), or 'default' if it is unset."""
+    with get_cursor() as cursor:
+        cursor.execute("SELECT value FROM AppSetting WHERE key=?", (key,))
+        row = cursor.fetchone()
+    return row[0] if row else default
+
+def set_setting(key, value):
+    """Stores 'value' (as text) under 'key' in AppSetting, replacing any previous value."""
+    with get_cursor() as cursor:
+        cursor.execute("INSERT INTO AppSetting (key, value) VALUES (?, ?) "
+                       "ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, str(value)))
+
+def get_password_cost():
+    """The hashing cost for new passwords (tuned with 'manage.py calibrate-login')."""
+    global _password_cost
+    if _password_cost is None:
+        _password_cost = int(get_setting("password_cost", auth.DEFAULT_COST))
+    return _password_cost
+
+def set_password_cost(cost):
+    """Saves the hashing cost used for new passwords and updates the cached value."""
+    global _password_cost
+    set_setting("password_cost", int(cost))
+    _password_cost = int(cost)
+
 def fetch_all_users():
     """Retrieves all registered users for the Staff List tab."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLE: User
-    cursor.execute("SELECT user_id, username, role FROM User") 
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    with get_cursor() as cursor:
+        # UPDATED TABLE: User
+        cursor.execute("SELECT user_id, username, role FROM User")
+        return cursor.fetchall()
 
 # --- DASHBOARD STATS ---
 def get_dashboard_stats():
-    """Calculates total revenue and total order count for the Home tab."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # Calculate revenue: Sum of (quantity * unit_price) from OrderItem table
-    cursor.execute("SELECT SUM(quantity * unit_price) FROM OrderItem")
-    revenue = cursor.fetchone()[0]
-    if revenue is None: revenue = 0
-    
-    # Calculate count: Total rows in [Order] table
-    cursor.execute("SELECT COUNT(*) FROM [Order]")
-    count = cursor.fetchone()[0]
-    conn.close()
-    return revenue, count
+    """
+    Returns total revenue (centavos) and total order count for the Home tab.
+    Reads the single SalesSummary row kept up to date by triggers (see migrations/002),
+    so the cost no longer grows with the order history.
+    """
+    with report_cursor() as cursor:
+        cursor.execute("SELECT revenue_cents, order_count FROM SalesSummary WHERE summary_id = 1")
+        row = cursor.fetchone()
+    if row is None: return 0, 0
+    return row[0], row[1]
+
+def get_daily_sales(date_from=None, date_to=None):
+    """
+    Returns (sale_date, revenue_cents, order_count) rows from the DailySales summary,
+    oldest first. Dates are 'YYYY-MM-DD' strings; both bounds are inclusive.
+    """
+    query = "SELECT sale_date, revenue_cents, order_count FROM DailySales WHERE order_count > 0"
+    params = []
+    if date_from:
+        query += " AND sale_date >= ?"; params.append(date_from)
+    if date_to:
+        query += " AND sale_date <= ?"; params.append(date_to)
+    with report_cursor() as cursor:
+        cursor.execute(query + " ORDER BY sale_date", params)
+        return cursor.fetchall()
+
+# --- SALES ROLLUPS (see migrations/007 and analytics.py) ---
+def _date_range(column, date_from, date_to):
+    """Builds ' AND ...' conditions for an inclusive 'YYYY-MM-DD' range on a date or hour column."""
+    conditions, params = "", []
+    if date_from:
+        conditions += f" AND {column} >= ?"; params.append(date_from)
+    if date_to:
+        conditions += f" AND {column} < date(?, '+1 day')"; params.append(date_to)
+    return conditions, params
+
+def get_hourly_sales(date_from=None, date_to=None):
+    """Returns (sale_hour, revenue_cents, order_count) rows from HourlySales, oldest first."""
+    where, params = _date_range("sale_hour", date_from, date_to)
+    with report_cursor() as cursor:
+        cursor.execute(f"SELECT sale_hour, revenue_cents, order_count FROM HourlySales"
+                       f" WHERE order_count > 0{where} ORDER BY sale_hour", params)
+        return cursor.fetchall()
+
+def get_weekly_sales(date_from=None, date_to=None):
+    """
+    Returns (week_start, revenue_cents, order_count) rows, oldest first, summed from DailySales.
+    Weeks start on Monday; week_start is a 'YYYY-MM-DD' string.
+    """
+    where, params = _date_range("sale_date", date_from, date_to)
+    with report_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT date(sale_date, '-' || ((CAST(strftime('%w', sale_date) AS INTEGER) + 6) % 7) || ' days') AS week_start,
+                   SUM(revenue_cents), SUM(order_count)
+            FROM DailySales WHERE order_count > 0{where}
+            GROUP BY week_start
+            ORDER BY week_start
+        """, params)
+        return cursor.fetchall()
+
+def get_top_products(date_from=None, date_to=None, order_by="quantity", limit=10):
+    """
+    Returns (product_name, quantity, revenue_cents) for the best sellers in the range,
+    ranked by 'quantity' or 'revenue'.
+    """
+    if order_by not in ("quantity", "revenue"):
+        raise ValueError(f"Cannot rank products by {order_by!r}")
+    where, params = _date_range("s.sale_date", date_from, date_to)
+    with report_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COALESCE(p.name, '(deleted product)'), SUM(s.quantity) AS quantity, SUM(s.revenue_cents) AS revenue
+            FROM ProductDailySales s
+            LEFT JOIN Product p ON p.product_id = s.product_id
+            WHERE s.quantity > 0{where}
+            GROUP BY s.product_id
+            ORDER BY {order_by} DESC
+            LIMIT ?
+        """, params + [limit])
+        return cursor.fetchall()
+
+def get_cashier_sales(date_from=None, date_to=None):
+    """Returns (username, revenue_cents, order_count) per cashier for the range, highest revenue first."""
+    where, params = _date_range("s.sale_date", date_from, date_to)
+    with report_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COALESCE(u.username, '(unknown)'), SUM(s.revenue_cents), SUM(s.order_count)
+            FROM CashierDailySales s
+            LEFT JOIN User u ON u.user_id = s.user_id
+            WHERE s.order_count > 0{where}
+            GROUP BY s.user_id
+            ORDER BY 2 DESC
+        """, params)
+        return cursor.fetchall()
+
+ORDER_POINTS_QUERY = f"""
+    SELECT CAST(strftime('%s', order_date) AS INTEGER), total_cents
+    FROM {ALL_ORDERS} WHERE order_date >= ? AND order_date < ?
+"""
+
+def fetch_order_points(start, end):
+    """
+    Returns (unix_time, total_cents) for every order with start <= order_date < end
+    (timestamps as 'YYYY-MM-DD HH:MM:SS' strings). Used by analytics for ad-hoc ranges
+    that do not line up with the rollup buckets; reads only the (live and archived) order headers.
+    """
+    with report_cursor() as cursor:
+        cursor.execute(ORDER_POINTS_QUERY, (start, end))
+        return cursor.fetchall()
+
+def rebuild_sales_rollups():
+    """
+    Recomputes DailySales, SalesSummary and the migration 007 rollups from the raw rows
+    (live and archived orders alike).
+    """
+    all_items = _live_and_archive("""
+        SELECT o.order_date, oi.product_id, oi.quantity, oi.unit_price_cents
+        FROM {db}.OrderItem oi JOIN {db}.[Order] o ON o.order_id = oi.order_id
+    """)
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM HourlySales")
+        cursor.execute("DELETE FROM ProductDailySales")
+        cursor.execute("DELETE FROM CashierDailySales")
+        cursor.execute("DELETE FROM DailySales")
+        cursor.execute(f"""
+            INSERT INTO HourlySales (sale_hour, revenue_cents, order_count)
+            SELECT strftime('%Y-%m-%d %H:00', order_date), SUM(total_cents), COUNT(*) FROM {ALL_ORDERS} GROUP BY 1
+        """)
+        cursor.execute(f"""
+            INSERT INTO DailySales (sale_date, revenue_cents, order_count)
+            SELECT date(order_date), SUM(total_cents), COUNT(*) FROM {ALL_ORDERS} GROUP BY 1
+        """)
+        cursor.execute(f"""
+            INSERT INTO CashierDailySales (sale_date, user_id, revenue_cents, order_count)
+            SELECT date(order_date), COALESCE(user_id, 0), SUM(total_cents), COUNT(*) FROM {ALL_ORDERS} GROUP BY 1, 2
+        """)
+        cursor.execute(f"""
+            INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue_cents)
+            SELECT date(order_date), product_id, SUM(quantity), SUM(quantity * unit_price_cents)
+            FROM {all_items} GROUP BY 1, 2
+        """)
+        cursor.execute(f"""
+            UPDATE SalesSummary SET
+                revenue_cents = COALESCE((SELECT SUM(total_cents) FROM {ALL_ORDERS}), 0),
+                order_count = (SELECT COUNT(*) FROM {ALL_ORDERS})
+            WHERE summary_id = 1
+        """)
+
+# --- ARCHIVE FUNCTIONS ---
+def archive_orders(older_than_days=None, batch_size=5000):
+    """
+    Moves 'Complete' orders older than 'older_than_days' (default ARCHIVE_AFTER_DAYS) and their
+    items from the live tables into the attached archive database. Returns the number moved.
+    SQLite commits attached files one by one in WAL mode (a transaction spanning both is not
+    atomic), so each batch is moved in two transactions:
+    1. The rows are copied with INSERT OR REPLACE into archive.* and committed.
+    2. The same orders are deleted from the live tables with ArchiveLock set, so the summary
+       triggers (migration 008) leave the sales totals untouched: archived orders still count.
+    A crash between the two leaves the batch in both databases (never in neither);
+    rerunning archive_orders() copies it again and finishes the move.
+    """
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    moved = 0
+    while True:
+        with transaction() as cursor:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ArchiveBatch (order_id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM ArchiveBatch")
+            cursor.execute("""
+                INSERT INTO ArchiveBatch (order_id)
+                SELECT order_id FROM [Order]
+                WHERE status = 'Complete' AND order_date < datetime('now', ?)
+                ORDER BY order_id LIMIT ?
+            """, (f"-{int(days)} days", batch_size))
+            count = cursor.rowcount
+            if count:
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO archive.[Order] ({ORDER_COLUMNS})
+                    SELECT {ORDER_COLUMNS} FROM main.[Order] WHERE order_id IN (SELECT order_id FROM ArchiveBatch)
+                """)
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO archive.OrderItem ({ITEM_COLUMNS})
+                    SELECT {ITEM_COLUMNS} FROM main.OrderItem WHERE order_id IN (SELECT order_id FROM ArchiveBatch)
+                """)
+        if count:
+            with transaction() as cursor:
+                cursor.execute("INSERT INTO ArchiveLock (locked) VALUES (1)")
+                cursor.execute("DELETE FROM main.OrderItem WHERE order_id IN (SELECT order_id FROM ArchiveBatch)")
+                cursor.execute("DELETE FROM main.[Order] WHERE order_id IN (SELECT order_id FROM ArchiveBatch)")
+                cursor.execute("DELETE FROM ArchiveLock")
+        moved += count
+        if count < batch_size:
+            return moved
+
+def get_archive_stats():
+    """Returns {'live_orders', 'archived_orders', 'oldest_live', 'newest_archived'} for manage.py."""
+    with get_cursor() as cursor:
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM main.[Order]), (SELECT COUNT(*) FROM archive.[Order]),
+                   (SELECT MIN(order_date) FROM main.[Order]), (SELECT MAX(order_date) FROM archive.[Order])
+        """)
+        live, archived, oldest_live, newest_archived = cursor.fetchone()
+    return {"live_orders": live, "archived_orders": archived,
+            "oldest_live": oldest_live, "newest_archived": newest_archived}
 
 # --- PRODUCT FUNCTIONS ---
 def fetch_all_products():
-    """Retrieves all product details."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLE: Product
-    cursor.execute("SELECT * FROM Product")
-    items = cursor.fetchall()
-    conn.close()
-    return items
-
-def insert_product(name, desc, price, image_path):
-    """Adds a new product to the inventory."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLE: Product
-    cursor.execute("INSERT INTO Product (name, description, price, image_path) VALUES (?, ?, ?, ?)",
-                   (name, desc, price, image_path))
-    conn.commit()
-    conn.close()
-
-def update_product_data(prod_id, name, desc, price, image_path):
-    """Updates details of an existing product based on ID."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLE: Product
-    cursor.execute("UPDATE Product SET name=?, description=?, price=?, image_path=? WHERE product_id=?",
-                   (name, desc, price, image_path, prod_id))
-    conn.commit()
-    conn.close()
+    """Retrieves all product details: (product_id, name, description, price_cents, image_path)."""
+    with get_cursor() as cursor:
+        # UPDATED TABLE: Product (columns listed: migration 010 moved the price column to the end)
+        cursor.execute("SELECT product_id, name, description, price_cents, image_path FROM Product")
+        return cursor.fetchall()
+
+def search_products(query, limit=50):
+    """
+    Full-text search over product name AND description (FTS5 index, see migrations/004).
+    Every word in the query is matched as a prefix ("mat lat" finds "Matcha Latte"),
+    and results are ranked by BM25 with name matches weighted above description matches.
+    Returns product rows in the same shape as fetch_all_products().
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms: return []
+    match = " ".join(f'"{term}"*' for term in terms) # Quoted, so user input can't inject FTS syntax
+
+    with get_cursor() as cursor:
+        cursor.execute("""
+            SELECT p.product_id, p.name, p.description, p.price_cents, p.image_path
+            FROM ProductSearch s
+            JOIN Product p ON p.product_id = s.rowid
+            WHERE ProductSearch MATCH ?
+            ORDER BY bm25(ProductSearch, 10.0, 1.0)
+            LIMIT ?
+        """, (match, limit))
+        return cursor.fetchall()
+
+def insert_product(name, desc, price_cents, image_path):
+    """Adds a new product to the inventory and returns its product_id. The price is in centavos."""
+    with get_cursor() as cursor:
+        # UPDATED TABLE: Product
+        cursor.execute("INSERT INTO Product (name, description, price_cents, image_path) VALUES (?, ?, ?, ?)",
+                       (name, desc, price_cents, image_path))
+        return cursor.lastrowid
+
+def update_product_data(prod_id, name, desc, price_cents, image_path):
+    """Updates details of an existing product based on ID. The price is in centavos."""
+    with get_cursor() as cursor:
+        # UPDATED TABLE: Product
+        cursor.execute("UPDATE Product SET name=?, description=?, price_cents=?, image_path=? WHERE product_id=?",
+                       (name, desc, price_cents, image_path, prod_id))
 
 def delete_product_data(prod_id):
     """Removes a product from the inventory."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLE: Product
-    cursor.execute("DELETE FROM Product WHERE product_id=?", (prod_id,))
-    conn.commit()
-    conn.close()
+    with get_cursor() as cursor:
+        # UPDATED TABLE: Product
+        cursor.execute("DELETE FROM Product WHERE product_id=?", (prod_id,))
 
 # --- ORDER FUNCTIONS ---
 def save_order(user_id, cart_data):
     """
-    Transactional function to save a new order.
-    1. Creates the main Order record.
-    2. Iterates through the cart to create OrderItem records linked to the Order.
+    Transactional function to save a new order; returns its order_id.
+    1. Creates the main Order record, including its stored total_cents and item_count.
+    2. Inserts every cart line as an OrderItem record in one executemany() call.
+    Both steps run in a single BEGIN IMMEDIATE transaction (see save_orders_bulk).
     """
-    conn = create_connection()
-    cursor = conn.cursor()
-    
-    # Step 1: Create Order linked to the User
-    cursor.execute("INSERT INTO [Order] (user_id) VALUES (?)", (user_id,))
-    new_order_id = cursor.lastrowid # Get the ID of the order just created
-    
-    # Step 2: Insert items
-    for item in cart_data:
-        # Store unit_price explicitly to preserve historical pricing
-        cursor.execute("INSERT INTO OrderItem (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)",
-                       (new_order_id, item['id'], item['qty'], item['price']))
-    conn.commit()
-    conn.close()
-
-def fetch_orders_by_status(status=None):
-    """
-    Retrieves orders for the Kitchen Monitor.
-    Joins [Order], User, and OrderItem tables to calculate totals dynamically.
+    return save_orders_bulk([{"user_id": user_id, "items": cart_data}])[0]
+
+def save_orders_bulk(orders):
     """
-    conn = create_connection()
-    cursor = conn.cursor()
-    
-    # Base Query: Get Order ID, Staff Name, and Calculated Total
-    base_query = """
-        SELECT o.order_id, u.username, 
-               (SELECT SUM(quantity * unit_price) FROM OrderItem WHERE order_id = o.order_id) as total_amount,
-               o.status, o.order_date 
+    Saves many orders in ONE transaction (used by checkout, the order journal and the CSV importer).
+    Each order is a dict:
+        {"user_id": 1, "items": [{"id": product_id, "qty": 2, "price_cents": 11000}, ...],
+         "status": "Complete",                 # optional, defaults to 'Pending'
+         "order_date": "2025-01-31 08:15:00",  # optional, defaults to now
+         "client_ref": "9f1c..."}              # optional unique reference (see migrations/005)
+    An order whose client_ref is already stored is skipped (its existing order_id is returned),
+    so the same batch can safely be retried.
+    All OrderItem rows are written with a single executemany(). If anything fails the
+    whole batch is rolled back. Returns the order_ids in input order.
+    """
+    order_ids = []
+    item_rows = []
+    with transaction() as cursor:
+        for order in orders:
+            items = order["items"]
+            client_ref = order.get("client_ref")
+            total_cents = sum(item['qty'] * item['price_cents'] for item in items)
+            # Step 1: Create Order linked to the User (ignored if client_ref was already saved)
+            cursor.execute("""
+                INSERT OR IGNORE INTO [Order] (user_id, status, order_date, total_cents, item_count, client_ref)
+                VALUES (?, COALESCE(?, 'Pending'), COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?)
+            """, (order["user_id"], order.get("status"), order.get("order_date"), total_cents, len(items), client_ref))
+            if cursor.rowcount == 0:
+                cursor.execute("SELECT order_id FROM [Order] WHERE client_ref=?", (client_ref,))
+                order_ids.append(cursor.fetchone()[0])
+                continue
+            new_order_id = cursor.lastrowid # Get the ID of the order just created
+            order_ids.append(new_order_id)
+            # Store the unit price explicitly to preserve historical pricing
+            item_rows.extend((new_order_id, item['id'], item['qty'], item['price_cents']) for item in items)
+
+        # Step 2: Insert all items at once
+        cursor.executemany("INSERT INTO OrderItem (order_id, product_id, quantity, unit_price_cents) VALUES (?, ?, ?, ?)",
+                           item_rows)
+    return order_ids
+
+def save_products_bulk(products):
+    """
+    Inserts or updates many products in ONE transaction (matched by the unique name).
+    Each product is a tuple (name, description, price_cents, image_path). Returns how many rows were written.
+    """
+    products = list(products)
+    with transaction() as cursor:
+        cursor.executemany("""
+            INSERT INTO Product (name, description, price_cents, image_path) VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                description=excluded.description, price_cents=excluded.price_cents, image_path=excluded.image_path
+        """, products)
+    return len(products)
+
+def fetch_orders_by_status(status=None, after_order_id=None, limit=None):
+    """
+    Retrieves orders for the Kitchen Monitor, newest first.
+    Reads the stored total_cents from [Order] (see migrations/003) and joins User for the cashier name.
+    Keyset pagination: pass the last order_id of the previous page as after_order_id
+    to get the next (older) page of at most 'limit' rows.
+    """
+    query, params = _orders_by_status_query(status, after_order_id, limit)
+    with get_cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def _orders_by_status_query(status, after_order_id, limit):
+    """Builds (query, params) for fetch_orders_by_status (also checked by check_query_plans)."""
+    # Base Query: Get Order ID, Staff Name, and Stored Total
+    query = """
+        SELECT o.order_id, u.username, o.total_cents, o.status, o.order_date
         FROM [Order] o
         JOIN User u ON o.user_id = u.user_id
     """
-    
+    conditions, params = [], []
     if status:
-        cursor.execute(base_query + " WHERE o.status=? ORDER BY o.order_id DESC", (status,))
-    else:
-        cursor.execute(base_query + " ORDER BY o.order_id DESC")
-        
-    items = cursor.fetchall()
-    # Clean up None values if an order has no items
-    cleaned_items = []
-    for item in items:
-        i = list(item)
-        if i[2] is None: i[2] = 0.0
-        cleaned_items.append(i)
-
-    conn.close()
-    return cleaned_items
+        conditions.append("o.status=?"); params.append(status)
+    if after_order_id is not None:
+        conditions.append("o.order_id < ?"); params.append(after_order_id)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY o.order_id DESC"
+    if limit:
+        query += " LIMIT ?"; params.append(limit)
+    return query, params
+
+# --- ORDER CHANGE FEED (see migrations/006) ---
+def get_latest_event_seq():
+    """Returns the newest OrderEvent sequence number (0 if there are no events yet)."""
+    with get_cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM OrderEvent")
+        return cursor.fetchone()[0]
+
+ORDER_CHANGES_QUERY = """
+    SELECT e.seq, e.event_type, e.order_id, u.username, o.total_cents, o.status, o.order_date
+    FROM OrderEvent e
+    LEFT JOIN [Order] o ON o.order_id = e.order_id
+    LEFT JOIN User u ON u.user_id = o.user_id
+    WHERE e.seq > ?
+    ORDER BY e.seq
+    LIMIT ?
+"""
+
+def fetch_order_changes(after_seq, limit=500):
+    """
+    Returns order events newer than 'after_seq', oldest first, joined with the CURRENT
+    state of each order in the Kitchen Monitor shape:
+        (seq, event_type, order_id, username, total_cents, status, order_date)
+    For deleted orders the last four columns are None.
+    """
+    with get_cursor() as cursor:
+        cursor.execute(ORDER_CHANGES_QUERY, (after_seq, limit))
+        return cursor.fetchall()
+
+def prune_order_events(keep_last=10000):
+    """Deletes all but the newest 'keep_last' events (screens further behind simply do a full reload)."""
+    with get_cursor() as cursor:
+        cursor.execute("DELETE FROM OrderEvent WHERE seq <= (SELECT COALESCE(MAX(seq), 0) FROM OrderEvent) - ?",
+                       (keep_last,))
+        return cursor.rowcount
 
 def update_order_status(order_id, new_status):
     """Updates the status (e.g., Pending -> Complete)."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLE: [Order]
-    cursor.execute("UPDATE [Order] SET status=? WHERE order_id=?", (new_status, order_id))
-    conn.commit()
-    conn.close()
+    with get_cursor() as cursor:
+        # UPDATED TABLE: [Order]
+        cursor.execute("UPDATE [Order] SET status=? WHERE order_id=?", (new_status, order_id))
 
-def fetch_sales_history():
+def fetch_sales_history(after_order_id=None, limit=None, date_from=None, date_to=None):
     """
-    Retrieves only 'Complete' orders for the History tab.
-    Uses LEFT JOIN to include orders even if items are missing (edge case safety).
+    Retrieves only 'Complete' orders for the History tab, newest first (live and archived).
+    Totals and item counts come from the stored [Order] columns, so no join to OrderItem is needed.
+    - after_order_id / limit: keyset pagination (same as fetch_orders_by_status).
+    - date_from / date_to: inclusive 'YYYY-MM-DD' bounds on order_date, filtered in SQL.
     """
-    conn = create_connection()
-    cursor = conn.cursor()
-    
-    query = """
-    SELECT o.order_id, u.username, 
-           SUM(oi.quantity * oi.unit_price) as total_amount, 
-           o.status, o.order_date, COUNT(oi.item_id)
-    FROM [Order] o
+    query, params = _sales_history_query(after_order_id, limit, date_from, date_to)
+    with report_cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def _sales_history_query(after_order_id, limit, date_from, date_to):
+    """Builds (query, params) for fetch_sales_history (also checked by check_query_plans)."""
+    query = f"""
+    SELECT o.order_id, u.username, o.total_cents, o.status, o.order_date, o.item_count
+    FROM {ALL_ORDERS} o
     JOIN User u ON o.user_id = u.user_id
-    LEFT JOIN OrderItem oi ON o.order_id = oi.order_id
     WHERE o.status = 'Complete'
-    GROUP BY o.order_id
-    ORDER BY o.order_id DESC
     """
-    cursor.execute(query)
-    history = cursor.fetchall()
-    conn.close()
-    return history
+    params = []
+    if after_order_id is not None:
+        query += " AND o.order_id < ?"; params.append(after_order_id)
+    if date_from:
+        query += " AND o.order_date >= ?"; params.append(date_from)
+    if date_to:
+        query += " AND o.order_date < date(?, '+1 day')"; params.append(date_to)
+    query += " ORDER BY o.order_id DESC"
+    if limit:
+        query += " LIMIT ?"; params.append(limit)
+    return query, params
+
+def fetch_sales_export_chunk(after_key=None, limit=5000, date_from=None, date_to=None, status="Complete"):
+    """
+    One chunk of line items (live and archived) for exports, oldest order first:
+        (order_id, username, order_date, status, product_name, quantity, unit_price_cents, item_id)
+    - after_key: (order_id, item_id) of the last row of the previous chunk (None = start).
+    - date_from / date_to: inclusive 'YYYY-MM-DD' bounds; status=None exports every status.
+    Each chunk is its own short query (keyset on the primary keys), so a long export never
+    holds a read transaction open or loads more than 'limit' rows at a time.
+    """
+    query, params = _export_chunk_query(after_key, limit, date_from, date_to, status)
+    with report_cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def _export_chunk_query(after_key, limit, date_from, date_to, status):
+    """Builds (query, params) for fetch_sales_export_chunk (also checked by check_query_plans)."""
+    line_items = _live_and_archive("""
+        SELECT o.order_id, o.user_id, o.order_date, o.status, oi.product_id, oi.quantity, oi.unit_price_cents, oi.item_id
+        FROM {db}.[Order] o JOIN {db}.OrderItem oi ON oi.order_id = o.order_id
+    """)
+    query = f"""
+    SELECT o.order_id, u.username, o.order_date, o.status, p.name, o.quantity, o.unit_price_cents, o.item_id
+    FROM {line_items} o
+    LEFT JOIN User u ON u.user_id = o.user_id
+    LEFT JOIN Product p ON p.product_id = o.product_id
+    WHERE 1 = 1
+    """
+    params = []
+    if after_key is not None:
+        query += " AND (o.order_id, o.item_id) > (?, ?)"; params.extend(after_key)
+    if status:
+        query += " AND o.status = ?"; params.append(status)
+    if date_from:
+        query += " AND o.order_date >= ?"; params.append(date_from)
+    if date_to:
+        query += " AND o.order_date < date(?, '+1 day')"; params.append(date_to)
+    query += " ORDER BY o.order_id, o.item_id LIMIT ?"
+    params.append(limit)
+    return query, params
+
+# UPDATED TABLES: OrderItem, Product
+ORDER_ITEMS_QUERY = """
+    SELECT oi.quantity, p.name 
+    FROM OrderItem oi
+    JOIN Product p ON oi.product_id = p.product_id
+    WHERE oi.order_id=?
+"""
 
 def get_order_items(order_id):
     """Fetches specific line items for a given order ID (for receipt view)."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    # UPDATED TABLES: OrderItem, Product
-    query = """
-        SELECT oi.quantity, p.name 
-        FROM OrderItem oi
-        JOIN Product p ON oi.product_id = p.product_id
-        WHERE oi.order_id=?
-    """
-    cursor.execute(query, (order_id,))
-    items = cursor.fetchall()
-    conn.close()
-    return items
+    with get_cursor() as cursor:
+        cursor.execute(ORDER_ITEMS_QUERY, (order_id,))
+        return cursor.fetchall()
 
 def delete_order_data(order_id):
     """
     Deletes an order and its associated items.
     Must delete from OrderItem first (Foreign Key constraint) then [Order].
     """
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM OrderItem WHERE order_id=?", (order_id,))
-    cursor.execute("DELETE FROM [Order] WHERE order_id=?", (order_id,))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with get_cursor() as cursor:
+        cursor.execute("DELETE FROM OrderItem WHERE order_id=?", (order_id,))
+        cursor.execute("DELETE FROM [Order] WHERE order_id=?", (order_id,))
+
+def verify_order_totals(fix=False):
+    """
+    Consistency checker for the stored [Order].total_cents / item_count columns.
+    Returns a list of (order_id, stored_total, actual_total, stored_count, actual_count)
+    for every order that disagrees with its OrderItem rows.
+    If fix=True the mismatched orders are rewritten from OrderItem.
+    """
+    query = """
+        SELECT o.order_id, o.total_cents, COALESCE(SUM(oi.quantity * oi.unit_price_cents), 0),
+               o.item_count, COUNT(oi.item_id)
+        FROM [Order] o
+        LEFT JOIN OrderItem oi ON oi.order_id = o.order_id
+        GROUP BY o.order_id
+        HAVING o.total_cents != COALESCE(SUM(oi.quantity * oi.unit_price_cents), 0)
+            OR o.item_count != COUNT(oi.item_id)
+    """
+    with get_cursor() as cursor:
+        cursor.execute(query)
+        mismatches = cursor.fetchall()
+        if fix and mismatches:
+            cursor.executemany("UPDATE [Order] SET total_cents=?, item_count=? WHERE order_id=?",
+                               [(actual_total, actual_count, order_id)
+                                for order_id, _, actual_total, _, actual_count in mismatches])
+    return mismatches
+
+# --- QUERY PLAN CHECK (see check_query_plans) ---
+# The SQL the functions above actually run (same constants/builders, sample parameters),
+# so a query edited into a full table scan is caught by 'manage.py check-plans'.
+HOT_QUERIES = {
+    "fetch_orders_by_status": _orders_by_status_query("Pending", 1000, 50),
+    "fetch_order_changes": (ORDER_CHANGES_QUERY, (0, 500)),
+    "get_order_items": (ORDER_ITEMS_QUERY, (1,)),
+    "fetch_sales_history": _sales_history_query(1000, 50, "2025-01-01", "2025-01-31"),
+    "fetch_sales_export_chunk": _export_chunk_query((1000, 1), 5000, "2025-01-01", "2025-01-31", "Complete"),
+    "fetch_order_points": (ORDER_POINTS_QUERY, ("2025-01-01", "2025-02-01")),
+}
+
+# --- INSTRUMENTATION ---
+def get_query_stats():
+    """Per-function call counts, latency histogram and rows returned (see instrumentation.snapshot)."""
+    return instrumentation.snapshot()
+
+def get_slow_queries():
+    """Recent calls slower than instrumentation.SLOW_QUERY_MS, with their statements and query plans."""
+    return instrumentation.slow_queries()
+
+def reset_query_stats():
+    """Clears the per-function statistics and the slow-call list."""
+    instrumentation.reset()
+
+def dump_query_stats(path=None):
+    """Writes the statistics and slow calls as JSON (default '<database name>-query-stats.json'). Returns the path."""
+    path = path or os.path.splitext(DB_NAME)[0] + "-query-stats.json"
+    instrumentation.dump(path)
+    return path
+
+# The data functions the app, OrderService and manage.py call are wrapped, so they are
+# measured without changes. Connection/migration plumbing, settings and the stats functions
+# themselves are not listed, so they never show up in the Query Stats tab.
+INSTRUMENTED = (
+    "validate_login", "create_user", "fetch_all_users",
+    "get_dashboard_stats", "get_daily_sales", "get_hourly_sales", "get_weekly_sales", "get_top_products",
+    "get_cashier_sales", "fetch_order_points", "rebuild_sales_rollups", "archive_orders", "get_archive_stats",
+    "fetch_all_products", "search_products", "insert_product", "update_product_data", "delete_product_data",
+    "save_order", "save_orders_bulk", "save_products_bulk", "fetch_orders_by_status", "get_latest_event_seq",
+    "fetch_order_changes", "update_order_status", "fetch_sales_history",
+    "fetch_sales_export_chunk", "get_order_items", "delete_order_data", "verify_order_totals",
+)
+# Slow on purpose (password hashing), so never reported to the slow-query log
+NOT_SLOW = {"validate_login", "create_user"}
+
+for _name in INSTRUMENTED:
+    globals()[_name] = instrumentation.instrumented(globals()[_name], slow_ms=float("inf") if _name in NOT_SLOW else None)
+del _name
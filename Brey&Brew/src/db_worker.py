@@ -0,0 +1,70 @@
+"""
+FILE: db_worker.py
+PURPOSE: Runs database calls off the Tkinter main loop.
+
+Tkinter is single-threaded: a slow query on the UI thread freezes the whole window.
+DatabaseExecutor sends calls to one dedicated worker thread (which gets its own pooled
+SQLite connection from database.create_connection) and hands the results back to the
+UI thread through a queue that is drained with root.after().
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class DatabaseExecutor:
+    """Single background thread for database work, with results marshalled back to Tk."""
+    POLL_MS = 20 # How often the UI thread checks for finished calls
+
+    def __init__(self, root):
+        self.root = root
+        # ONE worker: calls run in submission order and never compete with each other for the write lock
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+        self._finished = queue.SimpleQueue() # Callbacks waiting to run on the UI thread
+        self._closed = False
+        self._poll()
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on the worker thread and returns a concurrent.futures.Future."""
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def run(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """
+        Like submit(), but calls on_done(result) or on_error(exception) on the Tk thread
+        when the call finishes. Returns the Future.
+        """
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda f: self._finished.put((self._deliver, (f, on_done, on_error))))
+        return future
+
+    def call_soon(self, callback, *args):
+        """Schedules callback(*args) on the Tk thread. Safe to call from any thread."""
+        self._finished.put((callback, args))
+
+    def shutdown(self, wait=True):
+        """Stops accepting work and (optionally) waits for queued calls to finish."""
+        self._closed = True
+        self._pool.shutdown(wait=wait)
+
+    # --- Internal helpers (UI thread) ---
+    def _deliver(self, future, on_done, on_error):
+        error = future.exception()
+        if error is None:
+            if on_done: on_done(future.result())
+        elif on_error:
+            on_error(error)
+        else:
+            print(f"Database Error: {error}")
+
+    def _poll(self):
+        """Drains finished calls on the UI thread, then re-arms itself."""
+        while True:
+            try:
+                callback, args = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                # e.g. the tab was rebuilt (logout) before the result arrived; keep polling
+                print(f"Callback Error: {e}")
+        if not self._closed:
+            self.root.after(self.POLL_MS, self._poll)
@@ -0,0 +1,141 @@
+"""
+FILE: exporter.py
+PURPOSE: Streams sales line items out of the database for accounting (the reverse of importer.py).
+
+Rows are read with database.fetch_sales_export_chunk in fixed-size keyset chunks and
+written as they arrive, so memory use stays flat no matter how many line items a
+month-end export covers. Two output formats:
+
+    CSV       order_ref,username,order_date,status,product,quantity,unit_price,line_total
+              (the same headers import_orders_csv reads, plus line_total; amounts in pesos)
+    Columnar  a compact binary '.bbcol' file: each chunk stores every column as one
+              typed array (int64 / float64) or a dictionary-encoded string column.
+              Amounts are int64 centavos (unit_price_cents, line_total_cents).
+              Read it back with read_columnar().
+
+Columnar layout (all integers little-endian):
+    MAGIC, uint32 schema length, schema JSON [[name, type], ...]
+    then per chunk: uint32 row count, and per column one block:
+        'i8' / 'f8'  uint32 byte length + packed array
+        'str'        uint32 length + JSON list of distinct values, uint32 length + uint32 codes
+"""
+import csv
+import json
+import struct
+import sys
+from array import array
+import database
+from money import cents_to_str
+
+MAGIC = b"BBCOL\x01\n"
+COLUMNS = (
+    ("order_ref", "i8"), ("username", "str"), ("order_date", "str"), ("status", "str"),
+    ("product", "str"), ("quantity", "i8"), ("unit_price_cents", "i8"), ("line_total_cents", "i8"),
+)
+CSV_HEADER = ("order_ref", "username", "order_date", "status", "product", "quantity", "unit_price", "line_total")
+ARRAY_TYPECODES = {"i8": "q", "f8": "d"}
+_U32 = struct.Struct("<I")
+
+def iter_line_items(date_from=None, date_to=None, status="Complete", chunk_size=5000, backend=None):
+    """
+    Yields lists of at most 'chunk_size' export rows, oldest order first:
+        (order_ref, username, order_date, status, product, quantity, unit_price_cents, line_total_cents)
+    'backend' is the database module (default) or a ServiceClient.
+    """
+    backend = backend or database
+    after_key = None
+    while True:
+        rows = backend.fetch_sales_export_chunk(after_key, chunk_size, date_from, date_to, status)
+        if not rows: return
+        after_key = (rows[-1][0], rows[-1][7])
+        yield [(o_id, user or "", date, stat, product or "", qty, price, qty * price)
+               for o_id, user, date, stat, product, qty, price, _ in rows]
+        if len(rows) < chunk_size: return
+
+def export_sales(path, fmt=None, on_progress=None, **filters):
+    """
+    Writes line items to 'path' as 'csv' or 'columnar' (default: from the file extension,
+    '.bbcol' = columnar). 'filters' are passed to iter_line_items. Returns the row count.
+    """
+    fmt = fmt or ("columnar" if path.lower().endswith(".bbcol") else "csv")
+    if fmt == "csv": return export_sales_csv(path, on_progress=on_progress, **filters)
+    if fmt == "columnar": return export_sales_columnar(path, on_progress=on_progress, **filters)
+    raise ValueError(f"Unknown export format {fmt!r}")
+
+def export_sales_csv(path, on_progress=None, **filters):
+    """Streams line items to a CSV file. Returns the number of rows written."""
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for chunk in iter_line_items(**filters):
+            writer.writerows((*row[:6], cents_to_str(row[6]), cents_to_str(row[7])) for row in chunk)
+            total += len(chunk)
+            if on_progress: on_progress(total)
+    return total
+
+def export_sales_columnar(path, on_progress=None, **filters):
+    """Streams line items to a columnar '.bbcol' file. Returns the number of rows written."""
+    total = 0
+    schema = json.dumps(COLUMNS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC + _U32.pack(len(schema)) + schema)
+        for chunk in iter_line_items(**filters):
+            f.write(_U32.pack(len(chunk)))
+            for index, (_, kind) in enumerate(COLUMNS):
+                _write_column(f, kind, [row[index] for row in chunk])
+            total += len(chunk)
+            if on_progress: on_progress(total)
+    return total
+
+def read_columnar(path):
+    """
+    Reads a '.bbcol' file chunk by chunk. Yields {column_name: values} per chunk, where
+    numeric columns are array.array objects and string columns are lists.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Brey&Brew columnar export")
+        columns = json.loads(f.read(_read_u32(f)))
+        while True:
+            header = f.read(_U32.size)
+            if not header: return
+            rows = _U32.unpack(header)[0]
+            yield {name: _read_column(f, kind, rows) for name, kind in columns}
+
+# --- Column encoding helpers ---
+def _write_column(f, kind, values):
+    if kind == "str":
+        codes, distinct = array("I"), {}
+        for value in values:
+            codes.append(distinct.setdefault(value, len(distinct)))
+        _write_block(f, json.dumps(list(distinct)).encode("utf-8"))
+        _write_block(f, _to_le(codes))
+    else:
+        _write_block(f, _to_le(array(ARRAY_TYPECODES[kind], values)))
+
+def _read_column(f, kind, rows):
+    if kind == "str":
+        distinct = json.loads(f.read(_read_u32(f)))
+        codes = _from_le("I", f.read(_read_u32(f)))
+        return [distinct[code] for code in codes]
+    values = _from_le(ARRAY_TYPECODES[kind], f.read(_read_u32(f)))
+    if len(values) != rows: raise ValueError("Truncated columnar export")
+    return values
+
+def _write_block(f, data):
+    f.write(_U32.pack(len(data)))
+    f.write(data)
+
+def _read_u32(f):
+    return _U32.unpack(f.read(_U32.size))[0]
+
+def _to_le(values):
+    if sys.byteorder == "big": values.byteswap()
+    return values.tobytes()
+
+def _from_le(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big": values.byteswap()
+    return values
@@ -0,0 +1,93 @@
+"""
+FILE: image_cache.py
+PURPOSE: Caches resized product/background images so the UI never decodes the same file twice.
+
+Two levels:
+1. Memory: an LRU of ready-to-use Tk PhotoImages.
+2. Disk: resized thumbnails saved as PNG, so a restart skips the expensive decode + resize.
+Entries are keyed by (absolute path, file mtime, target size), so editing an image file
+automatically produces a new entry (and the thumbnails of the old version are deleted when
+the first new one is written); invalidate() purges a path explicitly.
+"""
+import os
+import hashlib
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+class ImageCache:
+    """LRU of PhotoImages backed by an on-disk thumbnail store."""
+
+    def __init__(self, cache_dir, max_items=256):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self._photos = OrderedDict() # (path, mtime_ns, size) -> PhotoImage, oldest first
+
+    def get(self, path, size, resample=Image.Resampling.BICUBIC):
+        """
+        Returns a PhotoImage of 'path' resized to size=(width, height).
+        Raises OSError if the image cannot be read (callers already handle load failures).
+        """
+        full_path = os.path.abspath(path)
+        key = (full_path, os.stat(full_path).st_mtime_ns, tuple(size))
+
+        # 1. Memory hit
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+            return photo
+
+        # 2. Disk hit, otherwise decode + resize the original once and persist it
+        thumb_path = self._thumbnail_path(key)
+        if os.path.exists(thumb_path):
+            image = Image.open(thumb_path)
+        else:
+            image = Image.open(full_path).resize(size, resample)
+            self._save_thumbnail(image, thumb_path)
+            self._remove_thumbnails(full_path, keep_mtime_ns=key[1]) # Older versions of the file
+
+        photo = ImageTk.PhotoImage(image)
+        self._photos[key] = photo
+        if len(self._photos) > self.max_items:
+            self._photos.popitem(last=False) # Evict least recently used
+        return photo
+
+    def invalidate(self, path):
+        """Drops every cached size of 'path' from memory and disk (e.g. after a product's image changes)."""
+        full_path = os.path.abspath(path)
+        for key in [k for k in self._photos if k[0] == full_path]:
+            del self._photos[key]
+        self._remove_thumbnails(full_path)
+
+    def clear(self):
+        """Empties the in-memory LRU (the disk store is kept)."""
+        self._photos.clear()
+
+    # --- Internal helpers ---
+    def _path_digest(self, full_path):
+        return hashlib.sha1(full_path.encode("utf-8")).hexdigest()[:16]
+
+    def _thumbnail_path(self, key):
+        """Thumbnail file name: <path hash>_<mtime>_<width>x<height>.png"""
+        full_path, mtime_ns, (width, height) = key
+        filename = f"{self._path_digest(full_path)}_{mtime_ns}_{width}x{height}.png"
+        return os.path.join(self.cache_dir, filename)
+
+    def _remove_thumbnails(self, full_path, keep_mtime_ns=None):
+        """Deletes the disk thumbnails of 'full_path', except those of version 'keep_mtime_ns'."""
+        prefix = self._path_digest(full_path) + "_"
+        keep = f"{prefix}{keep_mtime_ns}_" if keep_mtime_ns is not None else None
+        if not os.path.isdir(self.cache_dir): return
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix) and not (keep and filename.startswith(keep)):
+                try: os.remove(os.path.join(self.cache_dir, filename))
+                except OSError: pass
+
+    def _save_thumbnail(self, image, thumb_path):
+        """Best effort: a read-only install just runs without the disk cache."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = thumb_path + ".tmp"
+            image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, thumb_path) # Atomic, so a crash never leaves a half-written thumbnail
+        except OSError:
+            pass
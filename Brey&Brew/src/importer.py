@@ -0,0 +1,79 @@
+"""
+FILE: importer.py
+PURPOSE: Imports products and historical orders from CSV files (e.g. exports of a previous POS).
+
+Files are streamed row by row and written in large batches through
+database.save_products_bulk / database.save_orders_bulk, so a year of sales
+is imported in a few big transactions instead of one commit per line.
+
+Expected CSV headers:
+    products: name,description,price,image_path
+    orders:   order_ref,username,order_date,status,product,quantity,unit_price
+              (one line per item; consecutive lines with the same order_ref form one order;
+               'product' may be a product name or a product_id)
+Prices are in pesos ('110', '110.50', '1,250.00') and are stored as centavos (see money.py).
+"""
+import csv
+import database as db
+from money import to_cents
+
+def import_products_csv(path, batch_size=5000):
+    """Inserts/updates products from a CSV file. Returns the number of rows imported."""
+    total = 0
+    batch = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            batch.append((row["name"].strip(), row.get("description", ""), to_cents(row["price"]), row.get("image_path", "")))
+            if len(batch) >= batch_size:
+                total += db.save_products_bulk(batch); batch = []
+    if batch:
+        total += db.save_products_bulk(batch)
+    return total
+
+def import_orders_csv(path, batch_size=5000, on_progress=None):
+    """
+    Imports historical orders from a CSV file, 'batch_size' orders per transaction.
+    Lines with an unknown username or product are skipped and reported.
+    Returns (orders_imported, skipped_lines) where skipped_lines is a list of (line_number, reason).
+    """
+    # Lookup tables are loaded once instead of querying per line
+    user_ids = {username: user_id for user_id, username, _ in db.fetch_all_users()}
+    product_ids = {row[1].lower(): row[0] for row in db.fetch_all_products()}
+    known_product_ids = set(product_ids.values())
+
+    imported = 0
+    skipped = []
+    batch = []
+    current_ref, current_order = None, None
+
+    def flush():
+        nonlocal imported, batch
+        if batch:
+            db.save_orders_bulk(batch)
+            imported += len(batch); batch = []
+            if on_progress: on_progress(imported)
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        # Line 1 is the header, so data starts at line 2
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            user_id = user_ids.get(row["username"].strip())
+            product = row["product"].strip()
+            product_id = int(product) if product.isdigit() and int(product) in known_product_ids else product_ids.get(product.lower())
+            if user_id is None:
+                skipped.append((line_number, f"unknown user '{row['username']}'")); continue
+            if product_id is None:
+                skipped.append((line_number, f"unknown product '{product}'")); continue
+
+            if row["order_ref"] != current_ref:
+                if current_order is not None:
+                    batch.append(current_order)
+                    if len(batch) >= batch_size: flush()
+                current_ref = row["order_ref"]
+                current_order = {"user_id": user_id, "items": [],
+                                 "status": row.get("status") or None, "order_date": row.get("order_date") or None}
+            current_order["items"].append({"id": product_id, "qty": int(row["quantity"]), "price_cents": to_cents(row["unit_price"])})
+
+    if current_order is not None:
+        batch.append(current_order)
+    flush()
+    return imported, skipped
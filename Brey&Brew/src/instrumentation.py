@@ -0,0 +1,198 @@
+"""
+FILE: instrumentation.py
+PURPOSE: Per-function query statistics and a slow-query log for database.py.
+
+database.py wraps the data functions listed in its INSTRUMENTED tuple with instrumented(),
+which records call count, latency histogram, errors and rows returned per function. A call
+made from inside another instrumented call (save_order -> save_orders_bulk) is counted
+only as part of the outer one. Every pooled connection
+also gets a trace callback (tracer()) that notes the SQL statements a call executes; when
+a call takes longer than SLOW_QUERY_MS its statements are logged with their EXPLAIN QUERY
+PLAN, to the in-memory list shown in the Query Stats tab and to a log file.
+
+This module must not import database.py (database.py imports it).
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+SLOW_QUERY_MS = 100.0      # Calls slower than this are logged with their query plans
+MAX_STATEMENTS = 10        # Statements remembered per call (executemany traces every row)
+SLOW_LOG_SIZE = 100        # Recent slow calls kept in memory
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000) # Bucket upper bounds; one more bucket above
+
+_lock = threading.Lock()
+_stats = {}                # function name -> FunctionStats
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+_local = threading.local() # Stack of calls in progress on this thread (see tracer)
+slow_log = logging.getLogger("breybrew.slow_queries")
+
+class FunctionStats:
+    """Running totals for one database function."""
+    __slots__ = ("calls", "errors", "rows", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms, rows, failed):
+        self.calls += 1
+        self.errors += failed
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if elapsed_ms < bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def percentile(self, fraction):
+        """Approximate percentile: the upper bound of the bucket holding it (None above the last bound)."""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return HISTOGRAM_BOUNDS_MS[index] if index < len(HISTOGRAM_BOUNDS_MS) else None
+        return None
+
+def _count_rows(result):
+    if isinstance(result, list): return len(result)
+    if result is None or isinstance(result, (bool, int, float, str)): return 0
+    return 1 # A single row (tuple) or record
+
+def instrumented(func, slow_ms=None):
+    """
+    Wraps a database function: records timing/rows for every outermost call and logs the call
+    if it took longer than 'slow_ms' (default SLOW_QUERY_MS, read at call time).
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        elif stack:
+            return func(*args, **kwargs) # Nested: its time and statements belong to the outer call
+        statements = []
+        stack.append(statements)
+        started = time.perf_counter()
+        failed = False
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stack.pop()
+            with _lock:
+                stats = _stats.get(name)
+                if stats is None:
+                    stats = _stats[name] = FunctionStats()
+                stats.add(elapsed_ms, _count_rows(result), failed)
+            if elapsed_ms >= (SLOW_QUERY_MS if slow_ms is None else slow_ms):
+                _record_slow(name, elapsed_ms, statements)
+    return wrapper
+
+def tracer(conn):
+    """Returns a trace callback for conn.set_trace_callback() that feeds the calls in progress."""
+    def trace(sql):
+        stack = getattr(_local, "stack", None)
+        if not stack: return # Not inside an instrumented call (or we are explaining)
+        for statements in stack:
+            if len(statements) < MAX_STATEMENTS:
+                statements.append((conn, sql))
+    return trace
+
+def _explain(conn, sql):
+    """EXPLAIN QUERY PLAN for one traced statement (already expanded with its parameters)."""
+    keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    if keyword not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"):
+        return []
+    saved, _local.stack = getattr(_local, "stack", None), None # Don't trace our own EXPLAIN
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+    except Exception as e:
+        return [f"(plan unavailable: {e})"]
+    finally:
+        _local.stack = saved
+
+def _record_slow(name, elapsed_ms, statements):
+    entry = {
+        "function": name,
+        "ms": round(elapsed_ms, 2),
+        "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "statements": [{"sql": " ".join(sql.split()), "plan": _explain(conn, sql)} for conn, sql in statements],
+    }
+    with _lock:
+        _slow.append(entry)
+    if slow_log.handlers:
+        lines = [f"{name} took {entry['ms']} ms"]
+        for statement in entry["statements"]:
+            lines.append(f"    {statement['sql']}")
+            lines.extend(f"        {step}" for step in statement["plan"])
+        slow_log.warning("\n".join(lines))
+
+def enable_slow_log(path):
+    """Appends slow calls to 'path' (plain text). Safe to call more than once."""
+    if any(getattr(handler, "baseFilename", None) == path for handler in slow_log.handlers): return
+    for handler in list(slow_log.handlers):
+        slow_log.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(path, encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_log.addHandler(handler)
+    slow_log.setLevel(logging.WARNING)
+    slow_log.propagate = False
+
+# --- REPORTING ---
+def snapshot():
+    """
+    Returns one dict per function, slowest total first:
+        {function, calls, errors, rows, total_ms, avg_ms, max_ms, p50_ms, p95_ms, histogram}
+    histogram is [(upper_bound_ms or None, count), ...].
+    """
+    with _lock:
+        items = [(name, stats) for name, stats in _stats.items()]
+        report = [{
+            "function": name,
+            "calls": stats.calls,
+            "errors": stats.errors,
+            "rows": stats.rows,
+            "total_ms": round(stats.total_ms, 2),
+            "avg_ms": round(stats.total_ms / stats.calls, 3) if stats.calls else 0.0,
+            "max_ms": round(stats.max_ms, 2),
+            "p50_ms": stats.percentile(0.5),
+            "p95_ms": stats.percentile(0.95),
+            "histogram": list(zip(HISTOGRAM_BOUNDS_MS + (None,), stats.histogram)),
+        } for name, stats in items]
+    return sorted(report, key=lambda row: row["total_ms"], reverse=True)
+
+def slow_queries():
+    """The most recent slow calls, newest first."""
+    with _lock:
+        return list(reversed(_slow))
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow.clear()
+
+def dump(path):
+    """Writes the current statistics and slow calls to a JSON file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"written_at": time.strftime("%Y-%m-%d %H:%M:%S"), "functions": snapshot(),
+                   "slow_queries": slow_queries()}, f, indent=2)
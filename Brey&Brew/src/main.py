@@ -1,8 +1,33 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
+from PIL import Image
 import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
 import database as db  # Import local database module for backend logic
+from order_service import ServiceClient, ServiceError
+from widgets import PagedTreeview, TreeviewBinding, Debouncer
+from image_cache import ImageCache
+from catalog import ProductCatalog
+from db_worker import DatabaseExecutor
+import analytics
+import math
+from auth import LoginThrottle, Session
+import exporter
+from order_journal import OrderJournal, JournalInUseError
+from cart import Cart
+from money import format_cents, to_cents, cents_to_str
+
+# Multi-terminal mode: talk to a shared order service instead of opening the database file
+# directly (start it with 'python manage.py serve'). ServiceClient mirrors the db functions.
+if os.environ.get("BREYBREW_SERVICE_URL"):
+    db = ServiceClient(os.environ["BREYBREW_SERVICE_URL"])
+# Single till: reports (history, dashboard, analytics, exports) can read a snapshot of the
+# database refreshed at most every N seconds, like 'manage.py serve --report-snapshot N'.
+elif os.environ.get("BREYBREW_REPORT_SNAPSHOT_SECONDS"):
+    db.REPORT_SNAPSHOT_SECONDS = float(os.environ["BREYBREW_REPORT_SNAPSHOT_SECONDS"])
 
 class CoffeeShopApp:
     """
@@ -18,8 +43,16 @@ class CoffeeShopApp:
         # State variables to track the active user and current shopping cart
         self.current_user_id = None 
         self.current_username = None 
-        self.cart_data = [] # List of dictionaries to hold temporary order items
+        self.session = None # auth.Session of the logged-in staff member
+        self.login_throttle = LoginThrottle() # Locks a username out for a while after repeated wrong passwords
+        self.login_pending = False
+        self.signup_pending = False
+        self.cart = Cart() # Lines of the order being taken (see cart.py)
         self.img_cache = [] # Prevents garbage collection of images in Treeviews
+        # Resized images (memory LRU + on-disk thumbnails) shared by every screen
+        self.images = ImageCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumbnails"))
+        # Products are read from SQLite once, then served from memory to every tab
+        self.catalog = ProductCatalog(backend=db)
 
         # --- 2. SET WINDOW ICON ---
         # Dynamically load the window icon relative to the script location
@@ -35,19 +68,49 @@ class CoffeeShopApp:
         # --- 3. START DATABASE & UI ---
         # Initialize database tables and show the initial login screen
         db.setup_database()
+        # Every other query runs on a background worker so the window never freezes
+        self.db_exec = DatabaseExecutor(self.root)
+        # Checkout writes to a local journal; a background flusher saves the orders to the database
+        # (orders left over from the last run are replayed here)
+        try:
+            self.journal = OrderJournal(save_batch=db.save_orders_bulk, on_flushed=lambda saved: self.db_exec.call_soon(self.on_orders_flushed, saved),
+                                        on_dead_letter=lambda record, error: self.db_exec.call_soon(self.on_order_dead_lettered, record, error))
+        except JournalInUseError as e:
+            messagebox.showerror("Already Running", str(e))
+            raise SystemExit(1)
+        self.journal.start()
+        # Keep the live order tables small: old completed orders move to the archive database
+        self.run_db(db.archive_orders)
         self.show_login_screen()
 
+    def run_db(self, fn, *args, on_done=None, status_label=None):
+        """
+        Runs a database call on the worker thread; on_done(result) then runs on the UI thread.
+        While the call is in flight, 'status_label' (if given) shows a loading message.
+        """
+        if status_label is not None: status_label.config(text="Loading...")
+
+        def done(result):
+            if status_label is not None: status_label.config(text="")
+            if on_done: on_done(result)
+
+        def failed(error):
+            if status_label is not None: status_label.config(text="Could not load data")
+            print(f"Database Error: {error}")
+        return self.db_exec.run(fn, *args, on_done=done, on_error=failed)
+
     # ================= LOGIN SCREEN =================
     def show_login_screen(self):
         """Renders the login interface with background image."""
         self.clear_frame() # Wipe previous UI elements
+        self.session = None # Logging out ends the session
+        self.root.unbind(self.QUERY_STATS_SHORTCUT)
 
         # Attempt to load and set the background image
         try:
             base_folder = os.path.dirname(os.path.abspath(__file__))
             bg_path = os.path.join(base_folder, "images", "beans.jpg")
-            bg_image = Image.open(bg_path).resize((1570, 1000), Image.Resampling.LANCZOS)
-            self.login_bg_img = ImageTk.PhotoImage(bg_image)
+            self.login_bg_img = self.images.get(bg_path, (1570, 1000), Image.Resampling.LANCZOS)
             tk.Label(self.root, image=self.login_bg_img).place(x=0, y=0, relwidth=1, relheight=1)
         except Exception:
             self.root.configure(bg="#f0f0f0") # Fallback color if image fails
@@ -73,24 +136,59 @@ class CoffeeShopApp:
         tk.Button(login_frame, text="Sign Up", command=self.signup, bg="#2196F3", fg="white", width=25).pack(pady=5)
 
     def login(self):
-        """Validates credentials against the database."""
-        user = db.validate_login(self.entry_user.get(), self.entry_pass.get())
-        if user:
-            # Store session data: (user_id, username, password, role)
-            self.current_user_id = user[0] 
-            self.current_username = user[1]
-            self.show_dashboard()
-        else:
-            messagebox.showerror("Error", "Invalid Credentials")
+        """
+        Validates credentials against the database. Password hashing is deliberately slow,
+        so the check runs on the worker thread; repeated failures lock the username out.
+        """
+        if self.login_pending: return # Already checking (e.g. Enter pressed twice)
+        username, password = self.entry_user.get(), self.entry_pass.get()
+        wait = self.login_throttle.check(username)
+        if wait:
+            messagebox.showerror("Error", f"Too many failed attempts. Try again in {math.ceil(wait)} seconds.")
+            return
+        self.login_started = time.perf_counter() # Start of the time-to-interactive measurement
+        self.login_pending = True
+
+        def checked(user):
+            self.login_pending = False
+            if user:
+                self.login_throttle.succeeded(username)
+                # Store session data: (user_id, username, role)
+                self.session = Session(*user)
+                self.current_user_id = self.session.user_id
+                self.current_username = self.session.username
+                self.show_dashboard()
+            else:
+                self.login_throttle.failed(username)
+                messagebox.showerror("Error", "Invalid Credentials")
+
+        def failed(error):
+            self.login_pending = False
+            print(f"Database Error: {error}")
+            messagebox.showerror("Error", "Could not check the credentials. Please try again.")
+        self.db_exec.run(db.validate_login, username, password, on_done=checked, on_error=failed)
 
     def signup(self):
-        """Registers a new user."""
-        if db.create_user(self.entry_user.get(), self.entry_pass.get()):
-            messagebox.showinfo("Success", "Account Created! Please Login.")
-        else:
-            messagebox.showerror("Error", "Username already exists.")
+        """Registers a new user. Hashing the password is slow, so it runs on the worker thread like login."""
+        if self.signup_pending: return # Already creating the account (e.g. button clicked twice)
+        self.signup_pending = True
+
+        def created(ok):
+            self.signup_pending = False
+            if ok:
+                messagebox.showinfo("Success", "Account Created! Please Login.")
+            else:
+                messagebox.showerror("Error", "Username already exists.")
+
+        def failed(error):
+            self.signup_pending = False
+            print(f"Database Error: {error}")
+            messagebox.showerror("Error", "Could not create the account. Please try again.")
+        self.db_exec.run(db.create_user, self.entry_user.get(), self.entry_pass.get(), on_done=created, on_error=failed)
 
     # ================= DASHBOARD =================
+    QUERY_STATS_SHORTCUT = "<Control-Shift-Q>" # Reveals the hidden Query Stats tab (managers only)
+
     def show_dashboard(self):
         """Sets up the main navigation tabs and header."""
         self.clear_frame()
@@ -104,9 +202,11 @@ class CoffeeShopApp:
         # Tab Control
         notebook = ttk.Notebook(self.root)
         notebook.pack(fill="both", expand=True, padx=10, pady=10)
+        self.notebook = notebook
 
         # Initialize Frames for each tab
         self.tab_home = tk.Frame(notebook)
+        self.tab_analytics = tk.Frame(notebook)
         self.tab_products = tk.Frame(notebook)
         self.tab_orders = tk.Frame(notebook)
         self.tab_status = tk.Frame(notebook)
@@ -115,19 +215,95 @@ class CoffeeShopApp:
 
         # Add tabs to notebook
         notebook.add(self.tab_home, text="Home Dashboard")
+        notebook.add(self.tab_analytics, text="Analytics")
         notebook.add(self.tab_products, text="Manage Products")
         notebook.add(self.tab_orders, text="Take Order")
         notebook.add(self.tab_status, text="Kitchen Monitor")
         notebook.add(self.tab_history, text="Sales History")
         notebook.add(self.tab_users, text="Staff List")
 
-        # Build content for each tab
-        self.build_home_tab()
-        self.build_product_tab()
-        self.build_order_tab()
-        self.build_status_tab()
-        self.build_history_tab() 
-        self.build_users_tab()   
+        # Tabs are built on their first visit; afterwards only the visible tab is refreshed
+        # and the others are flagged dirty (see refresh_tab)
+        self.tab_builders = {
+            str(self.tab_home): self.build_home_tab,
+            str(self.tab_analytics): self.build_analytics_tab,
+            str(self.tab_products): self.build_product_tab,
+            str(self.tab_orders): self.build_order_tab,
+            str(self.tab_status): self.build_status_tab,
+            str(self.tab_history): self.build_history_tab,
+            str(self.tab_users): self.build_users_tab,
+        }
+        self.tab_refreshers = {
+            str(self.tab_home): self.refresh_home,
+            str(self.tab_analytics): self.load_analytics,
+            str(self.tab_products): lambda: self.load_products(query=self.search_var.get()),
+            str(self.tab_orders): self.load_order_menu,
+            str(self.tab_status): self.load_order_status,
+            str(self.tab_history): self.load_history,
+            str(self.tab_users): self.load_users,
+        }
+        self.built_tabs = set()
+        self.dirty_tabs = set()
+        self.startup_timings = {} # Tab name -> build time in ms, plus time_to_interactive_ms
+
+        # Hidden Query Stats tab for managers, shown with Ctrl+Shift+Q
+        if self.session.is_manager:
+            self.tab_query_stats = tk.Frame(notebook)
+            notebook.add(self.tab_query_stats, text="Query Stats")
+            notebook.hide(self.tab_query_stats)
+            self.tab_builders[str(self.tab_query_stats)] = self.build_query_stats_tab
+            self.tab_refreshers[str(self.tab_query_stats)] = self.load_query_stats
+            self.root.bind(self.QUERY_STATS_SHORTCUT, self.show_query_stats_tab)
+
+        # Fresh product snapshot for this session; the tabs subscribe to its changes when built
+        self.catalog.clear_listeners()
+        self.catalog.load()
+
+        # Only the visible tab is built now
+        self.ensure_tab_built(notebook.select())
+        notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.root.after_idle(self.report_startup_time)
+
+    def ensure_tab_built(self, tab):
+        """Builds a tab's content the first time it is needed (timed for the startup report)."""
+        key = str(tab)
+        if key in self.built_tabs: return
+        self.built_tabs.add(key)
+        started = time.perf_counter()
+        self.tab_builders[key]()
+        self.startup_timings[self.notebook.tab(key, "text")] = (time.perf_counter() - started) * 1000
+
+    def on_tab_changed(self, event):
+        """Builds the newly visible tab on first visit, or refreshes it if its data went stale."""
+        tab = self.notebook.select()
+        if tab not in self.built_tabs:
+            self.ensure_tab_built(tab)
+        elif tab in self.dirty_tabs:
+            self.dirty_tabs.discard(tab)
+            self.tab_refreshers[tab]()
+
+    def refresh_tab(self, *tabs):
+        """
+        Called after data changes: reloads the visible tab immediately and marks the other
+        built tabs dirty, so they reload on their next visit. Unbuilt tabs load fresh data anyway.
+        """
+        visible = self.notebook.select()
+        for tab in tabs:
+            key = str(tab)
+            if key not in self.built_tabs: continue
+            if key == visible:
+                self.dirty_tabs.discard(key)
+                self.tab_refreshers[key]()
+            else:
+                self.dirty_tabs.add(key)
+
+    def report_startup_time(self):
+        """Prints how long staff waited from pressing Login to a usable dashboard."""
+        started = getattr(self, "login_started", None)
+        if started is None: return
+        self.startup_timings["time_to_interactive_ms"] = (time.perf_counter() - started) * 1000
+        builds = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.startup_timings.items() if name != "time_to_interactive_ms")
+        print(f"Startup: dashboard interactive {self.startup_timings['time_to_interactive_ms']:.0f} ms after login (built: {builds})")
 
     # ================= HOME TAB =================
     def build_home_tab(self):
@@ -140,25 +316,22 @@ class CoffeeShopApp:
         try:
             base_folder = os.path.dirname(os.path.abspath(__file__))
             image_path = os.path.join(base_folder, "images", "logo.png")
-            load = Image.open(image_path).resize((320, 300), Image.Resampling.LANCZOS)
-            self.home_logo_img = ImageTk.PhotoImage(load)
+            self.home_logo_img = self.images.get(image_path, (320, 300), Image.Resampling.LANCZOS)
             tk.Label(center_frame, image=self.home_logo_img, bg="white", bd=0).pack(pady=(0, 20))
         except Exception:
             tk.Label(center_frame, text="BREY&BREW Overview", font=("Georgia", 28, "bold"), fg="#333", bg="white").pack(pady=(0, 30))
 
-        # Statistics Section
+        # Statistics Section (values are filled in by refresh_home once the query returns)
         stats_frame = tk.Frame(center_frame, bg="white")
         stats_frame.pack(pady=10)
 
-        try:
-            revenue, count = db.get_dashboard_stats()
-        except: 
-            revenue, count = (0.0, 0) 
-
-        self.create_stat_card(stats_frame, "Total Revenue", f"₱{revenue:,.2f}", "#4CAF50", 0)
-        self.create_stat_card(stats_frame, "Total Orders", f"{count}", "#2196F3", 1)
+        self.lbl_revenue = self.create_stat_card(stats_frame, "Total Revenue", "...", "#4CAF50", 0)
+        self.lbl_order_count = self.create_stat_card(stats_frame, "Total Orders", "...", "#2196F3", 1)
         
-        tk.Button(center_frame, text="Refresh Data", command=self.refresh_home, font=("Arial", 10)).pack(pady=30)
+        tk.Button(center_frame, text="Refresh Data", command=self.refresh_home, font=("Arial", 10)).pack(pady=(30, 0))
+        self.home_status = tk.Label(center_frame, text="", bg="white", fg="#777")
+        self.home_status.pack()
+        self.refresh_home()
 
     def create_stat_card(self, parent, title, value, color, col_index):
         """Helper function to create styled statistic cards."""
@@ -166,12 +339,181 @@ class CoffeeShopApp:
         frame.grid(row=0, column=col_index, padx=20, pady=10)
         frame.pack_propagate(False) 
         tk.Label(frame, text=title, bg=color, fg="white", font=("Arial", 12)).pack(pady=(20, 5))
-        tk.Label(frame, text=value, bg=color, fg="white", font=("Arial", 18, "bold")).pack()
+        value_label = tk.Label(frame, text=value, bg=color, fg="white", font=("Arial", 18, "bold"))
+        value_label.pack()
+        return value_label
 
     def refresh_home(self):
-        """Reloads the home tab to update stats."""
-        for w in self.tab_home.winfo_children(): w.destroy()
-        self.build_home_tab()
+        """Reloads the dashboard stats in the background and updates the cards."""
+        def show(stats):
+            revenue, count = stats
+            self.lbl_revenue.config(text=format_cents(revenue))
+            self.lbl_order_count.config(text=f"{count}")
+        self.run_db(db.get_dashboard_stats, on_done=show, status_label=self.home_status)
+
+    # ================= ANALYTICS TAB =================
+    def build_analytics_tab(self):
+        """Revenue by period, best sellers and per-cashier totals, read from the rollup tables."""
+        tk.Label(self.tab_analytics, text="Sales Analytics", font=("Georgia", 16, "bold")).pack(pady=15)
+
+        # Range and period (format YYYY-MM-DD, blank = no limit; defaults to the last 30 days)
+        filter_frame = tk.Frame(self.tab_analytics)
+        filter_frame.pack(pady=5)
+        tk.Label(filter_frame, text="From:").pack(side="left")
+        self.an_from = tk.Entry(filter_frame, width=12)
+        self.an_from.insert(0, date.fromordinal(date.today().toordinal() - 29).isoformat())
+        self.an_from.pack(side="left", padx=5)
+        tk.Label(filter_frame, text="To:").pack(side="left")
+        self.an_to = tk.Entry(filter_frame, width=12)
+        self.an_to.insert(0, date.today().isoformat())
+        self.an_to.pack(side="left", padx=5)
+        self.an_to.bind('<Return>', lambda event: self.load_analytics())
+        tk.Label(filter_frame, text="Period:").pack(side="left", padx=(10, 0))
+        self.an_period = ttk.Combobox(filter_frame, values=[p.title() for p in analytics.PERIODS], state="readonly", width=11)
+        self.an_period.set("Daily")
+        self.an_period.pack(side="left", padx=5)
+        self.an_period.bind("<<ComboboxSelected>>", lambda event: self.load_analytics())
+        tk.Button(filter_frame, text="Refresh Data", command=self.load_analytics).pack(side="left", padx=10)
+        self.an_status = tk.Label(filter_frame, text="", fg="#777", width=18)
+        self.an_status.pack(side="left")
+
+        # Totals for the range
+        cards = tk.Frame(self.tab_analytics)
+        cards.pack(pady=5)
+        self.an_revenue = self.create_stat_card(cards, "Revenue", "...", "#4CAF50", 0)
+        self.an_orders = self.create_stat_card(cards, "Orders", "...", "#2196F3", 1)
+        self.an_ticket = self.create_stat_card(cards, "Average Ticket", "...", "#FF9800", 2)
+
+        tables = tk.Frame(self.tab_analytics)
+        tables.pack(fill="both", expand=True, padx=20, pady=10)
+
+        def make_table(title, columns, widths):
+            frame = tk.Frame(tables)
+            frame.pack(side="left", fill="both", expand=True, padx=5)
+            tk.Label(frame, text=title, font=("Georgia", 12, "bold")).pack(pady=(0, 5))
+            tree = ttk.Treeview(frame, columns=columns, show="headings", style="Standard.Treeview")
+            for col, width in zip(columns, widths):
+                tree.heading(col, text=col); tree.column(col, width=width, anchor="center")
+            tree.pack(fill="both", expand=True)
+            return frame, TreeviewBinding(tree)
+
+        _, self.an_series_binding = make_table("Revenue by Period", ("Period", "Revenue", "Orders"), (130, 100, 60))
+        top_frame, self.an_top_binding = make_table("Top Products", ("Product", "Qty", "Revenue"), (150, 50, 100))
+        _, self.an_cashier_binding = make_table("Cashiers", ("Cashier", "Revenue", "Orders", "Avg Ticket"), (100, 100, 60, 80))
+        # Both rankings come with the report, so switching needs no new query
+        self.an_rank = ttk.Combobox(top_frame, values=["By Quantity", "By Revenue"], state="readonly", width=12)
+        self.an_rank.set("By Quantity")
+        self.an_rank.pack(pady=5)
+        self.an_rank.bind("<<ComboboxSelected>>", lambda event: self.show_top_products())
+        self.an_report = None
+        self.load_analytics()
+
+    def load_analytics(self):
+        """Reads the sales report for the chosen range/period in the background and updates the tables."""
+        try:
+            date_from = self.read_date_filter(self.an_from)
+            date_to = self.read_date_filter(self.an_to)
+        except ValueError:
+            messagebox.showwarning("Warning", "Dates must use the YYYY-MM-DD format")
+            return
+        period = self.an_period.get().lower()
+        if period in analytics.SLOT_PERIODS and not (date_from and date_to):
+            messagebox.showwarning("Warning", f"The {self.an_period.get()} view needs both dates")
+            return
+
+        def show(report):
+            self.an_report = report
+            self.an_revenue.config(text=format_cents(report['revenue']))
+            self.an_orders.config(text=f"{report['orders']}")
+            self.an_ticket.config(text=format_cents(report['average_ticket']))
+            self.an_series_binding.sync([(bucket, {"values": (bucket, format_cents(revenue), count)})
+                                         for bucket, revenue, count in report["series"]])
+            self.an_cashier_binding.sync([(name, {"values": (name, format_cents(revenue), count, format_cents(ticket))})
+                                          for name, revenue, count, ticket in report["cashiers"]])
+            self.show_top_products()
+        self.run_db(analytics.sales_report, date_from, date_to, period, db,
+                    on_done=show, status_label=self.an_status)
+
+    def show_top_products(self):
+        """Shows the best sellers from the last report, ranked as chosen."""
+        if self.an_report is None: return
+        key = "top_revenue" if self.an_rank.get() == "By Revenue" else "top_quantity"
+        self.an_top_binding.sync([(name, {"values": (name, qty, format_cents(revenue))})
+                                  for name, qty, revenue in self.an_report[key]])
+
+    # ================= QUERY STATS TAB (managers only) =================
+    def show_query_stats_tab(self, event=None):
+        """Restores the hidden tab and switches to it."""
+        self.notebook.add(self.tab_query_stats) # add() on a hidden tab shows it again
+        self.notebook.select(self.tab_query_stats)
+
+    def build_query_stats_tab(self):
+        """Per-function database timings and the recent slow queries with their query plans."""
+        tk.Label(self.tab_query_stats, text="Database Query Statistics", font=("Georgia", 16, "bold")).pack(pady=15)
+        button_frame = tk.Frame(self.tab_query_stats)
+        button_frame.pack(pady=5)
+        tk.Button(button_frame, text="Refresh Data", command=self.load_query_stats).pack(side="left", padx=5)
+        tk.Button(button_frame, text="Reset", command=self.reset_query_stats).pack(side="left", padx=5)
+        tk.Button(button_frame, text="Hide Tab", command=lambda: self.notebook.hide(self.tab_query_stats)).pack(side="left", padx=5)
+        self.qs_status = tk.Label(button_frame, text="", fg="#777", width=18)
+        self.qs_status.pack(side="left")
+
+        columns = ("Function", "Calls", "Errors", "Rows", "Total ms", "Avg ms", "p95 ms", "Max ms")
+        widths = (200, 70, 60, 80, 90, 80, 70, 80)
+        self.qs_tree = ttk.Treeview(self.tab_query_stats, columns=columns, show="headings", style="Standard.Treeview", height=10)
+        for col, width in zip(columns, widths):
+            self.qs_tree.heading(col, text=col); self.qs_tree.column(col, width=width, anchor="center")
+        self.qs_tree.column("Function", anchor="w")
+        self.qs_tree.pack(fill="both", expand=True, padx=20, pady=5)
+        self.qs_tree.bind("<<TreeviewSelect>>", lambda event: self.show_query_histogram())
+        self.qs_binding = TreeviewBinding(self.qs_tree)
+
+        details = tk.Frame(self.tab_query_stats)
+        details.pack(fill="both", expand=True, padx=20, pady=5)
+        self.qs_histogram = ttk.Treeview(details, columns=("Latency", "Calls"), show="headings", height=11, style="Standard.Treeview")
+        self.qs_histogram.heading("Latency", text="Latency"); self.qs_histogram.column("Latency", width=110, anchor="center")
+        self.qs_histogram.heading("Calls", text="Calls"); self.qs_histogram.column("Calls", width=70, anchor="center")
+        self.qs_histogram.pack(side="left", fill="y")
+        self.qs_slow = tk.Text(details, wrap="none", font=("Courier", 9), height=12)
+        self.qs_slow.pack(side="left", fill="both", expand=True, padx=(10, 0))
+        self.qs_report = {}
+        self.load_query_stats()
+
+    def load_query_stats(self):
+        """Reads the statistics (from the order service when one is used) and the slow-query log."""
+        def show(result):
+            stats, slow = result
+            self.qs_report = {row["function"]: row for row in stats}
+            self.qs_binding.sync([(row["function"], {"values": (
+                row["function"], row["calls"], row["errors"], row["rows"], f"{row['total_ms']:,.1f}",
+                f"{row['avg_ms']:.2f}", f"< {row['p95_ms']}" if row["p95_ms"] is not None else f">= {row['histogram'][-2][0]}", f"{row['max_ms']:.1f}")})
+                for row in stats])
+            self.show_query_histogram()
+            lines = []
+            for entry in slow:
+                lines.append(f"{entry['at']}  {entry['function']}  {entry['ms']} ms")
+                for statement in entry["statements"]:
+                    lines.append(f"    {statement['sql']}")
+                    lines.extend(f"        {step}" for step in statement["plan"])
+            self.qs_slow.delete("1.0", tk.END)
+            self.qs_slow.insert(tk.END, "\n".join(lines) or "No slow queries recorded.")
+        self.run_db(lambda: (db.get_query_stats(), db.get_slow_queries()), on_done=show, status_label=self.qs_status)
+
+    def show_query_histogram(self):
+        """Latency histogram of the selected function."""
+        self.qs_histogram.delete(*self.qs_histogram.get_children())
+        selected = self.qs_tree.selection()
+        row = self.qs_report.get(selected[0]) if selected else None
+        if row is None: return
+        lower = 0
+        for upper, count in row["histogram"]:
+            label = f"{lower}-{upper} ms" if upper is not None else f">= {lower} ms"
+            self.qs_histogram.insert("", tk.END, values=(label, count))
+            lower = upper
+
+    def reset_query_stats(self):
+        if messagebox.askyesno("Confirm", "Clear all query statistics?"):
+            self.run_db(db.reset_query_stats, on_done=lambda result: self.load_query_stats(), status_label=self.qs_status)
 
     # ================= USERS TAB =================
     def build_users_tab(self):
@@ -181,6 +523,8 @@ class CoffeeShopApp:
 
         tk.Label(self.tab_users, text="Registered Staff Members", font=("Georgia", 16, "bold")).pack(pady=15)
         tk.Button(self.tab_users, text="Refresh List", command=self.load_users).pack(pady=5)
+        self.users_status = tk.Label(self.tab_users, text="", fg="#777")
+        self.users_status.pack()
 
         # Treeview Configuration
         columns = ("ID", "Username", "Role")
@@ -189,40 +533,133 @@ class CoffeeShopApp:
         self.user_tree.heading("Username", text="Username"); self.user_tree.column("Username", width=150, anchor="center")
         self.user_tree.heading("Role", text="Role"); self.user_tree.column("Role", width=100, anchor="center")
         self.user_tree.pack(fill="both", expand=True, padx=20, pady=10)
+        self.user_binding = TreeviewBinding(self.user_tree)
         self.load_users()
 
     def load_users(self):
-        """Fetches users from DB and populates the Treeview."""
-        for row in self.user_tree.get_children(): self.user_tree.delete(row)
-        try:
-            for user in db.fetch_all_users(): self.user_tree.insert("", tk.END, values=user)
-        except: pass
+        """Fetches users in the background and updates only the changed Treeview rows."""
+        self.run_db(db.fetch_all_users, status_label=self.users_status,
+                    on_done=lambda users: self.user_binding.sync([(user[0], {"values": user}) for user in users]))
 
     # ================= SALES HISTORY TAB =================
     def build_history_tab(self):
         """Displays completed transaction history."""
         tk.Label(self.tab_history, text="Transaction History (Completed)", font=("Georgia", 16, "bold")).pack(pady=15)
-        tk.Button(self.tab_history, text="Refresh Data", command=self.load_history).pack(pady=5)
 
+        # Date Range Filter (applied in SQL, format YYYY-MM-DD, blank = no limit)
+        filter_frame = tk.Frame(self.tab_history)
+        filter_frame.pack(pady=5)
+        tk.Label(filter_frame, text="From:").pack(side="left")
+        self.hist_from = tk.Entry(filter_frame, width=12)
+        self.hist_from.pack(side="left", padx=5)
+        tk.Label(filter_frame, text="To:").pack(side="left")
+        self.hist_to = tk.Entry(filter_frame, width=12)
+        self.hist_to.pack(side="left", padx=5)
+        self.hist_to.bind('<Return>', lambda event: self.load_history())
+        tk.Button(filter_frame, text="Refresh Data", command=self.load_history).pack(side="left", padx=10)
+        self.btn_export = tk.Button(filter_frame, text="Export", command=self.export_history)
+        self.btn_export.pack(side="left")
+        self.hist_status = tk.Label(filter_frame, text="", fg="#777", width=22)
+        self.hist_status.pack(side="left")
+
+        tree_frame = tk.Frame(self.tab_history)
+        tree_frame.pack(fill="both", expand=True, padx=20, pady=10)
         columns = ("ID", "Cashier", "Total", "Date", "Items")
-        self.hist_tree = ttk.Treeview(self.tab_history, columns=columns, show="headings", style="Standard.Treeview")
+        self.hist_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", style="Standard.Treeview")
         # Define Columns
         self.hist_tree.heading("ID", text="Order ID"); self.hist_tree.column("ID", width=60, anchor="center")
         self.hist_tree.heading("Cashier", text="Cashier"); self.hist_tree.column("Cashier", width=120, anchor="center")
         self.hist_tree.heading("Total", text="Total"); self.hist_tree.column("Total", width=100, anchor="center")
         self.hist_tree.heading("Date", text="Date"); self.hist_tree.column("Date", width=150, anchor="center")
         self.hist_tree.heading("Items", text="Items"); self.hist_tree.column("Items", width=80, anchor="center")
-        self.hist_tree.pack(fill="both", expand=True, padx=20, pady=10)
+        hist_scroll = ttk.Scrollbar(tree_frame, orient="vertical")
+        hist_scroll.pack(side="right", fill="y")
+        self.hist_tree.pack(side="left", fill="both", expand=True)
+
+        # Rows are fetched one page at a time as the user scrolls
+        self.history_pager = PagedTreeview(self.hist_tree, self.fetch_history_page, self.make_history_item,
+                                           scrollbar=hist_scroll, run_async=self.run_history_query)
+        self.hist_filter = None # (date_from, date_to) currently shown
         self.load_history()
 
+    def export_history(self):
+        """
+        Exports the completed line items in the current date range to CSV or a columnar
+        '.bbcol' file. The export streams in chunks on its own thread, so neither the window
+        nor the other tabs' queries wait for a long month-end export.
+        """
+        try:
+            date_from = self.read_date_filter(self.hist_from)
+            date_to = self.read_date_filter(self.hist_to)
+        except ValueError:
+            messagebox.showwarning("Warning", "Dates must use the YYYY-MM-DD format")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Sales", defaultextension=".csv",
+            initialfile=f"sales_{date_from or 'start'}_to_{date_to or 'today'}.csv",
+            filetypes=[("CSV file", "*.csv"), ("Columnar export", "*.bbcol")])
+        if not path: return
+        self.btn_export.config(state="disabled")
+
+        def progress(rows):
+            self.db_exec.call_soon(lambda: self.hist_status.config(text=f"Exported {rows:,} rows..."))
+
+        def finished(rows, error):
+            if not self.btn_export.winfo_exists(): return # Logged out meanwhile
+            self.btn_export.config(state="normal")
+            self.hist_status.config(text="")
+            if error is not None:
+                messagebox.showerror("Error", f"Export failed: {error}")
+            else:
+                messagebox.showinfo("Success", f"Exported {rows:,} line items to {os.path.basename(path)}")
+
+        def work():
+            try:
+                rows = exporter.export_sales(path, on_progress=progress, backend=db, date_from=date_from, date_to=date_to)
+                self.db_exec.call_soon(finished, rows, None)
+            except Exception as e:
+                self.db_exec.call_soon(finished, None, e)
+            finally:
+                db.close_thread_connection()
+        threading.Thread(target=work, name="sales-export", daemon=True).start()
+
+    def read_date_filter(self, entry):
+        """Returns the YYYY-MM-DD text of a filter entry, None if blank. Raises ValueError if malformed."""
+        text = entry.get().strip()
+        if not text: return None
+        datetime.strptime(text, "%Y-%m-%d")
+        return text
+
+    def fetch_history_page(self, after_order_id, limit):
+        """Page loader for the history pager (keyset pagination + date filter in SQL)."""
+        return db.fetch_sales_history(after_order_id=after_order_id, limit=limit,
+                                      date_from=self.hist_date_from, date_to=self.hist_date_to)
+
+    def run_history_query(self, fn, *args, on_done=None):
+        """Runs history page queries on the worker thread, showing a loading message."""
+        self.run_db(fn, *args, on_done=on_done, status_label=self.hist_status)
+
+    def make_history_item(self, row):
+        """Formats one sales history row for the Treeview."""
+        return {"values": (row[0], row[1], format_cents(row[2]), row[4], row[5])}
+
     def load_history(self):
-        """Fetches sales data from DB and populates the Treeview."""
-        for row in self.hist_tree.get_children(): self.hist_tree.delete(row)
+        """
+        Refreshes the history Treeview using the current date filter.
+        Same filter: re-reads the loaded rows and applies only the differences.
+        New filter: starts again from the first page.
+        """
         try:
-            for row in db.fetch_sales_history():
-                vals = (row[0], row[1], f"₱{row[2]:.2f}", row[4], row[5])
-                self.hist_tree.insert("", tk.END, values=vals)
-        except: pass
+            self.hist_date_from = self.read_date_filter(self.hist_from)
+            self.hist_date_to = self.read_date_filter(self.hist_to)
+        except ValueError:
+            messagebox.showwarning("Warning", "Dates must use the YYYY-MM-DD format")
+            return
+        if self.hist_filter == (self.hist_date_from, self.hist_date_to):
+            self.history_pager.refresh()
+        else:
+            self.hist_filter = (self.hist_date_from, self.hist_date_to)
+            self.history_pager.reset()
 
     # ================= PRODUCT TAB =================
     def build_product_tab(self):
@@ -274,7 +711,9 @@ class CoffeeShopApp:
         tk.Label(search_frame, text="Search Product:").pack(side="left")
         
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", self.on_search_change) # Auto-search on typing
+        # Auto-search on typing; a burst of keystrokes triggers a single redraw
+        self.search_debouncer = Debouncer(self.root, 150, lambda: self.load_products(query=self.search_var.get()))
+        self.search_var.trace("w", self.on_search_change)
         self.search_entry = tk.Entry(search_frame, textvariable=self.search_var)
         self.search_entry.pack(side="left", fill="x", expand=True, padx=5)
 
@@ -298,6 +737,9 @@ class CoffeeShopApp:
 
         self.prod_tree.pack(fill="both", expand=True)
         self.prod_tree.bind("<ButtonRelease-1>", self.select_product) # Populate form on click
+        self.prod_binding = TreeviewBinding(self.prod_tree)
+        # Redraw on any product change (keeps the current search)
+        self.catalog.subscribe(lambda event, row: self.refresh_tab(self.tab_products))
         self.load_products()
 
     def browse_image(self):
@@ -306,35 +748,34 @@ class CoffeeShopApp:
         self.p_image.delete(0, tk.END); self.p_image.insert(0, f)
 
     def on_search_change(self, *args):
-        """Event handler for live search."""
-        self.load_products(query=self.search_var.get())
+        """Event handler for live search (debounced)."""
+        self.search_debouncer()
 
     def load_products(self, query=""):
-        """Fetches products and renders them with images."""
-        for row in self.prod_tree.get_children(): self.prod_tree.delete(row)
+        """Fetches products and renders them with images (only changed rows are redrawn)."""
         self.img_cache = [] # Reset image cache
         base_dir = os.path.dirname(os.path.abspath(__file__))
+        rows = []
 
-        for row in db.fetch_all_products():
-            row_id, name, desc, price, rel_path = row
-            # Filter by search query
-            if query and query.lower() not in name.lower(): continue 
+        # Filtered in memory by the catalog (no database query per keystroke)
+        for row in self.catalog.search(query):
+            row_id, name, desc, price_cents, rel_path = row
 
             # Load Image
             full_path = os.path.join(base_dir, rel_path) if rel_path else ""
             display_img = None
             if full_path and os.path.exists(full_path):
                 try:
-                    load = Image.open(full_path).resize((100, 100))
-                    display_img = ImageTk.PhotoImage(load)
+                    display_img = self.images.get(full_path, (100, 100))
                     self.img_cache.append(display_img) # Keep reference
                 except: pass
 
-            formatted_price = f"₱{price:,.2f}" 
+            formatted_price = format_cents(price_cents)
             vals = (row_id, name, formatted_price, desc, rel_path)
 
-            if display_img: self.prod_tree.insert("", "end", text="", image=display_img, values=vals)
-            else: self.prod_tree.insert("", "end", text="No Img", values=vals)
+            if display_img: rows.append((row_id, {"text": "", "image": display_img, "values": vals}))
+            else: rows.append((row_id, {"text": "No Img", "image": "", "values": vals}))
+        self.prod_binding.sync(rows)
 
     def create_product(self):
         """Validates inputs and adds a new product to DB."""
@@ -342,22 +783,41 @@ class CoffeeShopApp:
             messagebox.showwarning("Warning", "Please fill in all fields")
             return
         try:
-            price_value = float(self.p_price.get())
-            db.insert_product(self.p_name.get(), self.p_desc.get(), price_value, self.p_image.get())
-            self.load_products(); self.clear_product_form(); self.load_order_menu()
-        except: messagebox.showerror("Error", "Invalid Input")
+            price_cents = to_cents(self.p_price.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid Input")
+            return
+        try:
+            self.catalog.add(self.p_name.get(), self.p_desc.get(), price_cents, self.p_image.get())
+        except (sqlite3.IntegrityError, ServiceError) as e: # e.g. a duplicate name; in service mode too
+            messagebox.showerror("Error", f"Could not add the product: {e}")
+            return
+        self.clear_product_form() # Catalog subscribers redraw both product views
 
     def update_product(self):
         """Updates the selected product in the DB."""
         if hasattr(self, 'selected_prod_id'):
-            db.update_product_data(self.selected_prod_id, self.p_name.get(), self.p_desc.get(), float(self.p_price.get()), self.p_image.get())
-            self.load_products(); self.load_order_menu()
+            try:
+                price_cents = to_cents(self.p_price.get())
+            except ValueError:
+                messagebox.showerror("Error", "Invalid Input")
+                return
+            try:
+                # Catalog subscribers redraw both product views
+                self.catalog.update(self.selected_prod_id, self.p_name.get(), self.p_desc.get(), price_cents, self.p_image.get())
+            except (sqlite3.IntegrityError, ServiceError) as e: # e.g. a duplicate name; in service mode too
+                messagebox.showerror("Error", f"Could not update the product: {e}")
+                return
+            # Drop cached thumbnails of the old picture if the image path changed
+            if self.selected_prod_image and self.selected_prod_image != self.p_image.get():
+                base_dir = os.path.dirname(os.path.abspath(__file__))
+                self.images.invalidate(os.path.join(base_dir, self.selected_prod_image))
 
     def delete_product(self):
         """Removes the selected product from the DB."""
         if hasattr(self, 'selected_prod_id'):
-            db.delete_product_data(self.selected_prod_id)
-            self.load_products(); self.clear_product_form(); self.load_order_menu()
+            self.catalog.delete(self.selected_prod_id)
+            self.clear_product_form()
 
     def select_product(self, event):
         """Populates the input form when a table row is clicked."""
@@ -365,9 +825,10 @@ class CoffeeShopApp:
         if not sel: return
         val = self.prod_tree.item(sel, 'values')
         if val and len(val) >= 5:
-            self.clear_product_form(); self.selected_prod_id = val[0]
+            self.clear_product_form(); self.selected_prod_id = val[0]; self.selected_prod_image = val[4]
             self.p_name.insert(0, val[1])
-            self.p_price.insert(0, val[2].replace("₱", "")) 
+            product = self.catalog.get(val[0])
+            self.p_price.insert(0, cents_to_str(product[3]) if product else "")
             self.p_desc.insert(0, val[3])
             self.p_image.insert(0, val[4])
 
@@ -406,6 +867,7 @@ class CoffeeShopApp:
         self.cart_tree.heading("Total", text="Total"); self.cart_tree.column("Total", width=80, anchor="center")
         self.cart_tree.pack(side="top", fill="both", expand=True, pady=(10, 5))
         self.cart_tree.bind("<<TreeviewSelect>>", self.on_cart_select)
+        self.cart_binding = TreeviewBinding(self.cart_tree)
 
         # Cart Controls
         btn_frame = tk.Frame(right, bg="#ddd")
@@ -413,78 +875,70 @@ class CoffeeShopApp:
         tk.Button(btn_frame, text="Update Quantity", command=self.update_cart_item, bg="#FFC107").pack(side="left", expand=True, fill="x", padx=2)
         tk.Button(btn_frame, text="Remove Item", command=self.remove_cart_item, bg="#F44336", fg="white").pack(side="left", expand=True, fill="x", padx=2)
 
-        self.lbl_total = tk.Label(right, text="Total: ₱0.00", font=("Arial", 14, "bold"), bg="#ddd", fg="#d9534f")
+        self.lbl_total = tk.Label(right, text=f"Total: {format_cents(0)}", font=("Arial", 14, "bold"), bg="#ddd", fg="#d9534f")
         self.lbl_total.pack(side="bottom", pady=10)
         tk.Button(right, text="Checkout", command=self.checkout, bg="#4CAF50", fg="white", font=("Arial", 12, "bold")).pack(side="bottom", fill="x", pady=5)
 
-        self.menu_items = []; self.load_order_menu()
+        self.menu_items = []; self.menu_index = {} # menu_index: product_id -> listbox position
+        self.load_order_menu()
+        self.catalog.subscribe(lambda event, row: self.refresh_tab(self.tab_orders)) # Keep the POS menu in sync
 
     def on_cart_select(self, event):
         """Syncs cart selection back to product list for editing."""
         selected_row = self.cart_tree.selection()
         if not selected_row: return
-        cart_item = self.cart_tree.item(selected_row, 'values')
-        if not cart_item: return
-        product_name = cart_item[0]
-        current_qty = cart_item[1]
-        
-        # Find matching item in menu list
-        found_index = -1
-        for index, item in enumerate(self.menu_items):
-            if item[1] == product_name: 
-                found_index = index
-                break
-        
-        # Highlight and set quantity
-        if found_index != -1:
+        line = self.cart.get(int(selected_row[0])) # Cart rows are keyed by product ID
+        if line is None: return
+
+        # Highlight the product (if it is still on the menu) and set quantity
+        found_index = self.menu_index.get(line.product_id)
+        if found_index is not None:
             self.product_listbox.selection_clear(0, tk.END)
             self.product_listbox.selection_set(found_index)
             self.product_listbox.see(found_index)
             self.product_listbox.activate(found_index)
             self.order_qty.delete(0, tk.END)
-            self.order_qty.insert(0, current_qty)
+            self.order_qty.insert(0, line.qty)
             self.show_selected_details(None)
 
     def remove_cart_item(self):
-        """Removes selected item from the internal cart list."""
+        """Removes selected item from the cart."""
         sel = self.cart_tree.selection()
         if not sel: return
-        idx = self.cart_tree.index(sel[0])
-        del self.cart_data[idx]
-        self.update_cart_view()
+        product_id = int(sel[0])
+        self.cart.remove(product_id)
+        self.cart_binding.remove(product_id)
+        self.show_cart_total()
 
     def update_cart_item(self):
         """Updates quantity of selected cart item."""
         sel = self.cart_tree.selection()
         if not sel: return
-        idx = self.cart_tree.index(sel[0])
         try:
             new_qty = int(self.order_qty.get())
             if new_qty <= 0: return 
         except ValueError: return
-        item = self.cart_data[idx]
-        item['qty'] = new_qty
-        item['subtotal'] = item['price'] * new_qty
-        self.update_cart_view()
+        self.show_cart_line(self.cart.set_quantity(int(sel[0]), new_qty))
 
     def load_order_menu(self):
         """Populates the listbox with available products."""
-        self.product_listbox.delete(0, tk.END); self.menu_items = []
-        for p in db.fetch_all_products():
-            self.menu_items.append(p); self.product_listbox.insert(tk.END, f"{p[1]} - ₱{p[3]}")
+        self.product_listbox.delete(0, tk.END); self.menu_items = []; self.menu_index = {}
+        for p in self.catalog.all():
+            self.menu_index[p[0]] = len(self.menu_items)
+            self.menu_items.append(p); self.product_listbox.insert(tk.END, f"{p[1]} - {format_cents(p[3])}")
 
     def show_selected_details(self, event):
         """Updates preview area when a product is clicked."""
         sel = self.product_listbox.curselection()
         if sel:
             item = self.menu_items[sel[0]]
-            self.lbl_preview.config(text=f"Item: {item[1]} (₱{item[3]})")
+            self.lbl_preview.config(text=f"Item: {item[1]} ({format_cents(item[3])})")
             # Load Image Preview
             base_dir = os.path.dirname(os.path.abspath(__file__))
             full_path = os.path.join(base_dir, item[4]) if item[4] else ""
             if full_path and os.path.exists(full_path):
                 try:
-                    img = ImageTk.PhotoImage(Image.open(full_path).resize((150, 150)))
+                    img = self.images.get(full_path, (150, 150))
                     self.img_label.config(image=img); self.img_label.image = img
                 except: self.img_label.config(image='')
             else: self.img_label.config(image='')
@@ -494,35 +948,57 @@ class CoffeeShopApp:
         sel = self.product_listbox.curselection()
         if not sel: return
         item = self.menu_items[sel[0]] 
-        qty = int(self.order_qty.get())
-        
-        self.cart_data.append({
-            "id": item[0],    # Store Product ID for database
-            "name": item[1], 
-            "price": item[3], 
-            "qty": qty, 
-            "subtotal": item[3] * qty
-        })
-        self.update_cart_view()
+        try:
+            qty = int(self.order_qty.get())
+            if qty <= 0: return
+        except ValueError: return
+        # A product already in the cart gets its quantity raised instead of a second line
+        self.show_cart_line(self.cart.add(item[0], item[1], item[3], qty))
+
+    def cart_row(self, line):
+        """Treeview row for a cart line; rows are keyed by product ID."""
+        return line.product_id, {"values": (line.name, line.qty, format_cents(line.subtotal_cents))}
+
+    def show_cart_line(self, line):
+        """Redraws one added/changed cart line and the total."""
+        if line is not None: self.cart_binding.upsert(*self.cart_row(line))
+        self.show_cart_total()
+
+    def show_cart_total(self):
+        self.lbl_total.config(text=f"Total: {format_cents(self.cart.total_cents)}")
 
     def update_cart_view(self):
-        """Refreshes the cart Treeview and calculates grand total."""
-        for row in self.cart_tree.get_children(): self.cart_tree.delete(row)
-        total = sum(i["subtotal"] for i in self.cart_data)
-        for i in self.cart_data: self.cart_tree.insert("", tk.END, values=(i["name"], i["qty"], f"₱{i['subtotal']}"))
-        self.lbl_total.config(text=f"Total: ₱{total}"); self.current_total_value = total
+        """Refreshes the whole cart Treeview (changed lines only) and the grand total."""
+        self.cart_binding.sync([self.cart_row(line) for line in self.cart])
+        self.show_cart_total()
 
     def checkout(self):
-        """Finalizes order and saves to database."""
-        if not self.cart_data: return
-        # Send user_id and cart items to database module
-        db.save_order(self.current_user_id, self.cart_data)
-        
+        """
+        Finalizes the order. It is written to the local order journal (instant, survives a
+        busy or locked database) and saved to the database in the background.
+        """
+        if not self.cart: return
+        try:
+            self.journal.append(self.current_user_id, self.cart.to_items())
+        except OSError as e:
+            messagebox.showerror("Error", f"Order was not saved: {e}")
+            return
         messagebox.showinfo("Success", "Order Saved!")
-        self.cart_data=[]; self.update_cart_view()
-        self.load_order_status() # Update kitchen view
-        self.refresh_home()      # Update stats
-        self.load_history()      # Update history
+        self.cart.clear(); self.update_cart_view()
+
+    def on_orders_flushed(self, saved):
+        """Runs on the UI thread once journaled orders reach the database."""
+        if not hasattr(self, "notebook") or not self.notebook.winfo_exists(): return # Login screen
+        # Update stats and history (hidden tabs refresh on their next visit).
+        # The Kitchen Monitor picks new orders up from the order change feed.
+        self.refresh_tab(self.tab_home, self.tab_analytics, self.tab_history)
+
+    def on_order_dead_lettered(self, record, error):
+        """Runs on the UI thread when the journal gives up on an order, so staff can re-enter it."""
+        items = ", ".join(f"{item['qty']} x product #{item['id']}" for item in record["items"])
+        messagebox.showerror("Order Not Saved",
+                             f"An order taken at {record['order_date']} (UTC) could not be saved to the database:\n"
+                             f"{items}\n\n{error}\n\nIt was set aside in {self.journal.dead_letter_path}.")
 
     # ================= KITCHEN TAB =================
     def build_status_tab(self):
@@ -537,6 +1013,8 @@ class CoffeeShopApp:
         tk.Button(btn_container, text="Refresh List", command=self.load_order_status).pack(side="left", padx=10)
         tk.Button(btn_container, text="Mark Selected as Complete", bg="#4CAF50", fg="white", command=self.mark_order_complete).pack(side="left", padx=10)
         tk.Button(btn_container, text="Delete Order", bg="#d9534f", fg="white", command=self.delete_order).pack(side="left", padx=10)
+        self.status_loading = tk.Label(btn_container, text="", bg="#eee", fg="#777", width=18)
+        self.status_loading.pack(side="left")
 
         # Content Layout
         content_frame = tk.Frame(self.tab_status)
@@ -548,15 +1026,22 @@ class CoffeeShopApp:
         tk.Label(left_frame, text="Incoming Orders", font=("Georgia", 12, "bold")).pack(pady=(0, 10))
         
         # Order Queue Treeview
+        tree_frame = tk.Frame(left_frame)
+        tree_frame.pack(fill="both", expand=True)
         cols = ("ID", "Cashier", "Total", "Status", "Date")
-        self.status_tree = ttk.Treeview(left_frame, columns=cols, show="headings", style="Standard.Treeview")
+        self.status_tree = ttk.Treeview(tree_frame, columns=cols, show="headings", style="Standard.Treeview")
         self.status_tree.heading("ID", text="Order ID", anchor="center"); self.status_tree.column("ID", width=60, anchor="center")
         self.status_tree.heading("Cashier", text="Cashier", anchor="center"); self.status_tree.column("Cashier", width=100, anchor="center")
         self.status_tree.heading("Total", text="Total", anchor="center"); self.status_tree.column("Total", width=60, anchor="center")
         self.status_tree.heading("Status", text="Status", anchor="center"); self.status_tree.column("Status", width=80, anchor="center")
         self.status_tree.heading("Date", text="Date", anchor="center"); self.status_tree.column("Date", width=140, anchor="center")
         
-        self.status_tree.pack(fill="both", expand=True)
+        status_scroll = ttk.Scrollbar(tree_frame, orient="vertical")
+        status_scroll.pack(side="right", fill="y")
+        self.status_tree.pack(side="left", fill="both", expand=True)
+        # Orders are fetched one page at a time as the user scrolls
+        self.status_pager = PagedTreeview(self.status_tree, self.fetch_status_page, self.make_status_item,
+                                          scrollbar=status_scroll, run_async=self.run_status_query)
         # Color Coding for status
         self.status_tree.tag_configure("Pending", background="#ffcccc") 
         self.status_tree.tag_configure("Complete", background="#ccffcc")
@@ -570,18 +1055,111 @@ class CoffeeShopApp:
         self.kitchen_details_list = tk.Listbox(right_frame, font=("Courier", 12), bg="white", bd=0, highlightthickness=0)
         self.kitchen_details_list.pack(fill="both", expand=True, padx=10, pady=5)
 
-        self.load_order_status()
+        self.start_order_feed()
+
+    def fetch_status_page(self, after_order_id, limit):
+        """Page loader for the Kitchen Monitor pager."""
+        return db.fetch_orders_by_status(after_order_id=after_order_id, limit=limit)
+
+    def run_status_query(self, fn, *args, on_done=None):
+        """Runs Kitchen Monitor page queries on the worker thread, showing a loading message."""
+        self.run_db(fn, *args, on_done=on_done, status_label=self.status_loading)
+
+    def make_status_item(self, order):
+        """Formats one order row for the Kitchen Monitor."""
+        o_id, cashier, total_val, status, date = order
+        fmt_total = format_cents(total_val)
+        # Apply color tag based on status
+        return {"values": (o_id, cashier, fmt_total, status, date), "tags": (status,)}
 
     def load_order_status(self):
-        """Fetches active orders."""
-        for row in self.status_tree.get_children(): self.status_tree.delete(row)
-        self.kitchen_details_list.delete(0, tk.END) 
-        
-        for order in db.fetch_orders_by_status():
-            o_id, cashier, total_val, status, date = order
-            fmt_total = f"₱{total_val:,.2f}"
-            # Apply color tag based on status
-            self.status_tree.insert("", tk.END, values=(o_id, cashier, fmt_total, status, date), tags=(status,))
+        """Re-reads the loaded orders (older ones load on scroll) and updates only the changed rows."""
+        def refreshed():
+            if not self.status_tree.selection():
+                self.kitchen_details_list.delete(0, tk.END) # Selected order is gone
+        self.status_pager.refresh(on_done=refreshed)
+
+    # --- ORDER CHANGE FEED ---
+    # Instead of reloading the whole list, the Kitchen Monitor polls the OrderEvent table
+    # (see migrations/006) for changes newer than the last one it applied and updates only
+    # the affected rows. This also picks up orders rung up on other tills.
+    ORDER_FEED_INTERVAL_MS = 1000
+    ORDER_FEED_BATCH = 500
+
+    def start_order_feed(self):
+        """Remembers the current feed position, loads the first page, then starts polling."""
+        self.kitchen_seq = None
+        self.feed_busy = False
+
+        def started(seq):
+            self.kitchen_seq = seq
+            self.status_tree.after(self.ORDER_FEED_INTERVAL_MS, self.poll_order_feed)
+        # The worker runs calls in order, so the page load sees every event up to 'seq'
+        self.run_db(db.get_latest_event_seq, on_done=started, status_label=self.status_loading)
+        self.load_order_status()
+
+    def poll_order_feed(self, reschedule=True):
+        """Fetches order changes since the last poll and applies them to the Kitchen Monitor."""
+        if not self.status_tree.winfo_exists(): return # Logged out; stop polling
+        if self.kitchen_seq is None: return # Feed not started yet
+        if self.feed_busy:
+            # A manual poll (reschedule=False) may be in flight, so a skipped timer tick keeps the chain going
+            if reschedule:
+                self.status_tree.after(self.ORDER_FEED_INTERVAL_MS, self.poll_order_feed)
+            return
+
+        def next_poll():
+            self.feed_busy = False
+            if reschedule and self.status_tree.winfo_exists():
+                self.status_tree.after(self.ORDER_FEED_INTERVAL_MS, self.poll_order_feed)
+
+        def received(changes):
+            next_poll()
+            if changes and self.status_tree.winfo_exists():
+                self.apply_order_changes(changes)
+
+        def failed(error):
+            print(f"Database Error: {error}")
+            next_poll()
+
+        self.feed_busy = True
+        self.db_exec.run(db.fetch_order_changes, self.kitchen_seq, self.ORDER_FEED_BATCH,
+                         on_done=received, on_error=failed)
+
+    def apply_order_changes(self, changes):
+        """
+        Applies a batch of (seq, event, order_id, cashier, total, status, date) changes:
+        1. Events were pruned or too many arrived at once: fall back to a full reload.
+        2. Keep only the latest state of each order.
+        3. Deleted orders are removed, shown orders updated in place, new orders added on top.
+        """
+        first_seq, last_seq = changes[0][0], changes[-1][0]
+        skipped = first_seq > self.kitchen_seq + 1
+        self.kitchen_seq = last_seq
+        if skipped or len(changes) >= self.ORDER_FEED_BATCH:
+            self.load_order_status()
+            return
+
+        latest = {}
+        for seq, event, o_id, cashier, total_val, status, date in changes:
+            latest[o_id] = (o_id, cashier, total_val, status, date)
+
+        binding = self.status_pager.binding
+        shown = self.status_tree.get_children()
+        top_id = int(shown[0]) if shown else 0
+        # Oldest first, so that inserting at the top leaves the newest order first
+        for o_id in sorted(latest):
+            order = latest[o_id]
+            if order[3] is None: # The order no longer exists
+                binding.remove(o_id)
+            elif o_id in binding:
+                binding.upsert(o_id, self.make_status_item(order))
+            elif o_id > top_id: # A new order (older ones not shown yet load on scroll)
+                binding.upsert(o_id, self.make_status_item(order), index=0)
+                top_id = o_id
+
+        if not self.status_tree.selection():
+            self.kitchen_details_list.delete(0, tk.END) # Selected order is gone
 
     def show_kitchen_details(self, event):
         """Shows specific items for the selected order."""
@@ -594,12 +1172,12 @@ class CoffeeShopApp:
         self.kitchen_details_list.insert(tk.END, f"Order #{order_id}")
         self.kitchen_details_list.insert(tk.END, "-"*30)
 
-        try:
-            items = db.get_order_items(order_id) 
+        def show(items):
+            # Ignore the result if another order was selected meanwhile
+            if self.kitchen_details_list.get(0) != f"Order #{order_id}": return
             for qty, name in items:
                 self.kitchen_details_list.insert(tk.END, f"{qty}x {name}")
-        except AttributeError:
-             self.kitchen_details_list.insert(tk.END, "Error: Update database.py")
+        self.run_db(db.get_order_items, order_id, on_done=show, status_label=self.status_loading)
 
     def mark_order_complete(self):
         """Updates status to Complete in DB."""
@@ -609,10 +1187,12 @@ class CoffeeShopApp:
             return
         item = self.status_tree.item(sel)
         order_id = item['values'][0]
-        db.update_order_status(order_id, "Complete")
-        self.load_order_status()
-        self.load_history() 
-        messagebox.showinfo("Success", f"Order #{order_id} Completed!")
+
+        def updated(result):
+            self.poll_order_feed(reschedule=False) # Show the change now rather than on the next poll
+            self.refresh_tab(self.tab_history)
+            messagebox.showinfo("Success", f"Order #{order_id} Completed!")
+        self.run_db(db.update_order_status, order_id, "Complete", on_done=updated, status_label=self.status_loading)
 
     def delete_order(self):
         """Permanently removes an order."""
@@ -626,13 +1206,14 @@ class CoffeeShopApp:
 
         item = self.status_tree.item(sel)
         order_id = item['values'][0]
-        db.delete_order_data(order_id)
-        # Refresh all views
-        self.load_order_status()
-        self.load_history()
-        self.refresh_home()
-        self.kitchen_details_list.delete(0, tk.END)
-        messagebox.showinfo("Success", f"Order #{order_id} has been deleted.")
+
+        def deleted(result):
+            # Refresh all views
+            self.poll_order_feed(reschedule=False)
+            self.refresh_tab(self.tab_history, self.tab_home, self.tab_analytics)
+            self.kitchen_details_list.delete(0, tk.END)
+            messagebox.showinfo("Success", f"Order #{order_id} has been deleted.")
+        self.run_db(db.delete_order_data, order_id, on_done=deleted, status_label=self.status_loading)
         
     def clear_frame(self):
         """Utility to remove all widgets from the main window."""
@@ -641,4 +1222,9 @@ class CoffeeShopApp:
 if __name__ == "__main__":
     root = tk.Tk()
     app = CoffeeShopApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.journal.stop()     # Last flush attempt; anything left is replayed on next start
+    app.db_exec.shutdown()
+    if not isinstance(db, ServiceClient):
+        db.dump_query_stats() # The service keeps (and dumps) its own statistics
+    db.close_connections() # Release the pooled SQLite connections on exit
\ No newline at end of file
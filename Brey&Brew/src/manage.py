@@ -0,0 +1,192 @@
+"""
+FILE: manage.py
+PURPOSE: Command-line maintenance tools for the Brey&Brew database.
+
+Usage (run from the src folder):
+    python manage.py migrate        Apply schema.sql and any pending migrations
+    python manage.py check-plans    Verify the hot queries use an index
+    python manage.py check-totals   Verify stored order totals against OrderItem (--fix to repair)
+    python manage.py rebuild-rollups  Recompute the dashboard/analytics summary tables
+    python manage.py archive [--days N]  Move old completed orders to the archive database
+    python manage.py calibrate-login [--target-ms MS] [--save]   Tune the password hashing cost
+    python manage.py hash-passwords  Hash any plaintext passwords left from older versions
+    python manage.py import-products FILE.csv
+    python manage.py import-orders FILE.csv [--batch-size N]
+    python manage.py export-sales FILE [--from DATE] [--to DATE] [--all-statuses]   (.csv or .bbcol)
+    python manage.py serve [--host H] [--port P] [--report-snapshot SECONDS]   Run the shared order service for several tills
+"""
+import argparse
+import sys
+import time
+import auth
+import database as db
+import exporter
+import importer
+from money import format_cents
+
+def cmd_migrate(args):
+    """Creates/updates the schema and reports the resulting version."""
+    db.setup_database()
+    with db.get_cursor() as cursor:
+        print(f"Schema version: {db.get_schema_version(cursor)}")
+    return 0
+
+def cmd_check_plans(args):
+    """Fails (exit code 1) if any hot query still needs a full table scan."""
+    db.setup_database()
+    failures = db.check_query_plans()
+    for name, plan in failures.items():
+        print(f"FULL SCAN in {name}:")
+        for line in plan: print(f"    {line}")
+    if not failures:
+        print(f"OK: all {len(db.HOT_QUERIES)} hot queries use an index.")
+    return 1 if failures else 0
+
+def cmd_check_totals(args):
+    """Fails (exit code 1) if any stored [Order] total disagrees with its OrderItem rows."""
+    db.setup_database()
+    mismatches = db.verify_order_totals(fix=args.fix)
+    for order_id, stored_total, actual_total, stored_count, actual_count in mismatches:
+        print(f"Order #{order_id}: stored {format_cents(stored_total)} / {stored_count} items, "
+              f"actual {format_cents(actual_total)} / {actual_count} items")
+    if not mismatches:
+        print("OK: all stored order totals match OrderItem.")
+    elif args.fix:
+        print(f"Repaired {len(mismatches)} order(s).")
+        return 0
+    return 1 if mismatches else 0
+
+def cmd_rebuild_rollups(args):
+    """Recomputes the trigger-maintained summary tables from the raw orders."""
+    db.setup_database()
+    started = time.perf_counter()
+    db.rebuild_sales_rollups()
+    print(f"Rebuilt sales rollups in {time.perf_counter() - started:.1f}s.")
+    return 0
+
+def cmd_archive(args):
+    """Moves completed orders older than the horizon into the archive database."""
+    db.setup_database()
+    started = time.perf_counter()
+    moved = db.archive_orders(older_than_days=args.days, batch_size=args.batch_size)
+    stats = db.get_archive_stats()
+    print(f"Archived {moved} order(s) in {time.perf_counter() - started:.1f}s to {db.archive_path()}")
+    print(f"Live orders: {stats['live_orders']} (oldest {stats['oldest_live'] or '-'}), "
+          f"archived orders: {stats['archived_orders']} (newest {stats['newest_archived'] or '-'})")
+    return 0
+
+def cmd_calibrate_login(args):
+    """Times password hashing at increasing costs and picks the slowest one under the target."""
+    db.setup_database()
+    chosen, timings = auth.calibrate(target_ms=args.target_ms)
+    for cost, ms in timings:
+        print(f"  cost {cost:>9}: {ms:7.1f} ms{'  <- chosen' if cost == chosen else ''}")
+    print(f"Current cost: {db.get_password_cost()}, recommended for {args.target_ms} ms: {chosen}")
+    if args.save:
+        db.set_password_cost(chosen)
+        print("Saved. Existing passwords are re-hashed with the new cost on each user's next login.")
+    return 0
+
+def cmd_hash_passwords(args):
+    """Converts every legacy plaintext password to a salted hash."""
+    db.setup_database()
+    print(f"Hashed {db.hash_plaintext_passwords()} plaintext password(s).")
+    return 0
+
+def cmd_import_products(args):
+    """Bulk inserts/updates products from a CSV file."""
+    db.setup_database()
+    count = importer.import_products_csv(args.file, batch_size=args.batch_size)
+    print(f"Imported {count} product(s).")
+    return 0
+
+def cmd_import_orders(args):
+    """Bulk imports historical orders from a CSV file."""
+    db.setup_database()
+    started = time.perf_counter()
+    imported, skipped = importer.import_orders_csv(
+        args.file, batch_size=args.batch_size,
+        on_progress=lambda count: print(f"  {count} orders...", end="\r"))
+    print() # End the progress line
+    for line_number, reason in skipped:
+        print(f"Skipped line {line_number}: {reason}")
+    print(f"Imported {imported} order(s) in {time.perf_counter() - started:.1f}s ({len(skipped)} line(s) skipped).")
+    return 1 if skipped else 0
+
+def cmd_export_sales(args):
+    """Streams sales line items to a CSV or columnar (.bbcol) file."""
+    db.setup_database()
+    started = time.perf_counter()
+    rows = exporter.export_sales(
+        args.file, fmt=args.format, date_from=args.date_from, date_to=args.date_to,
+        status=None if args.all_statuses else "Complete", chunk_size=args.chunk_size,
+        on_progress=lambda count: print(f"  {count} rows...", end="\r"))
+    print() # End the progress line
+    print(f"Exported {rows} line item(s) in {time.perf_counter() - started:.1f}s.")
+    return 0
+
+def cmd_serve(args):
+    """Runs the HTTP/JSON order service until interrupted."""
+    import asyncio
+    from order_service import OrderService
+    db.REPORT_SNAPSHOT_SECONDS = args.report_snapshot
+    if args.report_snapshot:
+        print(f"Reports read {db.report_snapshot_paths()[0]}, refreshed at most every {args.report_snapshot:g}s")
+    try:
+        asyncio.run(OrderService(args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    print(f"Query statistics written to {db.dump_query_stats()}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Brey&Brew database maintenance")
+    parser.add_argument("--db", default=db.DB_NAME, help="Path to the SQLite database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="apply pending migrations").set_defaults(func=cmd_migrate)
+    sub.add_parser("check-plans", help="EXPLAIN QUERY PLAN check for hot queries").set_defaults(func=cmd_check_plans)
+    totals = sub.add_parser("check-totals", help="verify stored order totals against OrderItem")
+    totals.add_argument("--fix", action="store_true", help="rewrite mismatched totals from OrderItem")
+    totals.set_defaults(func=cmd_check_totals)
+    sub.add_parser("rebuild-rollups", help="recompute sales summary tables").set_defaults(func=cmd_rebuild_rollups)
+    archive = sub.add_parser("archive", help="move old completed orders to the archive database")
+    archive.add_argument("--days", type=int, default=db.ARCHIVE_AFTER_DAYS, help="archive orders older than this many days")
+    archive.add_argument("--batch-size", type=int, default=5000, help="orders moved per transaction")
+    archive.set_defaults(func=cmd_archive)
+    calibrate = sub.add_parser("calibrate-login", help="benchmark and tune the password hashing cost")
+    calibrate.add_argument("--target-ms", type=float, default=250, help="slowest acceptable login hash")
+    calibrate.add_argument("--save", action="store_true", help="store the recommended cost in the database")
+    calibrate.set_defaults(func=cmd_calibrate_login)
+    sub.add_parser("hash-passwords", help="hash remaining plaintext passwords").set_defaults(func=cmd_hash_passwords)
+    for name, func, help_text in (("import-products", cmd_import_products, "bulk import products from CSV"),
+                                  ("import-orders", cmd_import_orders, "bulk import historical orders from CSV")):
+        imp = sub.add_parser(name, help=help_text)
+        imp.add_argument("file", help="CSV file to import")
+        imp.add_argument("--batch-size", type=int, default=5000, help="rows/orders per transaction")
+        imp.set_defaults(func=func)
+    export = sub.add_parser("export-sales", help="stream sales line items to CSV or columnar file")
+    export.add_argument("file", help="output file (.csv, or .bbcol for the columnar format)")
+    export.add_argument("--format", choices=("csv", "columnar"), help="override the format chosen from the extension")
+    export.add_argument("--from", dest="date_from", help="first order date, YYYY-MM-DD")
+    export.add_argument("--to", dest="date_to", help="last order date, YYYY-MM-DD")
+    export.add_argument("--all-statuses", action="store_true", help="include Pending orders")
+    export.add_argument("--chunk-size", type=int, default=5000, help="rows read per query")
+    export.set_defaults(func=cmd_export_sales)
+    serve = sub.add_parser("serve", help="run the local HTTP/JSON order service")
+    serve.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    serve.add_argument("--port", type=int, default=8765, help="TCP port to listen on")
+    serve.add_argument("--report-snapshot", type=float, default=db.REPORT_SNAPSHOT_SECONDS, metavar="SECONDS",
+                       help="serve history/dashboard/analytics/exports from a copy refreshed at most this often (0 = live)")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db.DB_NAME = args.db
+    try:
+        return args.func(args)
+    finally:
+        db.close_connections()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+FILE: money.py
+PURPOSE: Peso amounts as integer centavos.
+
+Prices, order totals and revenue are stored and added up as whole centavos (see
+migrations/010), so sums are exact. Pesos only appear at the edges:
+    to_cents()      user input and CSV files -> centavos
+    format_cents()  centavos -> '₱1,234.56' for the screens
+    cents_to_str()  centavos -> '1234.56' for exports and form fields
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CURRENCY_SYMBOL = "₱"
+
+def to_cents(amount):
+    """
+    Converts a peso amount (str, int, float or Decimal) to integer centavos, rounding half up.
+    Accepts '1,234.50' and a leading '₱'. Raises ValueError for anything that is not a number.
+    """
+    if isinstance(amount, str):
+        amount = amount.strip().replace(CURRENCY_SYMBOL, "").replace(",", "")
+    try:
+        value = Decimal(str(amount))
+    except InvalidOperation:
+        raise ValueError(f"Not a peso amount: {amount!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Not a peso amount: {amount!r}")
+    return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def cents_to_str(cents):
+    """Plain decimal string, e.g. 123456 -> '1234.56' (no symbol or thousands separator)."""
+    sign = "-" if cents < 0 else ""
+    pesos, centavos = divmod(abs(cents), 100)
+    return f"{sign}{pesos}.{centavos:02d}"
+
+def format_cents(cents):
+    """Display string, e.g. 123456 -> '₱1,234.56'."""
+    sign = "-" if cents < 0 else ""
+    pesos, centavos = divmod(abs(cents), 100)
+    return f"{sign}{CURRENCY_SYMBOL}{pesos:,}.{centavos:02d}"
+
+def average_cents(total_cents, count):
+    """total_cents / count rounded half up to a whole centavo (0 when count is 0)."""
+    if not count: return 0
+    return (2 * total_cents + count) // (2 * count)
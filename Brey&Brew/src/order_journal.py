@@ -0,0 +1,272 @@
+"""
+FILE: order_journal.py
+PURPOSE: Offline-first checkout with write-behind to the database.
+
+checkout() appends the order to a local append-only journal file (one JSON line, fsync'd)
+and returns immediately. A background flusher thread then writes journaled orders to
+[Order]/OrderItem in batches via database.save_orders_bulk, retrying with back-off when
+SQLite is busy ("database is locked"). Orders that were not flushed yet are replayed the
+next time the journal is opened, and each order's unique client_ref makes replays safe.
+If a batch fails for any other reason (e.g. a product that no longer exists), its orders
+are saved one at a time; an order that still fails after DEAD_LETTER_AFTER attempts is
+moved to '<journal>.dead' and reported, so it cannot hold back the orders behind it.
+
+Journal records:
+    {"type": "order", "ref": "...", "user_id": 1, "order_date": "...",
+     "items": [{"id": 3, "qty": 2, "price_cents": 12500}, ...]}
+    {"type": "ack", "ref": "...", "order_id": 42}   # written once the order is in the database
+    {"type": "dead", "ref": "..."}                  # order moved to the dead-letter file
+The file is truncated whenever every order in it has been acknowledged.
+
+Each till has its own journal ('<database>-orders-<terminal>.journal', terminal from
+BREYBREW_TERMINAL or the host name) and holds an exclusive lock on it while open, so one
+till's truncate or replay can never touch another till's orders.
+"""
+import http.client
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+import database as db
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+TERMINAL_ID = os.environ.get("BREYBREW_TERMINAL") or socket.gethostname()
+# Errors worth retrying the whole batch for: a busy database or an unreachable order service
+TRANSIENT_ERRORS = (sqlite3.OperationalError, OSError, http.client.HTTPException)
+
+class JournalInUseError(RuntimeError):
+    """Raised when another running instance already holds this till's journal."""
+
+def default_journal_path(terminal_id=None):
+    """This till's journal file next to the database, e.g. 'Brey&Brew-orders-TILL1.journal'."""
+    terminal = re.sub(r"[^A-Za-z0-9_.-]", "_", terminal_id or TERMINAL_ID)
+    return f"{os.path.splitext(db.DB_NAME)[0]}-orders-{terminal}.journal"
+
+def _lock_exclusive(path):
+    """Opens 'path' and takes a non-blocking exclusive lock, held until the file is closed."""
+    lock_file = open(path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        raise JournalInUseError(f"{path} is locked by another running instance; "
+                                f"give each till its own BREYBREW_TERMINAL name") from None
+    return lock_file
+
+class OrderJournal:
+    """
+    Durable order queue in front of the database.
+
+    save_batch(orders) -> order_ids: the write function (database.save_orders_bulk by default).
+    on_flushed(saved): called from the flusher thread with [(ref, order_id), ...] after each batch.
+    on_dead_letter(record, error): called from the flusher thread for an order given up on.
+    """
+    FLUSH_INTERVAL = 0.5 # Seconds between checks when nothing new was appended
+    MAX_RETRY_DELAY = 10.0
+    DEAD_LETTER_AFTER = 3 # Failed attempts (saved on its own) before an order is set aside
+
+    def __init__(self, path=None, save_batch=None, batch_size=200, on_flushed=None, on_dead_letter=None):
+        self.path = path or default_journal_path()
+        # Lives on a separate file because _replay() replaces the journal itself
+        self._lock_file = _lock_exclusive(self.path + ".lock")
+        self.save_batch = save_batch or db.save_orders_bulk
+        self.batch_size = batch_size
+        self.on_flushed = on_flushed
+        self.on_dead_letter = on_dead_letter
+        self.dead_letter_path = self.path + ".dead"
+        self._lock = threading.Lock()      # Guards the file and _pending
+        self._pending = {}                 # ref -> order record, in append order
+        self._failures = {}                # ref -> failed attempts (flusher thread only)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    # --- Public API ---
+    def append(self, user_id, items):
+        """
+        Durably records a new order and returns its client_ref.
+        Only local file I/O happens here, so checkout latency doesn't depend on the database.
+        """
+        record = {
+            "type": "order",
+            "ref": uuid.uuid4().hex,
+            "user_id": user_id,
+            "items": [{"id": i["id"], "qty": i["qty"], "price_cents": i["price_cents"]} for i in items],
+            # Same format/timezone (UTC) as SQLite's CURRENT_TIMESTAMP, taken at checkout time
+            "order_date": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            self._write([record])
+            self._pending[record["ref"]] = record
+        self._wakeup.set()
+        return record["ref"]
+
+    def pending_count(self):
+        """Number of journaled orders not yet in the database."""
+        with self._lock:
+            return len(self._pending)
+
+    def start(self):
+        """Starts the background flusher (pending orders from a previous run are flushed first)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="order-journal", daemon=True)
+            self._thread.start()
+            self._wakeup.set()
+
+    def stop(self, timeout=5.0):
+        """Stops the flusher after one last flush attempt and closes the file."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            self._file.close()
+        self._lock_file.close()
+
+    def flush(self):
+        """
+        Writes every pending order to the database now (on the calling thread).
+        Raises one of TRANSIENT_ERRORS if the database stays busy, or RuntimeError if some orders
+        failed but have not been dead-lettered yet; the unsaved orders remain journaled.
+        """
+        while self._flush_batch():
+            pass
+
+    # --- Internal helpers ---
+    def _run(self):
+        retry_delay = self.FLUSH_INTERVAL
+        while True:
+            self._wakeup.wait(retry_delay)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                retry_delay = self.FLUSH_INTERVAL
+            except sqlite3.OperationalError as e:
+                # Typically "database is locked" while another terminal writes: back off and retry
+                retry_delay = min(retry_delay * 2, self.MAX_RETRY_DELAY)
+                print(f"Order Journal: database busy ({e}), retrying in {retry_delay:.1f}s")
+            except Exception as e:
+                # Never drop an order: keep it journaled and retry slowly
+                retry_delay = self.MAX_RETRY_DELAY
+                print(f"Order Journal Error: {e}")
+            if self._stopping.is_set():
+                return
+
+    def _flush_batch(self):
+        """
+        Saves up to batch_size pending orders. Returns False when nothing was pending.
+        1. The batch is saved in one call; transient errors propagate so _run() backs off.
+        2. Any other error: each order is saved on its own, so one bad order does not block
+           the rest. An order that has failed DEAD_LETTER_AFTER times is dead-lettered.
+        """
+        with self._lock:
+            batch = list(self._pending.values())[:self.batch_size]
+        if not batch: return False
+
+        try:
+            self._settle(self._save(batch), [])
+            return True
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            print(f"Order Journal: batch of {len(batch)} failed ({e}), saving the orders one at a time")
+
+        saved, dead, failing = [], [], 0
+        try:
+            for record in batch:
+                try:
+                    saved.extend(self._save([record]))
+                except TRANSIENT_ERRORS:
+                    raise
+                except Exception as e:
+                    attempts = self._failures[record["ref"]] = self._failures.get(record["ref"], 0) + 1
+                    if attempts >= self.DEAD_LETTER_AFTER:
+                        dead.append((record, str(e)))
+                    else:
+                        failing += 1
+        finally:
+            self._settle(saved, dead)
+        if failing:
+            raise RuntimeError(f"{failing} order(s) could not be saved, retrying")
+        return True
+
+    def _save(self, records):
+        """Writes records with save_batch. Returns [(ref, order_id), ...]."""
+        order_ids = self.save_batch([{"user_id": r["user_id"], "items": r["items"],
+                                      "order_date": r["order_date"], "client_ref": r["ref"]} for r in records])
+        return [(record["ref"], order_id) for record, order_id in zip(records, order_ids)]
+
+    def _settle(self, saved, dead):
+        """Acknowledges saved orders and moves dead ones to the dead-letter file, then notifies."""
+        if not saved and not dead: return
+        with self._lock:
+            if dead:
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(dict(record, error=error)) + "\n" for record, error in dead))
+                    f.flush()
+                    os.fsync(f.fileno())
+            for ref, _ in saved:
+                self._pending.pop(ref, None)
+                self._failures.pop(ref, None)
+            for record, _ in dead:
+                self._pending.pop(record["ref"], None)
+                self._failures.pop(record["ref"], None)
+            if self._pending:
+                self._write([{"type": "ack", "ref": ref, "order_id": order_id} for ref, order_id in saved] +
+                            [{"type": "dead", "ref": record["ref"]} for record, _ in dead])
+            else:
+                self._truncate() # Everything is settled: start a fresh, empty journal
+        if saved and self.on_flushed: self.on_flushed(saved)
+        for record, error in dead:
+            print(f"Order Journal: order {record['ref']} moved to {self.dead_letter_path}: {error}")
+            if self.on_dead_letter: self.on_dead_letter(record, error)
+
+    def _write(self, records):
+        """Appends records and forces them to disk before returning (caller holds the lock)."""
+        self._file.write("".join(json.dumps(r) + "\n" for r in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _truncate(self):
+        self._file.close()
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def _replay(self):
+        """
+        Loads orders that were journaled but never acknowledged (e.g. the app closed or crashed),
+        then rewrites the file with just those orders so acks and any torn line are dropped.
+        """
+        if not os.path.exists(self.path): return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # Torn last line from a crash mid-write; that checkout never completed
+                if record.get("type") == "order":
+                    self._pending[record["ref"]] = record
+                elif record.get("type") in ("ack", "dead"):
+                    self._pending.pop(record["ref"], None)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in self._pending.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
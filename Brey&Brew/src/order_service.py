@@ -0,0 +1,245 @@
+"""
+FILE: order_service.py
+PURPOSE: Local HTTP/JSON service that owns the database for several tills and kitchen screens.
+
+Instead of every Tkinter instance opening 'Brey&Brew.db' directly (and fighting over SQLite
+file locks), one OrderService process owns the file and exposes the database.py functions:
+
+    POST /rpc/<function>   body: {"args": [...], "kwargs": {...}}
+                           reply: {"result": ...}  or  {"error": "...", "type": "IntegrityError"}
+    GET  /health           reply: {"result": "ok"}
+
+Writes run on ONE writer thread (so they never contend for the write lock), reads run on a
+small reader pool (WAL lets them run alongside the writer). ServiceClient is a drop-in
+replacement for the 'db' module in main.py:
+
+    python manage.py serve --port 8765            # on the machine holding the database
+    BREYBREW_SERVICE_URL=http://127.0.0.1:8765 python main.py
+"""
+import asyncio
+import http.client
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import database as db
+
+# database.py functions reachable over the service.
+# validate_login runs on the writer thread because it may re-hash the password (UPDATE User).
+READ_FUNCTIONS = {
+    "fetch_all_users", "get_dashboard_stats", "get_daily_sales",
+    "fetch_all_products", "search_products", "fetch_orders_by_status", "fetch_sales_history",
+    "get_order_items", "get_latest_event_seq", "fetch_order_changes",
+    "get_hourly_sales", "get_weekly_sales", "get_top_products", "get_cashier_sales", "fetch_order_points",
+    "fetch_sales_export_chunk", "get_query_stats", "get_slow_queries",
+}
+WRITE_FUNCTIONS = {
+    "validate_login", "create_user", "insert_product", "update_product_data", "delete_product_data",
+    "save_order", "save_orders_bulk", "save_products_bulk", "update_order_status", "delete_order_data",
+    "prune_order_events", "rebuild_sales_rollups", "archive_orders",
+    "reset_query_stats",
+}
+MAX_BODY_BYTES = 16 * 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class ServiceError(Exception):
+    """Raised by ServiceClient for server-side errors that have no local sqlite3 equivalent."""
+
+# ================= SERVER =================
+class OrderService:
+    """asyncio HTTP server exposing database.py with a single writer thread."""
+
+    def __init__(self, host="127.0.0.1", port=8765, readers=4):
+        self.host = host
+        self.port = port
+        self._writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="service-writer")
+        self._reader_pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="service-reader")
+        self._server = None
+        self._handlers = {} # Open connection task -> its stream writer, closed on close()
+
+    async def start(self):
+        """Prepares the schema and starts listening; self.port holds the real port (useful with port=0)."""
+        await asyncio.get_running_loop().run_in_executor(self._writer_pool, db.setup_database)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Order service listening on http://{self.host}:{self.port} (database: {db.DB_NAME})")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._handlers.values()): writer.close() # Ends idle keep-alive connections
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self._writer_pool.shutdown(wait=True)
+        self._reader_pool.shutdown(wait=True)
+
+    async def _handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one keep-alive connection."""
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line: break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""): break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "Request body too large", "type": "ServiceError"}
+                    await self._respond(writer, status, payload)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method, path, body)
+                await self._respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close": break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass # Client went away or sent garbage; just drop the connection
+        finally:
+            writer.close()
+            self._handlers.pop(task, None)
+
+    async def _respond(self, writer, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+    async def _dispatch(self, method, path, body):
+        """Routes one request. Returns (http_status, json_payload)."""
+        if method == "GET" and path == "/health":
+            return 200, {"result": "ok"}
+        if method != "POST" or not path.startswith("/rpc/"):
+            return 404, {"error": f"No route for {method} {path}", "type": "ServiceError"}
+
+        name = path[len("/rpc/"):]
+        if name in WRITE_FUNCTIONS: pool = self._writer_pool
+        elif name in READ_FUNCTIONS: pool = self._reader_pool
+        else: return 404, {"error": f"Unknown function '{name}'", "type": "ServiceError"}
+
+        try:
+            request = json.loads(body or b"{}")
+            args, kwargs = request.get("args", []), request.get("kwargs", {})
+        except (ValueError, AttributeError):
+            return 400, {"error": "Body must be a JSON object", "type": "ServiceError"}
+
+        func = getattr(db, name)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(pool, lambda: func(*args, **kwargs))
+        except sqlite3.Error as e:
+            return 500, {"error": str(e), "type": type(e).__name__}
+        except (TypeError, KeyError, ValueError) as e:
+            return 400, {"error": str(e), "type": type(e).__name__}
+        return 200, {"result": result}
+
+def run_in_background(host="127.0.0.1", port=0):
+    """
+    Starts an OrderService on its own event-loop thread (for tests, benchmarks and demos).
+    Returns (service, stop) where stop() shuts it down; service.port is the bound port.
+    """
+    loop = asyncio.new_event_loop()
+    service = OrderService(host, port)
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start())
+        started.set()
+        loop.run_forever()
+        loop.run_until_complete(service.close())
+        loop.close()
+
+    thread = threading.Thread(target=run, name="order-service", daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return service, stop
+
+# ================= CLIENT =================
+class ServiceClient:
+    """
+    Drop-in replacement for the database module that forwards calls to an OrderService.
+    Every exposed function is available as a method, e.g. client.fetch_orders_by_status("Pending").
+    Rows come back as lists instead of tuples. Each thread uses its own keep-alive HTTP connection.
+    """
+    ERROR_TYPES = {"IntegrityError": sqlite3.IntegrityError, "OperationalError": sqlite3.OperationalError}
+
+    def __init__(self, url, timeout=10.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def setup_database(self):
+        """The service prepares the schema itself; nothing to do on a till."""
+
+    def close_connections(self):
+        """Closes every HTTP connection opened by this client."""
+        with self._lock:
+            for conn in self._connections: conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def close_thread_connection(self):
+        """Closes the calling thread's HTTP connection (for short-lived worker threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None: return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections: self._connections.remove(conn)
+        conn.close()
+
+    def call(self, name, *args, **kwargs):
+        """
+        Calls one database function on the service and returns its result.
+        A kept-alive connection the server has closed fails once; the call is then retried on a
+        new connection if it is a read, or if the request never left this machine. A write that
+        was sent may already be committed, so it is not sent twice (the error is raised instead).
+        """
+        body = json.dumps({"args": args, "kwargs": kwargs})
+        for attempt in range(2):
+            conn = self._connection()
+            sent = False
+            try:
+                conn.request("POST", f"/rpc/{name}", body=body, headers={"Content-Type": "application/json"})
+                sent = True
+                response = conn.getresponse()
+                payload = json.loads(response.read() or b"{}")
+                break
+            except (http.client.HTTPException, ConnectionError):
+                conn.close(); self._local.conn = None
+                if attempt or (sent and name not in READ_FUNCTIONS): raise
+        if "error" in payload:
+            raise self.ERROR_TYPES.get(payload.get("type"), ServiceError)(payload["error"])
+        return payload["result"]
+
+    def __getattr__(self, name):
+        if name in READ_FUNCTIONS or name in WRITE_FUNCTIONS:
+            return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+        raise AttributeError(name)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock: self._connections.append(conn)
+        return conn
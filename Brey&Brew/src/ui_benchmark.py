@@ -0,0 +1,214 @@
+"""
+FILE: ui_benchmark.py
+PURPOSE: Headless timing harness for the CoffeeShopApp screens.
+
+Drives the real application (main.CoffeeShopApp) in a withdrawn Tk window against a
+seeded copy of a benchmark database (see benchmark.py) and times what staff wait for:
+
+    login_to_dashboard        Login pressed -> Home tab built and its stats shown
+    search_keystroke_redraw   search text typed -> product list redrawn (includes the 150 ms debounce)
+    load_products             the product list redraw on its own (images, Treeview diff)
+    checkout_ui               checkout() call, i.e. how long the till is blocked
+    checkout_saved            checkout() -> order written to the database by the journal flusher
+    checkout_on_kitchen       checkout() -> order visible on the Kitchen Monitor (change feed poll)
+    kitchen_reload            Kitchen Monitor refresh of the loaded pages
+
+Tk still needs a display: on a server run it under Xvfb, e.g.
+    xvfb-run python ui_benchmark.py --orders 100k -o ui.json
+    python ui_benchmark.py --compare ui.json          (same options as benchmark.py)
+Message boxes are replaced with no-ops while the harness runs.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tkinter as tk
+from tkinter import messagebox
+import benchmark
+import database as db
+
+os.environ.pop("BREYBREW_SERVICE_URL", None) # Always drive the local database
+import main # noqa: E402  (imported after the environment is fixed)
+from image_cache import ImageCache # noqa: E402
+
+SEARCH_QUERIES = ("Product 0", "Product 01", "Product 1", "Prod", "Product 05", "")
+PRODUCT_IMAGES = ("Caramel Macchiato.png", "Chai Latte.png", "Flat White.png", "Hot Chocolate.png",
+                  "Hot Mocha.png", "Iced Americano.png", "Iced Latte.png", "Irish Coffee.png", "Matcha Latte.png")
+
+class Harness:
+    """Owns the Tk root and the app, and pumps the event loop until a condition holds."""
+
+    def __init__(self, show=False, timeout=60.0):
+        self.timeout = timeout
+        self.root = tk.Tk()
+        if not show: self.root.withdraw()
+        self._patched = {}
+        for name, result in (("showinfo", "ok"), ("showwarning", "ok"), ("showerror", "ok"), ("askyesno", True)):
+            self._patched[name] = getattr(messagebox, name)
+            setattr(messagebox, name, lambda *args, _result=result, **kwargs: _result)
+        self.app = main.CoffeeShopApp(self.root)
+        # Cold thumbnail cache, so image resizes are part of the first measurements
+        self._thumbs = tempfile.TemporaryDirectory()
+        self.app.images = ImageCache(self._thumbs.name)
+
+    def pump_until(self, condition, timeout=None):
+        """Processes Tk events (including worker results) until condition() is true."""
+        deadline = time.perf_counter() + (timeout or self.timeout)
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("UI did not reach the expected state in time")
+            self.root.update()
+            time.sleep(0.0005)
+        self.root.update_idletasks() # Let pending redraws/geometry run before the clock stops
+
+    def select_tab(self, tab):
+        self.app.notebook.select(tab)
+        self.pump_until(lambda: str(tab) in self.app.built_tabs)
+
+    def close(self):
+        try:
+            self.app.journal.stop()
+            self.app.db_exec.shutdown()
+            self.root.destroy()
+        finally:
+            for name, original in self._patched.items(): setattr(messagebox, name, original)
+            db.close_connections()
+            self._thumbs.cleanup()
+
+def seed_images():
+    """Gives the synthetic products real images so the resize/thumbnail path is exercised."""
+    with db.transaction() as cursor:
+        cursor.execute("SELECT product_id FROM Product ORDER BY product_id")
+        cursor.executemany("UPDATE Product SET image_path=? WHERE product_id=?",
+                           [(os.path.join("images", PRODUCT_IMAGES[i % len(PRODUCT_IMAGES)]), product_id)
+                            for i, (product_id,) in enumerate(cursor.fetchall())])
+
+# --- SCENARIOS ---
+def measure_login(harness):
+    app = harness.app
+    app.show_login_screen()
+    harness.root.update()
+    app.entry_user.insert(0, "cashier00")
+    app.entry_pass.insert(0, "benchmark")
+    started = time.perf_counter()
+    app.login()
+    harness.pump_until(lambda: hasattr(app, "lbl_revenue") and app.lbl_revenue.winfo_exists()
+                       and app.lbl_revenue.cget("text") != "...")
+    return (time.perf_counter() - started) * 1000
+
+def measure_search(harness, query, samples):
+    """Types 'query' into the product search; records keystroke->redraw and the redraw itself."""
+    app = harness.app
+    done = []
+    original = app.load_products
+
+    def timed_load(query=""):
+        load_started = time.perf_counter()
+        original(query=query)
+        done.append((time.perf_counter() - load_started) * 1000)
+    app.load_products = timed_load # The debouncer looks the method up on every call
+    try:
+        started = time.perf_counter()
+        app.search_var.set(query)
+        harness.pump_until(lambda: done)
+        samples["search_keystroke_redraw"].append((time.perf_counter() - started) * 1000)
+        samples["load_products"].append(done[0])
+    finally:
+        app.load_products = original
+
+def measure_checkout(harness, rng, samples):
+    app = harness.app
+    menu = app.catalog.all()
+    app.cart.clear()
+    for product in rng.sample(menu, min(3, len(menu))):
+        app.cart.add(product[0], product[1], product[3], rng.randint(1, 3))
+    app.update_cart_view()
+    harness.root.update()
+
+    flushed = []
+    original = app.on_orders_flushed
+    app.on_orders_flushed = lambda saved: (flushed.append(time.perf_counter()), original(saved))
+    shown = app.status_tree.get_children()
+    top_before = shown[0] if shown else None
+    try:
+        started = time.perf_counter()
+        app.checkout()
+        samples["checkout_ui"].append((time.perf_counter() - started) * 1000)
+        harness.pump_until(lambda: flushed)
+        samples["checkout_saved"].append((flushed[0] - started) * 1000)
+        harness.pump_until(lambda: (app.status_tree.get_children() or (None,))[0] != top_before)
+        samples["checkout_on_kitchen"].append((time.perf_counter() - started) * 1000)
+    finally:
+        app.on_orders_flushed = original
+
+def measure_kitchen_reload(harness):
+    app = harness.app
+    done = []
+    started = time.perf_counter()
+    app.status_pager.refresh(on_done=lambda: done.append(True))
+    harness.pump_until(lambda: done)
+    return (time.perf_counter() - started) * 1000
+
+def run_ui_benchmarks(order_count, repeat=10, data_dir=".benchmark", seed=benchmark.SEED, show=False):
+    """Runs every UI scenario 'repeat' times. Returns {scenario: stats}."""
+    db.close_connections()
+    db.DB_NAME = benchmark.prepare_dataset(data_dir, order_count, seed)
+    db.ARCHIVE_AFTER_DAYS = 10 ** 6 # The synthetic history is old: keep the app from archiving it mid-run
+    seed_images()
+    rng = random.Random(seed)
+    samples = {name: [] for name in ("login_to_dashboard", "search_keystroke_redraw", "load_products", "checkout_ui",
+                                     "checkout_saved", "checkout_on_kitchen", "kitchen_reload")}
+    harness = Harness(show=show)
+    try:
+        for _ in range(repeat):
+            samples["login_to_dashboard"].append(measure_login(harness))
+        app = harness.app
+        harness.select_tab(app.tab_status)
+        harness.pump_until(lambda: app.kitchen_seq is not None and app.status_tree.get_children())
+        for _ in range(repeat):
+            samples["kitchen_reload"].append(measure_kitchen_reload(harness))
+        harness.select_tab(app.tab_products)
+        for i in range(repeat):
+            measure_search(harness, SEARCH_QUERIES[i % len(SEARCH_QUERIES)], samples)
+        harness.select_tab(app.tab_orders)
+        for _ in range(repeat):
+            measure_checkout(harness, rng, samples)
+    finally:
+        harness.close()
+    return {name: benchmark.summarize(values) for name, values in samples.items() if values}
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Brey&Brew UI timing harness")
+    parser.add_argument("--orders", default="10k", help="order history size, e.g. 10k or 1M")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per scenario")
+    parser.add_argument("--seed", type=int, default=benchmark.SEED, help="synthetic data seed")
+    parser.add_argument("--data-dir", default=".benchmark", help="where generated databases are cached")
+    parser.add_argument("--show", action="store_true", help="keep the window visible")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    order_count = benchmark.parse_size(args.orders)
+    stats = run_ui_benchmarks(order_count, args.repeat, args.data_dir, args.seed, args.show)
+    results = {"meta": benchmark.environment_info(args.seed, args.repeat), "results": {str(order_count): stats}}
+    for name, values in stats.items():
+        print(f"  {name:<26} median {values['median_ms']:9.2f} ms   p95 {values['p95_ms']:9.2f} ms   max {values['max_ms']:9.2f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if not args.compare: return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = benchmark.compare(baseline, results, args.threshold)
+    for size, name, before, after, ratio, regressed in rows:
+        print(f"  {name:<26} {before:9.2f} -> {after:9.2f} ms  x{ratio:5.2f}{'  REGRESSION' if regressed else ''}")
+    return 1 if any(row[5] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,195 @@
+"""
+FILE: widgets.py
+PURPOSE: Reusable Tkinter helpers shared by the tabs in main.py.
+"""
+import tkinter as tk
+
+class TreeviewBinding:
+    """
+    Keeps a ttk.Treeview in sync with a list of rows WITHOUT deleting and re-inserting everything.
+    Each row is identified by its primary key (used as the Treeview item id), so a refresh only
+    inserts new rows, updates rows whose display options changed, moves rows that changed
+    position and deletes rows that disappeared.
+
+    Rows are given as (key, options) pairs, where options are Treeview.insert() keyword
+    arguments, e.g. (5, {"values": (5, "Sofhia", "₱120.00"), "tags": ("Pending",)}).
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._options = {} # iid -> options last written to the tree (also keeps image references alive)
+
+    def sync(self, rows):
+        """Makes the tree show exactly 'rows', in order, touching only what changed."""
+        wanted = [(str(key), options) for key, options in rows]
+        wanted_ids = {iid for iid, _ in wanted}
+
+        # 1. Delete rows that are gone
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted_ids]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale: self._options.pop(iid, None)
+
+        # 2. Insert new rows / update changed rows
+        for index, (iid, options) in enumerate(wanted):
+            if iid not in self._options:
+                self.tree.insert("", index, iid=iid, **options)
+            elif self._options[iid] != options:
+                self.tree.item(iid, **options)
+            self._options[iid] = options
+
+        # 3. Fix the order only if it differs
+        children = list(self.tree.get_children())
+        order = [iid for iid, _ in wanted]
+        if children != order:
+            for index, iid in enumerate(order):
+                if children[index] != iid:
+                    self.tree.move(iid, "", index)
+                    children.remove(iid); children.insert(index, iid)
+
+    def append(self, rows):
+        """Adds rows at the end (used for paging); rows already shown are updated in place."""
+        for key, options in rows:
+            self.upsert(key, options)
+
+    def upsert(self, key, options, index=tk.END):
+        """Inserts one row at 'index', or updates it where it is if it already exists."""
+        iid = str(key)
+        if iid not in self._options:
+            self.tree.insert("", index, iid=iid, **options)
+        elif self._options[iid] != options:
+            self.tree.item(iid, **options)
+        self._options[iid] = options
+
+    def remove(self, key):
+        """Deletes one row if it is shown."""
+        iid = str(key)
+        if iid in self._options:
+            self.tree.delete(iid)
+            del self._options[iid]
+
+    def clear(self):
+        """Deletes every row."""
+        self.tree.delete(*self.tree.get_children())
+        self._options = {}
+
+    def __len__(self):
+        return len(self._options)
+
+    def __contains__(self, key):
+        return str(key) in self._options
+
+class Debouncer:
+    """
+    Coalesces bursts of calls (e.g. one per keystroke) into a single call to 'callback'
+    once 'delay_ms' milliseconds have passed without a new call.
+    """
+
+    def __init__(self, widget, delay_ms, callback):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self.callback = callback
+        self._after_id = None
+
+    def __call__(self, *args):
+        """Schedules the callback, cancelling any call still waiting."""
+        self.cancel()
+        self._after_id = self.widget.after(self.delay_ms, self._fire)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self):
+        """Runs a pending call immediately."""
+        if self._after_id is not None:
+            self.cancel()
+            self.callback()
+
+    def _fire(self):
+        self._after_id = None
+        self.callback()
+
+class PagedTreeview:
+    """
+    Virtualized loading for a ttk.Treeview backed by a keyset-paginated query.
+    Only the first page is fetched up front; the next page is fetched when the user
+    scrolls near the bottom, so large histories never load (or render) all at once.
+    Rows are written through a TreeviewBinding, so refreshes only touch changed rows.
+
+    fetch_page(after_key, limit) -> list of rows (after_key is None for the first page)
+    make_item(row) -> dict of Treeview.insert() options, e.g. {"values": (...), "tags": (...)}
+    row_key(row) -> the keyset value of a row (defaults to the first column)
+    run_async(fn, *args, on_done=callback) -> optional; runs fetch_page off the UI thread
+        (e.g. DatabaseExecutor.run). Without it, pages are fetched synchronously.
+    """
+    LOAD_THRESHOLD = 0.9 # Fetch the next page once the view shows 90% of the loaded rows
+
+    def __init__(self, tree, fetch_page, make_item, page_size=100, scrollbar=None, row_key=None, run_async=None):
+        self.tree = tree
+        self.run_async = run_async
+        self.binding = TreeviewBinding(tree)
+        self.fetch_page = fetch_page
+        self.make_item = make_item
+        self.page_size = page_size
+        self.scrollbar = scrollbar
+        self.row_key = row_key or (lambda row: row[0])
+        self.last_key = None
+        self.exhausted = False
+        self._pending = False # A next-page load is already scheduled or in flight
+        self._generation = 0  # Bumped by every reset/refresh so late pages from older loads are dropped
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        if scrollbar is not None:
+            scrollbar.configure(command=self.tree.yview)
+
+    def reset(self, on_done=None):
+        """Shows only the first page again (e.g. after the filter changed)."""
+        self._load_first(self.page_size, on_done)
+
+    def refresh(self, on_done=None):
+        """Re-reads every row currently loaded (at least one page) and applies only the differences."""
+        self._load_first(max(self.page_size, len(self.binding)), on_done)
+
+    def _load_first(self, limit, on_done):
+        self._generation += 1
+        generation = self._generation
+
+        def apply(rows):
+            if generation != self._generation: return # A newer reset/refresh superseded this one
+            self.binding.sync([(self.row_key(row), self.make_item(row)) for row in rows])
+            self.last_key = self.row_key(rows[-1]) if rows else None
+            self.exhausted = len(rows) < limit
+            self._pending = False
+            if on_done: on_done()
+        self._fetch(None, limit, apply)
+
+    def load_next_page(self):
+        """Appends the next page of rows, unless every row has been loaded."""
+        if self.exhausted:
+            self._pending = False
+            return
+        generation = self._generation
+
+        def apply(rows):
+            self._pending = False
+            if generation != self._generation: return
+            self.binding.append([(self.row_key(row), self.make_item(row)) for row in rows])
+            if rows: self.last_key = self.row_key(rows[-1])
+            if len(rows) < self.page_size: self.exhausted = True
+        self._pending = True
+        self._fetch(self.last_key, self.page_size, apply)
+
+    def _fetch(self, after_key, limit, callback):
+        if self.run_async is None:
+            callback(self.fetch_page(after_key, limit))
+        else:
+            self.run_async(self.fetch_page, after_key, limit, on_done=callback)
+
+    def _on_scroll(self, first, last):
+        """yscrollcommand hook: keeps the scrollbar in sync and triggers the next page."""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if not self.exhausted and not self._pending and float(last) >= self.LOAD_THRESHOLD:
+            self._pending = True
+            self.tree.after_idle(self.load_next_page)